@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк: сканер /proc против psutil в ResourceMonitor._get_top_memory_processes
+
+Запуск из корня проекта:
+    python scripts/bench_process_scan.py [--rounds 5] [--limit 25]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Добавляем корень проекта в Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.process_table import ProcessTable  # noqa: E402
+from src.resource_monitor import ResourceMonitor  # noqa: E402
+
+
+def _measure(func, rounds: int) -> list:
+    """Время выполнения func в миллисекундах за rounds прогонов"""
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сравнение скорости сканирования процессов")
+    parser.add_argument('--rounds', type=int, default=5, help="Количество прогонов")
+    parser.add_argument('--limit', type=int, default=25, help="Размер топа процессов")
+    args = parser.parse_args()
+
+    # max_age=0: каждый прогон делает новый проход по /proc, а не берет кэшированный снимок
+    monitor = ResourceMonitor(process_table=ProcessTable(max_age=0))
+    if not monitor._scanner:
+        print("/proc недоступен - сравнивать не с чем")
+        return 1
+
+    legacy = _measure(lambda: monitor._get_top_memory_processes_psutil(limit=args.limit), args.rounds)
+    scanner = _measure(lambda: monitor._get_top_memory_processes(limit=args.limit), args.rounds)
+
+    legacy_top = [p.pid for p in monitor._get_top_memory_processes_psutil(limit=args.limit)]
+    scanner_top = [p.pid for p in monitor._get_top_memory_processes(limit=args.limit)]
+    overlap = len(set(legacy_top) & set(scanner_top))
+
+    print(f"Прогонов: {args.rounds}, топ: {args.limit}")
+    print(f"psutil: медиана {statistics.median(legacy):.1f}ms, мин {min(legacy):.1f}ms")
+    print(f"/proc:  медиана {statistics.median(scanner):.1f}ms, мин {min(scanner):.1f}ms")
+    print(f"Ускорение: x{statistics.median(legacy) / max(statistics.median(scanner), 0.001):.1f}")
+    print(f"Совпадение топа: {overlap}/{len(legacy_top)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк: задержка обработки обновлений в режиме webhook без обращения к Telegram
+
+Поднимает слушатель webhook тем же start_updater, что и сервис, с подставным Bot API
+(getMe, setWebhook, sendMessage отвечают локально), отправляет обновления POST
+запросами и меряет время до ответа сервера (ack) и до sendMessage обработчика.
+
+Запуск из корня проекта:
+    python scripts/bench_webhook.py [--count 200] [--concurrency 10] [--updates updates.json]
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import secrets
+import socket
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from telegram import Update
+from telegram.ext import Application, ContextTypes, TypeHandler
+from telegram.request import BaseRequest, RequestData
+
+# Добавляем корень проекта в Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.telegram_bot import start_updater  # noqa: E402
+
+WEBHOOK_PATH = 'telegram'
+CHAT_ID = 1
+BOT_USER = {'id': 1000, 'is_bot': True, 'first_name': 'Sentinel', 'username': 'sentinel_bench_bot'}
+ADMIN_USER = {'id': CHAT_ID, 'is_bot': False, 'first_name': 'admin'}
+
+
+class FakeBotApi(BaseRequest):
+    """Подставной Bot API: отвечает локально и отмечает время каждого sendMessage"""
+
+    def __init__(self, replies: Dict[int, float], waiters: Dict[int, asyncio.Event]):
+        self.replies = replies
+        self.waiters = waiters
+        self._message_id = 0
+
+    @property
+    def read_timeout(self) -> Optional[float]:
+        return None
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url: str, method: str, request_data: Optional[RequestData] = None,
+                         read_timeout=None, write_timeout=None, connect_timeout=None,
+                         pool_timeout=None) -> Tuple[int, bytes]:
+        api_method = url.rsplit('/', 1)[-1]
+        params = request_data.parameters if request_data else {}
+
+        if api_method == 'getMe':
+            result = BOT_USER
+        elif api_method == 'sendMessage':
+            self._message_id += 1
+            text = str(params.get('text', ''))
+            if text.startswith('ack '):
+                update_id = int(text.split()[1])
+                self.replies[update_id] = time.perf_counter()
+                if update_id in self.waiters:
+                    self.waiters[update_id].set()
+            result = {
+                'message_id': self._message_id, 'date': int(time.time()),
+                'chat': {'id': params.get('chat_id', CHAT_ID), 'type': 'private'}, 'text': text,
+            }
+        else:
+            # setWebhook, deleteWebhook, answerCallbackQuery и прочие
+            result = True
+        return 200, json.dumps({'ok': True, 'result': result}).encode()
+
+
+def _synthetic_updates(count: int) -> List[dict]:
+    """Смесь команд и нажатий кнопок, как от администратора"""
+    updates = []
+    for i in range(count):
+        message = {
+            'message_id': i + 1, 'date': int(time.time()),
+            'chat': {'id': CHAT_ID, 'type': 'private'}, 'from': ADMIN_USER,
+        }
+        if i % 2:
+            updates.append({'callback_query': {
+                'id': str(i), 'from': ADMIN_USER, 'chat_instance': '1',
+                'data': 'bots_refresh', 'message': {**message, 'from': BOT_USER, 'text': '🤖 Боты'},
+            }})
+        else:
+            updates.append({'message': {
+                **message, 'text': '/status', 'entities': [{'type': 'bot_command', 'offset': 0, 'length': 7}],
+            }})
+    return updates
+
+
+def _load_updates(path: Path, count: int) -> List[dict]:
+    """Записанные обновления (JSON список объектов Update) повторяются до count штук"""
+    recorded = json.loads(path.read_text(encoding='utf-8'))
+    if isinstance(recorded, dict):
+        recorded = recorded.get('result', [recorded])
+    if not recorded:
+        raise ValueError(f"В {path} нет обновлений")
+    return [copy.deepcopy(recorded[i % len(recorded)]) for i in range(count)]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _report(title: str, values: List[float]):
+    if not values:
+        print(f"{title}: нет данных")
+        return
+    print(f"{title}: p50 {_percentile(values, 50):.1f}ms, p95 {_percentile(values, 95):.1f}ms, "
+          f"p99 {_percentile(values, 99):.1f}ms, max {max(values):.1f}ms")
+
+
+async def run(args) -> int:
+    replies: Dict[int, float] = {}
+    waiters: Dict[int, asyncio.Event] = {}
+    port = args.port or _free_port()
+    secret = secrets.token_urlsafe(16)
+
+    app = (
+        Application.builder()
+        .token('123456:bench')
+        .request(FakeBotApi(replies, waiters))
+        .get_updates_request(FakeBotApi(replies, waiters))
+        .concurrent_updates(True)
+        .build()
+    )
+
+    async def probe(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        chat = update.effective_chat
+        await context.bot.send_message(chat.id if chat else CHAT_ID, f"ack {update.update_id}")
+
+    app.add_handler(TypeHandler(Update, probe))
+
+    config = SimpleNamespace(
+        TELEGRAM_MODE='webhook', WEBHOOK_LISTEN='127.0.0.1', WEBHOOK_PORT=port,
+        WEBHOOK_PATH=WEBHOOK_PATH, WEBHOOK_URL=f"http://127.0.0.1:{port}/{WEBHOOK_PATH}",
+        WEBHOOK_SECRET=secret, WEBHOOK_CERT='', WEBHOOK_KEY='',
+    )
+
+    if args.updates:
+        updates = _load_updates(Path(args.updates), args.warmup + args.count)
+    else:
+        updates = _synthetic_updates(args.warmup + args.count)
+    for update_id, update in enumerate(updates, start=1):
+        update['update_id'] = update_id
+
+    await app.initialize()
+    await start_updater(app, config)
+    await app.start()
+
+    acks: List[float] = []
+    totals: List[float] = []
+    lost = 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+    headers = {'X-Telegram-Bot-Api-Secret-Token': secret}
+
+    async def post(client: httpx.AsyncClient, update: dict, measured: bool):
+        nonlocal lost
+        update_id = update['update_id']
+        waiters[update_id] = asyncio.Event()
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post(config.WEBHOOK_URL, json=update, headers=headers)
+            acked = time.perf_counter()
+            try:
+                await asyncio.wait_for(waiters[update_id].wait(), args.timeout)
+            except asyncio.TimeoutError:
+                lost += measured
+                return
+        if measured and response.status_code == 200:
+            acks.append((acked - started) * 1000)
+            totals.append((replies[update_id] - started) * 1000)
+
+    try:
+        async with httpx.AsyncClient() as client:
+            # Отказ без секрета подтверждает, что слушатель проверяет заголовок
+            rejected = await client.post(config.WEBHOOK_URL, json=updates[0])
+            for update in updates[:args.warmup]:
+                await post(client, update, measured=False)
+            started = time.perf_counter()
+            await asyncio.gather(*(post(client, update, measured=True) for update in updates[args.warmup:]))
+            elapsed = time.perf_counter() - started
+    finally:
+        await app.updater.stop()
+        await app.stop()
+        await app.shutdown()
+
+    print(f"Обновлений: {args.count}, параллельно: {args.concurrency}, прогрев: {args.warmup}")
+    print(f"Запрос без секрета: HTTP {rejected.status_code}")
+    _report("Ответ webhook (ack)", acks)
+    _report("До ответа обработчика", totals)
+    print(f"Пропускная способность: {len(totals) / elapsed:.0f} обновлений/с, потеряно: {lost}")
+    return 1 if lost else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Задержка обработки обновлений в режиме webhook")
+    parser.add_argument('--count', type=int, default=200, help="Количество измеряемых обновлений")
+    parser.add_argument('--concurrency', type=int, default=10, help="Одновременных запросов")
+    parser.add_argument('--warmup', type=int, default=10, help="Обновлений для прогрева (не учитываются)")
+    parser.add_argument('--updates', help="JSON файл с записанными обновлениями (список Update или ответ getUpdates)")
+    parser.add_argument('--port', type=int, default=0, help="Порт слушателя (0 - свободный)")
+    parser.add_argument('--timeout', type=float, default=5.0, help="Ожидание ответа обработчика (сек)")
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+Журнал исходящих уведомлений на диске (SQLite WAL) для SaldoranBotSentinel
+"""
+
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+SPOOL_FILE = 'alert_spool.db'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created REAL NOT NULL,
+    key TEXT NOT NULL,
+    text TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+
+@dataclass
+class SpooledAlert:
+    """Уведомление, ожидающее доставки"""
+    id: int
+    created: float  # time.time() постановки в журнал
+    key: str
+    text: str
+    attempts: int = 0
+
+
+class AlertSpool:
+    """Уведомление записывается в журнал до отправки и удаляется после доставки.
+
+    Недоставленное (Telegram недоступен, перезапуск стража) остается в журнале
+    и отправляется по порядку id после восстановления.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = self._connect(str(path))
+        except (OSError, sqlite3.Error) as e:
+            # Без журнала на диске уведомления живут только в памяти процесса
+            logger.error(f"Не удалось открыть журнал уведомлений {path}: {e}, используется журнал в памяти")
+            self._db = self._connect(':memory:')
+
+    @staticmethod
+    def _connect(database: str) -> sqlite3.Connection:
+        db = sqlite3.connect(database, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        # В WAL режиме NORMAL не теряет целостность, а fsync идет только на checkpoint
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(_SCHEMA)
+        return db
+
+    def append(self, text: str, key: str) -> int:
+        """Запись уведомления в журнал"""
+        cursor = self._db.execute(
+            "INSERT INTO alerts (created, key, text) VALUES (?, ?, ?)",
+            (time.time(), key, text)
+        )
+        return cursor.lastrowid
+
+    def pending(self, limit: int = 100) -> List[SpooledAlert]:
+        """Самые старые недоставленные уведомления"""
+        rows = self._db.execute(
+            "SELECT id, created, key, text, attempts FROM alerts ORDER BY id LIMIT ?", (limit,)
+        ).fetchall()
+        return [SpooledAlert(*row) for row in rows]
+
+    def ack(self, ids: Iterable[int]):
+        """Удаление доставленных (или окончательно отклоненных) уведомлений"""
+        self._db.executemany("DELETE FROM alerts WHERE id = ?", ((alert_id,) for alert_id in ids))
+
+    def mark_attempt(self, ids: Iterable[int]):
+        """Учет неудачной попытки отправки"""
+        self._db.executemany("UPDATE alerts SET attempts = attempts + 1 WHERE id = ?", ((alert_id,) for alert_id in ids))
+
+    def count(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM alerts").fetchone()[0]
+
+    def trim(self, max_rows: int, max_age: float) -> int:
+        """Удаление самых старых записей сверх лимита и старше max_age секунд; возвращает число удаленных"""
+        removed = self._db.execute("DELETE FROM alerts WHERE created < ?", (time.time() - max_age,)).rowcount
+        excess = self.count() - max_rows
+        if excess > 0:
+            removed += self._db.execute(
+                "DELETE FROM alerts WHERE id IN (SELECT id FROM alerts ORDER BY id LIMIT ?)", (excess,)
+            ).rowcount
+        return removed
+
+    def close(self):
+        try:
+            self._db.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Ошибка закрытия журнала уведомлений: {e}")
@@ -0,0 +1,121 @@
+"""
+Кэш списка ботов и путей к их скриптам для SaldoranBotSentinel
+"""
+
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+SCRIPT_NAMES = ('run_bot', 'stop_bot', 'restart_bot')
+
+
+@dataclass
+class _BotEntry:
+    """Разрешенные скрипты одной папки бота"""
+    mtime_ns: int
+    scripts: Dict[str, Path] = field(default_factory=dict)
+    # Скрипт есть, но не исполняемый: chmod +x не меняет mtime папки, поэтому проверяем повторно
+    pending: bool = False
+
+    def still_executable(self) -> bool:
+        """Найденные скрипты по-прежнему исполняемые (chmod -x тоже не меняет mtime папки)"""
+        return all(os.access(script, os.X_OK) for script in self.scripts.values())
+
+
+def _resolve_scripts(bot_path: Path) -> _BotEntry:
+    """Поиск run_bot/stop_bot/restart_bot (сначала .sh, затем без расширения)"""
+    entry = _BotEntry(os.stat(bot_path).st_mtime_ns)
+    for script_name in SCRIPT_NAMES:
+        for candidate in (bot_path / f"{script_name}.sh", bot_path / script_name):
+            if not candidate.exists():
+                continue
+            if os.access(candidate, os.X_OK):
+                entry.scripts[script_name] = candidate
+                break
+            entry.pending = True
+    return entry
+
+
+class BotDirectory:
+    """Список ботов в BOTS_DIR с кэшем, сбрасываемым по mtime BOTS_DIR и папок ботов.
+
+    Каждый запрос стоит один stat BOTS_DIR, по одному stat на папку бота
+    и access(X_OK) на каждый найденный скрипт.
+    """
+
+    def __init__(self, bots_dir: Path):
+        self.bots_dir = bots_dir
+        self._lock = threading.Lock()
+        self._dir_mtime: Optional[int] = None
+        self._entries: Dict[str, Optional[_BotEntry]] = {}
+        self._bots: List[str] = []
+        self._missing_logged = False
+
+    def _refresh(self):
+        """Перечитывание изменившихся частей"""
+        try:
+            dir_mtime = os.stat(self.bots_dir).st_mtime_ns
+        except OSError:
+            if not self._missing_logged:
+                logger.warning(f"Директория ботов не найдена: {self.bots_dir}")
+                self._missing_logged = True
+            self._dir_mtime = None
+            self._entries.clear()
+            self._bots = []
+            return
+        self._missing_logged = False
+
+        if dir_mtime != self._dir_mtime:
+            # Папки ботов добавлены, удалены или переименованы
+            try:
+                names = {
+                    entry.name for entry in os.scandir(self.bots_dir)
+                    if entry.is_dir() and not entry.name.startswith('.')
+                }
+            except OSError as e:
+                logger.error(f"Не удалось прочитать директорию ботов {self.bots_dir}: {e}")
+                return
+            self._dir_mtime = dir_mtime
+            for name in set(self._entries) - names:
+                del self._entries[name]
+            for name in names - set(self._entries):
+                self._entries[name] = None
+
+        for name, entry in list(self._entries.items()):
+            bot_path = self.bots_dir / name
+            try:
+                if (entry is None or entry.pending or os.stat(bot_path).st_mtime_ns != entry.mtime_ns
+                        or not entry.still_executable()):
+                    self._entries[name] = _resolve_scripts(bot_path)
+            except OSError:
+                # Папка исчезла между scandir и stat - следующий запрос перечитает BOTS_DIR
+                del self._entries[name]
+                self._dir_mtime = None
+
+        bots = sorted(name for name, entry in self._entries.items() if 'run_bot' in entry.scripts)
+        if bots != self._bots:
+            logger.info(f"Обнаружено ботов: {len(bots)}")
+            if bots:
+                logger.info(f"Список ботов: {', '.join(bots)}")
+            for name in sorted(set(self._entries) - set(bots)):
+                logger.debug(f"❌ Директория {name} не содержит исполняемых скриптов run_bot")
+            self._bots = bots
+
+    def bots(self) -> List[str]:
+        """Имена ботов (папки с исполняемым run_bot или run_bot.sh)"""
+        with self._lock:
+            self._refresh()
+            return list(self._bots)
+
+    def script(self, bot_name: str, script_name: str) -> Optional[Path]:
+        """Путь к исполняемому скрипту бота (run_bot, stop_bot, restart_bot)"""
+        with self._lock:
+            self._refresh()
+            entry = self._entries.get(bot_name)
+            return entry.scripts.get(script_name) if entry else None
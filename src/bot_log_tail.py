@@ -0,0 +1,358 @@
+"""
+Слежение за логами ботов (BOTS_DIR/<бот>/logs) для SaldoranBotSentinel
+"""
+
+import asyncio
+import os
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from .config import Config
+from .executor import BlockingExecutor
+from .inotify import (
+    IN_CREATE, IN_DELETE_SELF, IN_IGNORED, IN_MODIFY, IN_MOVE_SELF, IN_MOVED_TO,
+    IN_ONLYDIR, IN_Q_OVERFLOW, open_inotify,
+)
+from .log_reader import tail_lines
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# Какие файлы в logs/ бота считаются логами (supervisor.log, bot.log, ...)
+LOG_SUFFIX = '.log'
+# Больше этого за один проход не читаем: при всплеске вывода берется конец
+MAX_READ_BYTES = 1024 * 1024
+# Длинные строки обрезаются (в буфере и для незавершенной строки)
+MAX_LINE_LENGTH = 1000
+# Пауза перед чтением: серия записей бота читается одним проходом (сек)
+FLUSH_DELAY = 0.2
+
+_WATCH_MASK = IN_MODIFY | IN_CREATE | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+
+# Новые строки: (бот, файл, строки)
+LogListener = Callable[[str, str, List[str]], None]
+# Грязная запись: (бот, файл) или (бот, None) - перечитать все логи бота
+_DirtyKey = Tuple[str, Optional[str]]
+
+
+@dataclass
+class _TailedFile:
+    """Позиция чтения одного файла"""
+    inode: int
+    offset: int
+    partial: bytes = b''  # Строка без перевода строки - ждет продолжения
+    skip_line: bool = False  # Строка начата до пропуска всплеска - отбрасывается до перевода строки
+
+
+@dataclass
+class _BotLogs:
+    """Логи одного бота: наблюдение, позиции файлов и последние строки"""
+    logs_dir: Path
+    lines: Deque[Tuple[str, str]]  # (файл, строка)
+    files: Dict[str, _TailedFile] = field(default_factory=dict)
+    wd: Optional[int] = None
+    watched: bool = False  # logs/ существует и просмотрена
+
+
+# Результат первого просмотра logs/: watch, позиции файлов, строки для буфера
+_DirScan = Tuple[Optional[int], Dict[str, _TailedFile], List[Tuple[str, str]]]
+# Прочитанная порция: (бот, его состояние, файл, строки)
+_Batch = Tuple[str, _BotLogs, str, List[str]]
+
+
+def _decode_line(raw: bytes) -> str:
+    return raw[:MAX_LINE_LENGTH * 4].decode('utf-8', errors='replace').rstrip('\r')[:MAX_LINE_LENGTH]
+
+
+class BotLogTail:
+    """Последние строки логов каждого бота без чтения файлов по запросу.
+
+    Изменения в logs/ ботов приходят через inotify (без него - опрос раз в
+    BOT_LOG_POLL_INTERVAL), дописанные байты читаются с сохраненной позиции
+    в пуле потоков. Последние BOT_LOG_TAIL_LINES строк бота хранятся в кольцевом
+    буфере: /botlogs и уведомления о падении берут их из памяти. Подписчики
+    (add_listener) получают каждую новую порцию строк.
+    """
+
+    def __init__(self, executor: Optional[BlockingExecutor] = None):
+        self.executor = executor or BlockingExecutor()
+        self.buffer_size = Config.BOT_LOG_TAIL_LINES
+        self._bots: Dict[str, _BotLogs] = {}
+        self._wd_map: Dict[int, str] = {}
+        self._dirty: Set[_DirtyKey] = set()
+        self._listeners: List[LogListener] = []
+        self._read_lock = asyncio.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._poll_task: Optional[asyncio.Task] = None
+        self._inotify = open_inotify()
+
+    def add_listener(self, listener: LogListener):
+        """Подписка на новые строки логов ботов (вызывается в потоке event loop)"""
+        self._listeners.append(listener)
+
+    def lines(self, bot_name: str, count: Optional[int] = None) -> List[Tuple[str, str]]:
+        """Последние строки бота (файл, строка) из памяти"""
+        bot = self._bots.get(bot_name)
+        if bot is None:
+            return []
+        lines = list(bot.lines)
+        return lines[-count:] if count else lines
+
+    def bots(self) -> List[str]:
+        """Боты, за логами которых ведется наблюдение"""
+        return sorted(name for name, bot in self._bots.items() if bot.watched)
+
+    def start(self):
+        """Подключение к event loop: inotify или опрос"""
+        if self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        if self._inotify:
+            self._loop.add_reader(self._inotify.fileno(), self._on_inotify)
+        else:
+            logger.info("inotify недоступен - логи ботов читаются опросом")
+            self._poll_task = asyncio.create_task(self._poll_loop())
+
+    async def sync(self, log_dirs: Dict[str, Path]):
+        """Сверка списка ботов: новые - начать наблюдение, удаленные - снять"""
+        async with self._read_lock:
+            for bot_name in set(self._bots) - set(log_dirs):
+                self._forget(bot_name)
+
+            pending: List[Tuple[str, _BotLogs]] = []
+            for bot_name, logs_dir in log_dirs.items():
+                bot = self._bots.get(bot_name)
+                if bot is None or bot.logs_dir != logs_dir:
+                    if bot is not None:
+                        self._forget(bot_name)
+                    bot = self._bots[bot_name] = _BotLogs(logs_dir, deque(maxlen=self.buffer_size))
+                if not bot.watched:
+                    pending.append((bot_name, bot))
+            if not pending:
+                return
+
+            # В пуле - только чтение файлов; состояние меняется здесь, в потоке event loop
+            scans = await self.executor.run(
+                self._scan_dirs, [bot.logs_dir for _, bot in pending], name='bot_log_sync'
+            )
+            for (bot_name, bot), scan in zip(pending, scans):
+                if scan is None:
+                    continue  # logs/ еще нет - попробуем при следующей сверке
+                wd, files, tail = scan
+                if wd is not None:
+                    bot.wd = wd
+                    self._wd_map[wd] = bot_name
+                # logs/ могла быть пересоздана: позиции и буфер - заново, без повтора старых строк
+                bot.files = files
+                bot.lines.clear()
+                bot.lines.extend(tail)
+                bot.watched = True
+                logger.debug(f"Наблюдение за логами {bot_name}: {len(files)} файлов")
+
+    def _scan_dirs(self, logs_dirs: List[Path]) -> List[Optional[_DirScan]]:
+        """Первое знакомство с logs/ (выполняется в пуле потоков)"""
+        return [self._scan_dir(logs_dir) for logs_dir in logs_dirs]
+
+    def _scan_dir(self, logs_dir: Path) -> Optional[_DirScan]:
+        """Наблюдение, позиции в конце файлов и их хвосты для буфера"""
+        wd = None
+        if self._inotify:
+            # Наблюдение ставится до чтения позиций - дописанное после них прочитается по событию
+            try:
+                wd = self._inotify.add_watch(str(logs_dir), _WATCH_MASK)
+            except OSError as e:
+                if not logs_dir.is_dir():
+                    return None
+                logger.debug(f"inotify watch для {logs_dir} недоступен: {e}")
+        try:
+            entries = [entry for entry in os.scandir(logs_dir)
+                       if entry.name.endswith(LOG_SUFFIX) and entry.is_file()]
+        except OSError:
+            if wd is not None:
+                try:
+                    self._inotify.rm_watch(wd)
+                except OSError:
+                    pass
+            return None
+
+        files: Dict[str, _TailedFile] = {}
+        tail: List[Tuple[str, str]] = []
+        # Сначала старые файлы - в буфере последними окажутся строки самого свежего
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries:
+            try:
+                st = entry.stat()
+                lines = tail_lines(Path(entry.path), self.buffer_size)
+            except OSError:
+                continue
+            files[entry.name] = _TailedFile(st.st_ino, st.st_size)
+            tail.extend((entry.name, line.rstrip('\r\n')[:MAX_LINE_LENGTH]) for line in lines)
+        return wd, files, tail[-self.buffer_size:]
+
+    def _forget(self, bot_name: str):
+        bot = self._bots.pop(bot_name, None)
+        if bot and bot.wd is not None:
+            self._wd_map.pop(bot.wd, None)
+            try:
+                self._inotify.rm_watch(bot.wd)
+            except OSError:
+                pass
+
+    def _on_inotify(self):
+        """Колбэк event loop: отметить измененные файлы и запланировать чтение"""
+        for event in self._inotify.read_events():
+            if event.mask & IN_Q_OVERFLOW:
+                # События потеряны - перечитываем все логи
+                self._dirty.update((bot_name, None) for bot_name in self._bots)
+                continue
+            bot_name = self._wd_map.get(event.wd)
+            bot = self._bots.get(bot_name) if bot_name else None
+            if bot is None:
+                continue
+            if event.mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                # logs/ удалена или перемещена - наблюдение восстановит следующая сверка
+                self._wd_map.pop(event.wd, None)
+                bot.wd = None
+                bot.watched = False
+                continue
+            if event.name.endswith(LOG_SUFFIX):
+                self._dirty.add((bot_name, event.name))
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._dirty and self._flush_task is None:
+            self._flush_task = self._loop.create_task(self._flush())
+
+    async def _flush(self):
+        try:
+            await asyncio.sleep(FLUSH_DELAY)
+            while self._dirty:
+                dirty, self._dirty = self._dirty, set()
+                await self._read(dirty)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Ошибка чтения логов ботов: {e}")
+        finally:
+            self._flush_task = None
+            # События, пришедшие во время обработки ошибки
+            if self._dirty and self._loop and not self._loop.is_closed():
+                self._schedule_flush()
+
+    async def _read(self, dirty: Set[_DirtyKey]):
+        """Чтение дописанных байт в пуле потоков и раздача строк"""
+        async with self._read_lock:
+            targets = []
+            for bot_name, file_name in dirty:
+                bot = self._bots.get(bot_name)
+                if bot is not None and bot.watched:
+                    targets.append((bot_name, bot, file_name))
+            if not targets:
+                return
+            batches = await self.executor.run(self._read_targets, targets, name='bot_log_tail')
+            for bot_name, bot, file_name, lines in batches:
+                if self._bots.get(bot_name) is not bot:
+                    continue  # Бот удален или наблюдение начато заново
+                bot.lines.extend((file_name, line) for line in lines)
+                for listener in self._listeners:
+                    try:
+                        listener(bot_name, file_name, lines)
+                    except Exception as e:
+                        logger.error(f"Ошибка обработчика логов бота {bot_name}: {e}")
+
+    async def catch_up(self, bot_name: str):
+        """Дочитать логи бота прямо сейчас (перед уведомлением о падении)"""
+        if bot_name in self._bots:
+            await self._read({(bot_name, None)})
+
+    async def _poll_loop(self):
+        """Без inotify - периодическая проверка всех логов"""
+        while True:
+            try:
+                await asyncio.sleep(Config.BOT_LOG_POLL_INTERVAL)
+                self._dirty.update((bot_name, None) for bot_name, bot in self._bots.items() if bot.watched)
+                self._schedule_flush()
+            except asyncio.CancelledError:
+                break
+
+    def _read_targets(self, targets: List[Tuple[str, _BotLogs, Optional[str]]]) -> List[_Batch]:
+        """Новые полные строки измененных файлов (выполняется в пуле потоков).
+
+        Позиции чтения (bot.files) меняются только здесь; вызовы идут по одному под _read_lock.
+        """
+        names: Dict[str, Tuple[_BotLogs, Set[str]]] = {}
+        for bot_name, bot, file_name in targets:
+            bot_names = names.setdefault(bot_name, (bot, set()))[1]
+            if file_name is not None:
+                bot_names.add(file_name)
+                continue
+            try:
+                bot_names.update(entry.name for entry in os.scandir(bot.logs_dir)
+                                 if entry.name.endswith(LOG_SUFFIX) and entry.is_file())
+            except OSError:
+                pass
+            bot_names.update(bot.files)
+
+        batches = []
+        for bot_name, (bot, file_names) in names.items():
+            for file_name in sorted(file_names):
+                lines = self._read_file(bot, file_name)
+                if lines:
+                    batches.append((bot_name, bot, file_name, lines))
+        return batches
+
+    @staticmethod
+    def _read_file(bot: _BotLogs, file_name: str) -> List[str]:
+        path = bot.logs_dir / file_name
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            bot.files.pop(file_name, None)  # Файл удален или переименован при ротации
+            return []
+        with f:
+            st = os.fstat(f.fileno())
+            tailed = bot.files.get(file_name)
+            if tailed is None or tailed.inode != st.st_ino or st.st_size < tailed.offset:
+                # Новый файл, ротация или усечение - читаем с начала
+                tailed = bot.files[file_name] = _TailedFile(st.st_ino, 0)
+            if st.st_size == tailed.offset:
+                return []
+            if st.st_size - tailed.offset > MAX_READ_BYTES:
+                # Всплеск вывода - пропускаем середину, берем конец.
+                # Читаем с байта перед ним: перевод строки там - конец берется с начала строки
+                tailed.offset = st.st_size - MAX_READ_BYTES - 1
+                tailed.partial = b''
+                tailed.skip_line = True
+            f.seek(tailed.offset)
+            data = f.read(st.st_size - tailed.offset)
+
+        tailed.offset += len(data)
+        if tailed.skip_line:
+            # Строка, попавшая под пропуск, отбрасывается до перевода строки
+            newline = data.find(b'\n')
+            if newline < 0:
+                return []
+            data = data[newline + 1:]
+            tailed.skip_line = False
+        chunks = (tailed.partial + data).split(b'\n')
+        tailed.partial = chunks.pop()
+        if len(tailed.partial) > MAX_LINE_LENGTH * 4:
+            # Очень длинная строка без перевода - отдаем как есть, не копим
+            chunks.append(tailed.partial)
+            tailed.partial = b''
+        return [_decode_line(chunk) for chunk in chunks]
+
+    def close(self):
+        """Снятие наблюдения"""
+        if self._loop and self._inotify and not self._loop.is_closed():
+            self._loop.remove_reader(self._inotify.fileno())
+        for task in (self._flush_task, self._poll_task):
+            if task:
+                task.cancel()
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
+        self._loop = None
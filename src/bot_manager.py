@@ -2,19 +2,44 @@
 Модуль управления ботами для SaldoranBotSentinel
 """
 
+import asyncio
+import html
 import os
-import subprocess
+import time
 import psutil
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 
+from .bot_directory import BotDirectory
+from .bot_log_tail import BotLogTail
 from .config import Config
+from .dir_size_index import DirSizeIndex
+from .executor import BlockingExecutor
+from .git_info import GitInfoReader
+from .instrumentation import Instrumentation
+from .log_alerts import LogPatternWatcher
 from .logger import get_logger
+from .pid_registry import PidFileRegistry
+from .pid_watcher import PidWatcher
+from .process_pool import ProcessHandlePool
+from .process_table import ProcessTable, ProcessTableSnapshot
+from .restart_policy import ACTION_GIVE_UP, ACTION_INTENTIONAL, ACTION_RESTART, RestartDecision, RestartPolicyEngine
+from .state_cache import STATE_BOTS, StateCache
+from .supervisor import COMMAND_FILE, BotSupervisor
 
 logger = get_logger(__name__)
 
+# Таймаут скриптов stop_bot / restart_bot (сек)
+SCRIPT_TIMEOUT = 60
+# Сколько ждать появления процесса после run_bot и как часто проверять (сек)
+START_TIMEOUT = 5
+START_POLL_INTERVAL = 0.5
+# Строки логов в уведомлении о падении: обрезка длинных и общий лимит (сообщение Telegram - 4096)
+CRASH_LINE_MAX = 200
+CRASH_CONTEXT_MAX = 2500
+
 
 @dataclass
 class BotInfo:
@@ -30,17 +55,69 @@ class BotInfo:
     last_commit_date: Optional[str] = None
 
 
+@dataclass
+class BulkResult:
+    """Результат массовой операции для одного бота"""
+    bot_name: str
+    success: bool
+    elapsed: float
+    error: Optional[str] = None
+
+
+BULK_ACTIONS = ('start', 'stop', 'restart')
+BulkProgressCallback = Callable[[BulkResult, int, int], Awaitable[None]]
+
+
 class BotManager:
     """Менеджер для управления ботами"""
     
-    def __init__(self, telegram_bot=None):
+    def __init__(
+        self,
+        telegram_bot=None,
+        pid_registry: Optional[PidFileRegistry] = None,
+        process_pool: Optional[ProcessHandlePool] = None,
+        process_table: Optional[ProcessTable] = None,
+        state_cache: Optional[StateCache] = None,
+        executor: Optional[BlockingExecutor] = None,
+        instrumentation: Optional[Instrumentation] = None,
+    ):
         self.bots_dir = Config.BOTS_DIR
         self.telegram_bot = telegram_bot
+        # Сканирование /proc, git и размеры логов - в общем пуле потоков, не в event loop
+        self.executor = executor or BlockingExecutor()
+        # Длительность проходов цикла мониторинга (tick/bots) для /debug
+        self.instrumentation = instrumentation or Instrumentation()
+        # Реестр PID файлов /tmp/*.pid (общий с ResourceMonitor)
+        self.pid_registry = pid_registry or PidFileRegistry()
+        # Долгоживущие дескрипторы процессов: CPU% считается по дельте между вызовами
+        self.process_pool = process_pool or ProcessHandlePool()
+        # Один проход по таблице процессов на тик - общий с ResourceMonitor
+        self.process_table = process_table or ProcessTable()
+        # Информация о коммитах читается из .git без запуска git
+        self.git_reader = GitInfoReader()
+        # Размеры папок logs/ ботов: полный проход один раз, дальше - только изменения
+        self.log_sizes = DirSizeIndex()
+        # Последние строки логов ботов в памяти: /botlogs и контекст в уведомлениях о падении
+        self.log_tail = BotLogTail(self.executor)
+        # Уведомления о Traceback, rate limit и своих шаблонах в новых строках логов
+        self.log_alerts = LogPatternWatcher(self.log_tail, telegram_bot)
         self._ensure_bots_directory()
+        # Список ботов и пути к их скриптам перечитываются только при изменении папок
+        self.bot_directory = BotDirectory(self.bots_dir)
         
         # Для отслеживания состояния ботов
         self._bot_states = {}  # {bot_name: {'was_running': bool, 'last_pid': int}}
         self._monitoring_task = None
+        # Мгновенное обнаружение падения ботов через pidfd (опрос остается запасным вариантом)
+        self.pid_watcher = PidWatcher()
+        # Боты как дочерние процессы стража (SUPERVISOR_MODE)
+        self.supervisor = BotSupervisor(self.pid_registry, on_exit=self._on_supervised_exit)
+        # Автоперезапуск упавших ботов по политикам always / on-failure / never
+        self.restart_policy = RestartPolicyEngine()
+        self._restart_tasks: Dict[str, asyncio.Task] = {}
+        # Снимок списка ботов для /bots и /status (общий с ResourceMonitor и TelegramBot)
+        self.state_cache = state_cache or StateCache()
+        self.state_cache.register(STATE_BOTS, self.get_all_bots_info)
         
     def _ensure_bots_directory(self):
         """Создание директории для ботов если не существует"""
@@ -49,34 +126,8 @@ class BotManager:
             logger.info(f"Создана директория для ботов: {self.bots_dir}")
     
     def discover_bots(self) -> List[str]:
-        """Поиск всех ботов в директории"""
-        bots = []
-        
-        if not self.bots_dir.exists():
-            logger.warning(f"Директория ботов не найдена: {self.bots_dir}")
-            return bots
-            
-        for item in self.bots_dir.iterdir():
-            if item.is_dir() and not item.name.startswith('.'):
-                logger.debug(f"Проверяем директорию: {item.name}")
-                # Проверяем наличие скрипта run_bot или run_bot.sh
-                run_script = item / 'run_bot'
-                run_script_sh = item / 'run_bot.sh'
-                
-                logger.debug(f"  run_bot: {run_script.exists()} (executable: {os.access(run_script, os.X_OK) if run_script.exists() else False})")
-                logger.debug(f"  run_bot.sh: {run_script_sh.exists()} (executable: {os.access(run_script_sh, os.X_OK) if run_script_sh.exists() else False})")
-                
-                if (run_script.exists() and os.access(run_script, os.X_OK)) or \
-                   (run_script_sh.exists() and os.access(run_script_sh, os.X_OK)):
-                    bots.append(item.name)
-                    logger.info(f"✅ Найден бот: {item.name}")
-                else:
-                    logger.debug(f"❌ Директория {item.name} не содержит исполняемых скриптов run_bot")
-                    
-        logger.info(f"Обнаружено ботов: {len(bots)}")
-        if bots:
-            logger.info(f"Список ботов: {', '.join(bots)}")
-        return sorted(bots)
+        """Поиск всех ботов в директории (кэш сбрасывается при изменении папок)"""
+        return self.bot_directory.bots()
     
     def get_bot_info(self, bot_name: str) -> Optional[BotInfo]:
         """Получение подробной информации о боте"""
@@ -99,8 +150,10 @@ class BotManager:
         # Если бот запущен, получаем информацию о ресурсах
         if is_running and pid:
             try:
-                process = psutil.Process(pid)
-                bot_info.cpu_percent = process.cpu_percent()
+                process = self.process_pool.get(pid)
+                if process is None:
+                    raise psutil.NoSuchProcess(pid)
+                bot_info.cpu_percent = self.process_pool.cpu_percent(pid)
                 bot_info.memory_mb = process.memory_info().rss / 1024 / 1024
             except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
                 logger.warning(f"Не удалось получить информацию о процессе {pid}: {e}")
@@ -117,43 +170,56 @@ class BotManager:
             
         return bot_info
     
-    def _is_bot_running(self, bot_name: str) -> Tuple[bool, Optional[int]]:
+    def _is_bot_running(
+        self,
+        bot_name: str,
+        snapshot: Optional[ProcessTableSnapshot] = None,
+    ) -> Tuple[bool, Optional[int]]:
         """Проверка запущен ли бот"""
         logger.debug(f"Проверка статуса бота {bot_name}, целевой пользователь: {Config.TARGET_USER}")
+        # Дочерний процесс супервизора - статус известен без обращения к /proc
+        supervised = self.supervisor.get(bot_name)
+        if supervised:
+            return True, supervised.pid
+        
+        if snapshot is None:
+            snapshot = self.process_table.snapshot()
         
         # Сначала проверяем PID файл (более надежно для наших скриптов)
-        pid_file = Path(f"/tmp/{bot_name}.pid")
-        logger.debug(f"Проверка PID файла: {pid_file}")
+        pid = self.pid_registry.get_pid(bot_name)
         
-        if pid_file.exists():
-            try:
-                with open(pid_file, 'r') as f:
-                    pid = int(f.read().strip())
-                
-                logger.debug(f"Найден PID в файле: {pid}")
-                
-                # Проверяем, существует ли процесс с этим PID
-                if psutil.pid_exists(pid):
-                    try:
-                        proc = psutil.Process(pid)
-                        proc_user = proc.username()
-                        logger.debug(f"Процесс {pid} существует, пользователь: {proc_user}")
-                        
-                        # Дополнительная проверка, что это наш процесс
-                        if proc_user == Config.TARGET_USER:
-                            logger.info(f"Бот {bot_name} запущен (PID: {pid})")
-                            return True, pid
-                        else:
-                            logger.debug(f"Процесс {pid} принадлежит другому пользователю: {proc_user}")
-                    except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
-                        logger.debug(f"Не удалось получить информацию о процессе {pid}: {e}")
-                else:
-                    logger.debug(f"Процесс с PID {pid} не существует")
-                        
-            except (ValueError, IOError) as e:
-                logger.debug(f"Ошибка чтения PID файла для {bot_name}: {e}")
+        if pid is not None:
+            logger.debug(f"Найден PID в файле: {pid}")
+            
+            sample = snapshot.by_pid.get(pid) if snapshot else None
+            if sample is not None and sample.state == 'Z':
+                logger.debug(f"Процесс {pid} завершился (zombie)")
+            elif sample is not None:
+                proc_user = sample.username
+                logger.debug(f"Процесс {pid} есть в снимке, пользователь: {proc_user}")
+                if proc_user == Config.TARGET_USER:
+                    logger.info(f"Бот {bot_name} запущен (PID: {pid})")
+                    return True, pid
+                logger.debug(f"Процесс {pid} принадлежит другому пользователю: {proc_user}")
+            # Процесса нет в снимке (или снимка нет) - он мог запуститься после прохода
+            elif psutil.pid_exists(pid):
+                try:
+                    proc = psutil.Process(pid)
+                    proc_user = proc.username()
+                    logger.debug(f"Процесс {pid} существует, пользователь: {proc_user}")
+                    
+                    # Дополнительная проверка, что это наш процесс
+                    if proc_user == Config.TARGET_USER:
+                        logger.info(f"Бот {bot_name} запущен (PID: {pid})")
+                        return True, pid
+                    else:
+                        logger.debug(f"Процесс {pid} принадлежит другому пользователю: {proc_user}")
+                except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
+                    logger.debug(f"Не удалось получить информацию о процессе {pid}: {e}")
+            else:
+                logger.debug(f"Процесс с PID {pid} не существует")
         else:
-            logger.debug(f"PID файл {pid_file} не найден")
+            logger.debug(f"PID файл для {bot_name} не найден")
         
         # Если PID файл не помог, ищем главный процесс по cwd + cmdline
         bot_path = self.bots_dir / bot_name
@@ -161,105 +227,104 @@ class BotManager:
             bot_root = bot_path.resolve()
         except Exception:
             bot_root = bot_path
-        bot_path_str = str(bot_root)
         logger.debug(f"Поиск главного процесса бота {bot_name} по cwd/cmdline...")
         try:
-            for proc in psutil.process_iter(['pid', 'name', 'cmdline', 'username', 'cwd']):
-                try:
-                    proc_user = proc.info.get('username')
-                    if proc_user != Config.TARGET_USER:
-                        continue
-                        
-                    cmdline_list = proc.info.get('cmdline') or []
-                    cmdline = ' '.join(cmdline_list)
-                    if not cmdline:
-                        continue
-
-                    proc_cwd = proc.info.get('cwd')
-                    if proc_cwd:
-                        try:
-                            proc_cwd_path = Path(proc_cwd).resolve()
-                        except Exception:
-                            proc_cwd_path = None
-                        if not proc_cwd_path:
-                            continue
-                        if proc_cwd_path != bot_root and bot_root not in proc_cwd_path.parents:
-                            continue
-                    else:
-                        # Без cwd: проверяем, что путь бота встречается в cmdline как отдельный путь
-                        has_bot_path = False
-                        for arg in cmdline_list:
-                            if not arg:
-                                continue
-                            arg_norm = arg.rstrip(os.sep)
-                            if arg_norm == bot_path_str or arg_norm.startswith(bot_path_str + os.sep):
-                                has_bot_path = True
-                                break
-                        if not has_bot_path:
-                            continue
-
-                    # Опознаем главный процесс бота (не дочерний worker/fetcher)
-                    is_main_process = "core.main_async" in cmdline or "main.py" in cmdline
-                    if is_main_process:
-                        logger.info(f"Найден главный процесс бота {bot_name} (PID: {proc.info['pid']})")
-                        return True, proc.info['pid']
-                        
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
-                    
+            if snapshot is not None:
+                main_pid = self._find_main_process_in_snapshot(snapshot, bot_root)
+            else:
+                main_pid = self._find_main_process_psutil(bot_root)
+            if main_pid is not None:
+                logger.info(f"Найден главный процесс бота {bot_name} (PID: {main_pid})")
+                return True, main_pid
         except Exception as e:
             logger.error(f"Ошибка при проверке статуса бота {bot_name}: {e}")
         
         logger.debug(f"Бот {bot_name} не запущен")
         return False, None
+
+    @staticmethod
+    def _has_bot_path_arg(cmdline_list: List[str], bot_path_str: str) -> bool:
+        """Без cwd: проверяем, что путь бота встречается в cmdline как отдельный путь"""
+        for arg in cmdline_list:
+            if not arg:
+                continue
+            arg_norm = arg.rstrip(os.sep)
+            if arg_norm == bot_path_str or arg_norm.startswith(bot_path_str + os.sep):
+                return True
+        return False
+
+    @staticmethod
+    def _is_main_process(cmdline: str) -> bool:
+        """Опознаем главный процесс бота (не дочерний worker/fetcher)"""
+        return "core.main_async" in cmdline or "main.py" in cmdline
+
+    def _find_main_process_in_snapshot(self, snapshot: ProcessTableSnapshot, bot_root: Path) -> Optional[int]:
+        """Поиск главного процесса бота по индексам снимка таблицы процессов"""
+        bot_path_str = str(bot_root)
+        candidates = []
+        for sample in snapshot.processes_in_dir(bot_path_str, Config.TARGET_USER):
+            cmdline = ' '.join(sample.read_cmdline())
+            if cmdline and self._is_main_process(cmdline):
+                candidates.append(sample.pid)
+        for sample in snapshot.processes_without_cwd(Config.TARGET_USER):
+            cmdline_list = sample.read_cmdline()
+            cmdline = ' '.join(cmdline_list)
+            if cmdline and self._has_bot_path_arg(cmdline_list, bot_path_str) and self._is_main_process(cmdline):
+                candidates.append(sample.pid)
+        # Как и при обходе process_iter - побеждает процесс с меньшим PID
+        return min(candidates) if candidates else None
+
+    def _find_main_process_psutil(self, bot_root: Path) -> Optional[int]:
+        """Поиск главного процесса бота обходом psutil (fallback без /proc)"""
+        bot_path_str = str(bot_root)
+        for proc in psutil.process_iter(['pid', 'name', 'cmdline', 'username', 'cwd']):
+            try:
+                proc_user = proc.info.get('username')
+                if proc_user != Config.TARGET_USER:
+                    continue
+                    
+                cmdline_list = proc.info.get('cmdline') or []
+                cmdline = ' '.join(cmdline_list)
+                if not cmdline:
+                    continue
+
+                proc_cwd = proc.info.get('cwd')
+                if proc_cwd:
+                    try:
+                        proc_cwd_path = Path(proc_cwd).resolve()
+                    except Exception:
+                        proc_cwd_path = None
+                    if not proc_cwd_path:
+                        continue
+                    if proc_cwd_path != bot_root and bot_root not in proc_cwd_path.parents:
+                        continue
+                elif not self._has_bot_path_arg(cmdline_list, bot_path_str):
+                    continue
+
+                if self._is_main_process(cmdline):
+                    return proc.info['pid']
+                    
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return None
     
     def _get_directory_size(self, path: Path) -> float:
         """Получение размера директории в MB"""
-        total_size = 0
         try:
-            for dirpath, dirnames, filenames in os.walk(path):
-                for filename in filenames:
-                    filepath = os.path.join(dirpath, filename)
-                    if os.path.exists(filepath):
-                        total_size += os.path.getsize(filepath)
+            return self.log_sizes.size_mb(path)
         except Exception as e:
             logger.error(f"Ошибка при подсчете размера директории {path}: {e}")
-            
-        return total_size / 1024 / 1024  # Конвертируем в MB
+            return 0.0
     
     def _get_last_commit_hash(self, bot_path: Path) -> Optional[str]:
         """Получение хеша последнего коммита"""
-        try:
-            result = subprocess.run(
-                ['git', 'rev-parse', 'HEAD'],
-                cwd=bot_path,
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            if result.returncode == 0:
-                return result.stdout.strip()[:8]  # Короткий хеш
-        except Exception as e:
-            logger.debug(f"Не удалось получить хеш коммита для {bot_path}: {e}")
-            
-        return None
+        commit = self.git_reader.head_commit(bot_path)
+        return commit.sha[:8] if commit else None  # Короткий хеш
     
     def _get_last_commit_date(self, bot_path: Path) -> Optional[str]:
         """Получение даты последнего коммита"""
-        try:
-            result = subprocess.run(
-                ['git', 'log', '-1', '--format=%cd', '--date=short'],
-                cwd=bot_path,
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            if result.returncode == 0:
-                return result.stdout.strip()
-        except Exception as e:
-            logger.debug(f"Не удалось получить дату коммита для {bot_path}: {e}")
-            
-        return None
+        commit = self.git_reader.head_commit(bot_path)
+        return commit.date if commit else None
     
     async def _send_telegram_notification(self, message: str):
         """Отправка уведомления в Telegram"""
@@ -269,285 +334,276 @@ class BotManager:
             except Exception as e:
                 logger.error(f"Ошибка отправки Telegram уведомления: {e}")
 
-    def start_bot(self, bot_name: str) -> bool:
-        """Запуск бота"""
+    @staticmethod
+    async def _run_script(script: Path, cwd: Path, timeout: float = SCRIPT_TIMEOUT) -> Tuple[int, str]:
+        """Выполнение скрипта бота без блокировки event loop: (код выхода, stderr)"""
+        process = await asyncio.create_subprocess_exec(
+            str(script),
+            cwd=cwd,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            _, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise
+        return process.returncode, stderr.decode('utf-8', errors='replace')
+    
+    async def _wait_until_running(self, bot_name: str, timeout: float) -> Tuple[bool, Optional[int]]:
+        """Ожидание появления процесса бота: проверка по свежему снимку каждые START_POLL_INTERVAL сек"""
+        deadline = time.monotonic() + timeout
+        while True:
+            self.process_table.invalidate()
+            is_running, pid = await self.executor.run(self._is_bot_running, bot_name)
+            if is_running or time.monotonic() >= deadline:
+                return is_running, pid
+            await asyncio.sleep(START_POLL_INTERVAL)
+    
+    @staticmethod
+    async def _wait_for_exit(process: psutil.Process, timeout: float) -> bool:
+        """Неблокирующее ожидание завершения процесса (не дочернего - wait() недоступен)"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                if not process.is_running() or process.status() == psutil.STATUS_ZOMBIE:
+                    return True
+            except psutil.NoSuchProcess:
+                return True
+            await asyncio.sleep(0.1)
+        return False
+    
+    async def start_bot_async(self, bot_name: str, notify: bool = True) -> bool:
+        """Запуск бота (notify=False - без уведомления об успешном запуске)"""
         bot_path = self.bots_dir / bot_name
-        run_script = bot_path / 'run_bot'
-        run_script_sh = bot_path / 'run_bot.sh'
-        
-        # Определяем какой скрипт использовать
-        if run_script_sh.exists() and os.access(run_script_sh, os.X_OK):
-            script_to_run = run_script_sh
-        elif run_script.exists() and os.access(run_script, os.X_OK):
-            script_to_run = run_script
-        else:
-            error_msg = f"Скрипт run_bot или run_bot.sh не найден для бота {bot_name}"
-            logger.error(error_msg)
-            
-            # Отправляем уведомление об ошибке
-            if self.telegram_bot:
-                import asyncio
-                try:
-                    loop = asyncio.get_event_loop()
-                    loop.create_task(self._send_telegram_notification(
-                        f"❌ <b>Ошибка запуска бота</b>\n\n"
-                        f"🤖 Бот: {bot_name}\n"
-                        f"📁 Скрипт запуска не найден"
-                    ))
-                except Exception as e:
-                    logger.error(f"Ошибка отправки уведомления: {e}")
-            
+        
+        if Config.SUPERVISOR_MODE:
+            command = self.supervisor.resolve_command(bot_path) if bot_path.is_dir() else None
+            if command is not None:
+                return await self._start_supervised(bot_name, command, notify)
+            logger.info(f"Для бота {bot_name} нет {COMMAND_FILE} или main.py - запуск через run_bot")
+        
+        script_to_run = self.bot_directory.script(bot_name, 'run_bot')
+        if script_to_run is None:
+            logger.error(f"Скрипт run_bot или run_bot.sh не найден для бота {bot_name}")
+            await self._send_telegram_notification(
+                f"❌ <b>Ошибка запуска бота</b>\n\n"
+                f"🤖 Бот: {bot_name}\n"
+                f"📁 Скрипт запуска не найден"
+            )
             return False
             
         # Проверяем, не запущен ли уже бот
-        is_running, _ = self._is_bot_running(bot_name)
+        is_running, _ = await self.executor.run(self._is_bot_running, bot_name)
         if is_running:
             logger.warning(f"Бот {bot_name} уже запущен")
             return True
             
         try:
-            # Запускаем скрипт в полностью независимом режиме
-            import time
             logger.info(f"Запуск бота {bot_name} как независимого процесса...")
-            
-            # Используем более простой и надежный способ отсоединения
-            process = subprocess.Popen(
-                [str(script_to_run)],
+            # Новая сессия отсоединяет скрипт от стража; завершившийся скрипт забирает child watcher
+            process = await asyncio.create_subprocess_exec(
+                str(script_to_run),
                 cwd=bot_path,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                stdin=subprocess.DEVNULL,
-                start_new_session=True  # Создаем новую сессию - этого достаточно
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+                stdin=asyncio.subprocess.DEVNULL,
+                start_new_session=True,
             )
+            logger.info(f"Скрипт запуска бота {bot_name} запущен с PID {process.pid}")
             
-            # Отсоединяем процесс от родительского
-            process_pid = process.pid
-            logger.info(f"Бот {bot_name} запущен с PID {process_pid}, отсоединяем от родительского процесса...")
-            
-            # Не ждем завершения процесса - он должен работать независимо
-            process = None  # Освобождаем ссылку на процесс
-            
-            # Ждем инициализации (5 секунд)
-            time.sleep(5)
-            
-            # Проверяем, что бот действительно запустился
-            is_running, pid = self._is_bot_running(bot_name)
-            
-            if is_running:
-                logger.info(f"Бот {bot_name} успешно запущен и работает (PID: {pid})")
-                
-                # Отправляем уведомление об успешном запуске
-                if self.telegram_bot:
-                    import asyncio
-                    try:
-                        loop = asyncio.get_event_loop()
-                        loop.create_task(self._send_telegram_notification(
-                            f"✅ <b>Бот запущен</b>\n\n"
-                            f"🤖 Бот: {bot_name}\n"
-                            f"🚀 Статус: Успешно запущен (PID: {pid})\n"
-                            f"🔗 Процесс отсоединен от стража"
-                        ))
-                    except Exception as e:
-                        logger.error(f"Ошибка отправки уведомления: {e}")
-                
-                return True
-            else:
-                logger.warning(f"Бот {bot_name} запущен как независимый процесс, но еще не обнаружен системой мониторинга")
-                logger.info(f"Это нормально - бот может потребовать время для инициализации")
-                
-                # Отправляем уведомление о запуске (даже если еще не обнаружен)
-                if self.telegram_bot:
-                    import asyncio
-                    try:
-                        loop = asyncio.get_event_loop()
-                        loop.create_task(self._send_telegram_notification(
-                            f"🚀 <b>Бот запущен</b>\n\n"
-                            f"🤖 Бот: {bot_name}\n"
-                            f"⏳ Статус: Инициализация...\n"
-                            f"🔗 Процесс отсоединен от стража\n\n"
-                            f"ℹ️ Мониторинг обнаружит бот через несколько секунд"
-                        ))
-                    except Exception as e:
-                        logger.error(f"Ошибка отправки уведомления: {e}")
-                
-                return True  # Считаем успешным, так как процесс запущен
-                
-        except subprocess.TimeoutExpired:
-            error_msg = f"Таймаут при запуске бота {bot_name}"
-            logger.error(error_msg)
-            
-            # Отправляем уведомление о таймауте
-            if self.telegram_bot:
-                import asyncio
-                try:
-                    loop = asyncio.get_event_loop()
-                    loop.create_task(self._send_telegram_notification(
-                        f"⏰ <b>Таймаут запуска бота</b>\n\n"
-                        f"🤖 Бот: {bot_name}\n"
-                        f"⚠️ Превышено время ожидания (30 сек)"
-                    ))
-                except Exception as e:
-                    logger.error(f"Ошибка отправки уведомления: {e}")
-            
-            return False
+            # Ждем появления процесса бота, но не дольше START_TIMEOUT
+            is_running, pid = await self._wait_until_running(bot_name, START_TIMEOUT)
         except Exception as e:
-            error_msg = f"Исключение при запуске бота {bot_name}: {e}"
-            logger.error(error_msg)
-            
-            # Отправляем уведомление об исключении
-            if self.telegram_bot:
-                import asyncio
-                try:
-                    loop = asyncio.get_event_loop()
-                    loop.create_task(self._send_telegram_notification(
-                        f"💥 <b>Критическая ошибка запуска</b>\n\n"
-                        f"🤖 Бот: {bot_name}\n"
-                        f"🔥 Исключение: {str(e)[:200]}..."
-                    ))
-                except Exception as e:
-                    logger.error(f"Ошибка отправки уведомления: {e}")
-            
+            logger.error(f"Исключение при запуске бота {bot_name}: {e}")
+            await self._send_telegram_notification(
+                f"💥 <b>Критическая ошибка запуска</b>\n\n"
+                f"🤖 Бот: {bot_name}\n"
+                f"🔥 Исключение: {str(e)[:200]}..."
+            )
             return False
+        
+        if is_running:
+            logger.info(f"Бот {bot_name} успешно запущен и работает (PID: {pid})")
+            
+            # Сразу следим за процессом через pidfd, не дожидаясь тика мониторинга
+            self._bot_states[bot_name] = {'was_running': True, 'last_pid': pid}
+            self.restart_policy.clear_intentional_stop(bot_name)
+            self._watch_bot_process(bot_name, pid)
+            
+            if notify:
+                await self._send_telegram_notification(
+                    f"✅ <b>Бот запущен</b>\n\n"
+                    f"🤖 Бот: {bot_name}\n"
+                    f"🚀 Статус: Успешно запущен (PID: {pid})\n"
+                    f"🔗 Процесс отсоединен от стража"
+                )
+        else:
+            logger.warning(f"Бот {bot_name} запущен как независимый процесс, но еще не обнаружен системой мониторинга")
+            logger.info(f"Это нормально - бот может потребовать время для инициализации")
+            
+            if notify:
+                await self._send_telegram_notification(
+                    f"🚀 <b>Бот запущен</b>\n\n"
+                    f"🤖 Бот: {bot_name}\n"
+                    f"⏳ Статус: Инициализация...\n"
+                    f"🔗 Процесс отсоединен от стража\n\n"
+                    f"ℹ️ Мониторинг обнаружит бот через несколько секунд"
+                )
+        
+        return True  # Считаем успешным, так как процесс запущен
     
-    def stop_bot(self, bot_name: str) -> bool:
-        """Остановка бота"""
+    async def _start_supervised(self, bot_name: str, command: List[str], notify: bool) -> bool:
+        """Запуск бота дочерним процессом стража (SUPERVISOR_MODE)"""
+        # Проверяем, не запущен ли уже бот
+        is_running, _ = await self.executor.run(self._is_bot_running, bot_name)
+        if is_running:
+            logger.warning(f"Бот {bot_name} уже запущен")
+            return True
+        
+        try:
+            supervised = await self.supervisor.spawn(bot_name, command, self.bots_dir / bot_name)
+        except (OSError, ValueError) as e:
+            logger.error(f"Исключение при запуске бота {bot_name} супервизором: {e}")
+            await self._send_telegram_notification(
+                f"💥 <b>Критическая ошибка запуска</b>\n\n"
+                f"🤖 Бот: {bot_name}\n"
+                f"🔥 Исключение: {str(e)[:200]}..."
+            )
+            return False
+        
+        # PID известен сразу - ожидание инициализации не нужно
+        self._bot_states[bot_name] = {'was_running': True, 'last_pid': supervised.pid}
+        self.restart_policy.clear_intentional_stop(bot_name)
+        if notify:
+            await self._send_telegram_notification(
+                f"✅ <b>Бот запущен</b>\n\n"
+                f"🤖 Бот: {bot_name}\n"
+                f"🚀 Статус: Успешно запущен (PID: {supervised.pid})\n"
+                f"🧩 Дочерний процесс стража, лог: logs/{supervised.log_path.name}"
+            )
+        return True
+    
+    async def stop_supervised_bots(self):
+        """Остановка ботов под супервизором при завершении стража"""
+        await self.supervisor.shutdown()
+    
+    def _mark_intentional_stop(self, bot_name: str):
+        """Остановка через Sentinel: без автоперезапуска и отмена отложенного перезапуска"""
+        # Отметка относится к известному процессу: падение следующего процесса бота - уже не остановка
+        state = self._bot_states.get(bot_name)
+        self.restart_policy.mark_intentional_stop(bot_name, state['last_pid'] if state else None)
+        task = self._restart_tasks.pop(bot_name, None)
+        if task:
+            task.cancel()
+            logger.info(f"Отложенный автоперезапуск бота {bot_name} отменен")
+    
+    async def stop_bot_async(self, bot_name: str, notify: bool = True) -> bool:
+        """Остановка бота (notify=False - без уведомления об успешной остановке)"""
+        self._mark_intentional_stop(bot_name)
+        done = await self._stop_bot(bot_name, notify)
+        if not done:
+            # Бот продолжает работу - его следующее завершение будет падением
+            self.restart_policy.clear_intentional_stop(bot_name)
+        return done
+    
+    async def _stop_bot(self, bot_name: str, notify: bool = True) -> bool:
+        """Остановка через супервизор или скрипт stop_bot, при ошибке - принудительно"""
         bot_path = self.bots_dir / bot_name
-        stop_script = bot_path / 'stop_bot'
-        stop_script_sh = bot_path / 'stop_bot.sh'
-        
-        # Определяем какой скрипт использовать
-        if stop_script_sh.exists() and os.access(stop_script_sh, os.X_OK):
-            script_to_run = stop_script_sh
-        elif stop_script.exists() and os.access(stop_script, os.X_OK):
-            script_to_run = stop_script
-        else:
-            error_msg = f"Скрипт stop_bot или stop_bot.sh не найден для бота {bot_name}"
-            logger.error(error_msg)
-            
-            # Отправляем уведомление об ошибке
-            if self.telegram_bot:
-                import asyncio
-                try:
-                    loop = asyncio.get_event_loop()
-                    loop.create_task(self._send_telegram_notification(
-                        f"❌ <b>Ошибка остановки бота</b>\n\n"
-                        f"🤖 Бот: {bot_name}\n"
-                        f"📁 Скрипт остановки не найден"
-                    ))
-                except Exception as e:
-                    logger.error(f"Ошибка отправки уведомления: {e}")
-            
+        
+        if self.supervisor.get(bot_name):
+            # Дочерний процесс стража останавливаем напрямую (SIGTERM группе процессов)
+            stopped = await self.supervisor.stop(bot_name)
+            if stopped:
+                logger.info(f"Бот {bot_name} успешно остановлен")
+            if stopped and notify:
+                await self._send_telegram_notification(
+                    f"🛑 <b>Бот остановлен</b>\n\n"
+                    f"🤖 Бот: {bot_name}\n"
+                    f"✅ Статус: Успешно остановлен"
+                )
+            return stopped
+        
+        script_to_run = self.bot_directory.script(bot_name, 'stop_bot')
+        if script_to_run is None:
+            logger.error(f"Скрипт stop_bot или stop_bot.sh не найден для бота {bot_name}")
+            await self._send_telegram_notification(
+                f"❌ <b>Ошибка остановки бота</b>\n\n"
+                f"🤖 Бот: {bot_name}\n"
+                f"📁 Скрипт остановки не найден"
+            )
             return False
             
         try:
-            result = subprocess.run(
-                [str(script_to_run)],
-                cwd=bot_path,
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
+            returncode, stderr = await self._run_script(script_to_run, bot_path)
             
-            if result.returncode == 0:
+            if returncode == 0:
                 logger.info(f"Бот {bot_name} успешно остановлен")
-                
-                # Отправляем уведомление об успешной остановке
-                if self.telegram_bot:
-                    import asyncio
-                    try:
-                        loop = asyncio.get_event_loop()
-                        loop.create_task(self._send_telegram_notification(
-                            f"🛑 <b>Бот остановлен</b>\n\n"
-                            f"🤖 Бот: {bot_name}\n"
-                            f"✅ Статус: Успешно остановлен"
-                        ))
-                    except Exception as e:
-                        logger.error(f"Ошибка отправки уведомления: {e}")
-                
-                return True
-            else:
-                error_msg = f"Ошибка остановки бота {bot_name}: {result.stderr}"
-                logger.error(error_msg)
-                
-                # Отправляем уведомление об ошибке
-                if self.telegram_bot:
-                    import asyncio
-                    try:
-                        loop = asyncio.get_event_loop()
-                        loop.create_task(self._send_telegram_notification(
-                            f"❌ <b>Ошибка остановки бота</b>\n\n"
-                            f"🤖 Бот: {bot_name}\n"
-                            f"📝 Ошибка: {result.stderr[:200]}..."
-                        ))
-                    except Exception as e:
-                        logger.error(f"Ошибка отправки уведомления: {e}")
-                
-                # Пытаемся принудительно остановить бот как fallback
-                logger.info(f"Попытка принудительной остановки бота {bot_name} после ошибки скрипта")
-                if self.force_stop_bot(bot_name):
-                    logger.info(f"Бот {bot_name} принудительно остановлен после ошибки скрипта")
-                    return True
-                
-                return False
-                
-        except subprocess.TimeoutExpired:
-            error_msg = f"Таймаут при остановке бота {bot_name}"
-            logger.error(error_msg)
-            
-            # Отправляем уведомление о таймауте
-            if self.telegram_bot:
-                import asyncio
-                try:
-                    loop = asyncio.get_event_loop()
-                    loop.create_task(self._send_telegram_notification(
-                        f"⏰ <b>Таймаут остановки бота</b>\n\n"
+                if notify:
+                    await self._send_telegram_notification(
+                        f"🛑 <b>Бот остановлен</b>\n\n"
                         f"🤖 Бот: {bot_name}\n"
-                        f"⚠️ Превышено время ожидания (30 сек)"
-                    ))
-                except Exception as e:
-                    logger.error(f"Ошибка отправки уведомления: {e}")
-            
-            # Пытаемся принудительно остановить бот после таймаута
-            logger.info(f"Попытка принудительной остановки бота {bot_name} после таймаута")
-            if self.force_stop_bot(bot_name):
-                logger.info(f"Бот {bot_name} принудительно остановлен после таймаута")
+                        f"✅ Статус: Успешно остановлен"
+                    )
                 return True
             
-            return False
+            logger.error(f"Ошибка остановки бота {bot_name}: {stderr}")
+            await self._send_telegram_notification(
+                f"❌ <b>Ошибка остановки бота</b>\n\n"
+                f"🤖 Бот: {bot_name}\n"
+                f"📝 Ошибка: {stderr[:200]}..."
+            )
+            reason = "ошибки скрипта"
+                
+        except asyncio.TimeoutError:
+            logger.error(f"Таймаут при остановке бота {bot_name}")
+            await self._send_telegram_notification(
+                f"⏰ <b>Таймаут остановки бота</b>\n\n"
+                f"🤖 Бот: {bot_name}\n"
+                f"⚠️ Превышено время ожидания ({SCRIPT_TIMEOUT} сек)"
+            )
+            reason = "таймаута"
         except Exception as e:
-            error_msg = f"Исключение при остановке бота {bot_name}: {e}"
-            logger.error(error_msg)
-            
-            # Отправляем уведомление об исключении
-            if self.telegram_bot:
-                import asyncio
-                try:
-                    loop = asyncio.get_event_loop()
-                    loop.create_task(self._send_telegram_notification(
-                        f"💥 <b>Критическая ошибка остановки</b>\n\n"
-                        f"🤖 Бот: {bot_name}\n"
-                        f"🔥 Исключение: {str(e)[:200]}..."
-                    ))
-                except Exception as e:
-                    logger.error(f"Ошибка отправки уведомления: {e}")
-            
-            # Пытаемся принудительно остановить бот как последний шанс
-            logger.info(f"Попытка принудительной остановки бота {bot_name} после ошибки")
-            if self.force_stop_bot(bot_name):
-                logger.info(f"Бот {bot_name} принудительно остановлен после ошибки")
-                return True
-            
-            return False
+            logger.error(f"Исключение при остановке бота {bot_name}: {e}")
+            await self._send_telegram_notification(
+                f"💥 <b>Критическая ошибка остановки</b>\n\n"
+                f"🤖 Бот: {bot_name}\n"
+                f"🔥 Исключение: {str(e)[:200]}..."
+            )
+            reason = "ошибки"
+        
+        # Пытаемся принудительно остановить бот как fallback
+        logger.info(f"Попытка принудительной остановки бота {bot_name} после {reason}")
+        if await self.force_stop_bot_async(bot_name):
+            logger.info(f"Бот {bot_name} принудительно остановлен после {reason}")
+            return True
+        return False
     
-    def force_stop_bot(self, bot_name: str) -> bool:
+    async def force_stop_bot_async(self, bot_name: str) -> bool:
         """Принудительная остановка бота через SIGTERM/SIGKILL"""
+        self._mark_intentional_stop(bot_name)
+        done = await self._force_stop_bot(bot_name)
+        if not done:
+            # Бот продолжает работу - его следующее завершение будет падением
+            self.restart_policy.clear_intentional_stop(bot_name)
+        return done
+    
+    async def _force_stop_bot(self, bot_name: str) -> bool:
+        """SIGTERM главному процессу бота, через 10 секунд - SIGKILL"""
         logger.info(f"Принудительная остановка бота {bot_name}")
         
+        if self.supervisor.get(bot_name):
+            return await self.supervisor.stop(bot_name)
+        
         # Сначала пытаемся найти PID бота
-        is_running, pid = self._is_bot_running(bot_name)
+        is_running, pid = await self.executor.run(self._is_bot_running, bot_name)
         
         if not is_running or not pid:
             logger.info(f"Бот {bot_name} уже не запущен")
+            # Останавливать нечего - отметка не должна скрыть следующее падение
+            self.restart_policy.clear_intentional_stop(bot_name)
             # Очищаем PID файл на всякий случай
             self._cleanup_pid_file(bot_name)
             return True
@@ -559,24 +615,21 @@ class BotManager:
             process.terminate()
             
             # Ждем до 10 секунд
-            try:
-                process.wait(timeout=10)
+            if await self._wait_for_exit(process, 10):
                 logger.info(f"Бот {bot_name} успешно остановлен (SIGTERM)")
                 self._cleanup_pid_file(bot_name)
                 return True
-            except psutil.TimeoutExpired:
-                logger.warning(f"Бот {bot_name} не остановился после SIGTERM, отправляем SIGKILL")
-                
-                # Если не помогло, используем SIGKILL
-                try:
-                    process.kill()
-                    process.wait(timeout=5)
-                    logger.info(f"Бот {bot_name} принудительно остановлен (SIGKILL)")
-                    self._cleanup_pid_file(bot_name)
-                    return True
-                except psutil.TimeoutExpired:
-                    logger.error(f"Не удалось остановить бот {bot_name} даже с SIGKILL")
-                    return False
+            
+            # Если не помогло, используем SIGKILL
+            logger.warning(f"Бот {bot_name} не остановился после SIGTERM, отправляем SIGKILL")
+            process.kill()
+            if await self._wait_for_exit(process, 5):
+                logger.info(f"Бот {bot_name} принудительно остановлен (SIGKILL)")
+                self._cleanup_pid_file(bot_name)
+                return True
+            
+            logger.error(f"Не удалось остановить бот {bot_name} даже с SIGKILL")
+            return False
                     
         except psutil.NoSuchProcess:
             logger.info(f"Процесс {pid} уже не существует")
@@ -591,60 +644,110 @@ class BotManager:
     
     def _cleanup_pid_file(self, bot_name: str):
         """Очистка PID файла"""
-        pid_file = Path(f"/tmp/{bot_name}.pid")
-        if pid_file.exists():
-            try:
-                pid_file.unlink()
-                logger.debug(f"PID файл {pid_file} удален")
-            except Exception as e:
-                logger.warning(f"Не удалось удалить PID файл {pid_file}: {e}")
+        try:
+            if self.pid_registry.remove(bot_name):
+                logger.debug(f"PID файл бота {bot_name} удален")
+        except Exception as e:
+            logger.warning(f"Не удалось удалить PID файл бота {bot_name}: {e}")
     
-    def restart_bot(self, bot_name: str) -> bool:
+    async def restart_bot_async(self, bot_name: str, notify: bool = True) -> bool:
         """Перезапуск бота"""
+        self._mark_intentional_stop(bot_name)
+        done = await self._restart_bot(bot_name, notify)
+        if not done:
+            # Бот продолжает работу - его следующее завершение будет падением
+            self.restart_policy.clear_intentional_stop(bot_name)
+        return done
+    
+    async def _restart_bot(self, bot_name: str, notify: bool = True) -> bool:
+        """Перезапуск скриптом restart_bot или через stop + start"""
         bot_path = self.bots_dir / bot_name
-        restart_script = bot_path / 'restart_bot'
-        restart_script_sh = bot_path / 'restart_bot.sh'
         
-        # Определяем какой скрипт использовать
-        script_to_run = None
-        if restart_script_sh.exists() and os.access(restart_script_sh, os.X_OK):
-            script_to_run = restart_script_sh
-        elif restart_script.exists() and os.access(restart_script, os.X_OK):
-            script_to_run = restart_script
+        # Бот под супервизором перезапускается через stop + start, а не внешним скриптом
+        script_to_run = None if self.supervisor.get(bot_name) else self.bot_directory.script(bot_name, 'restart_bot')
         
         # Если есть скрипт restart_bot, используем его
         if script_to_run:
             try:
-                result = subprocess.run(
-                    [str(script_to_run)],
-                    cwd=bot_path,
-                    capture_output=True,
-                    text=True,
-                    timeout=60
-                )
-                
-                if result.returncode == 0:
+                returncode, stderr = await self._run_script(script_to_run, bot_path)
+                if returncode == 0:
                     logger.info(f"Бот {bot_name} успешно перезапущен")
                     return True
-                else:
-                    logger.error(f"Ошибка перезапуска бота {bot_name}: {result.stderr}")
-                    return False
-                    
-            except subprocess.TimeoutExpired:
+                logger.error(f"Ошибка перезапуска бота {bot_name}: {stderr}")
+                return False
+            except asyncio.TimeoutError:
                 logger.error(f"Таймаут при перезапуске бота {bot_name}")
                 return False
             except Exception as e:
                 logger.error(f"Исключение при перезапуске бота {bot_name}: {e}")
                 return False
-        else:
-            # Если нет скрипта restart_bot, делаем stop + start
-            logger.info(f"Скрипт restart_bot не найден для {bot_name}, выполняем stop + start")
-            if self.stop_bot(bot_name):
-                # Небольшая пауза между остановкой и запуском
-                import time
-                time.sleep(2)
-                return self.start_bot(bot_name)
-            return False
+        
+        # Если нет скрипта restart_bot, делаем stop + start
+        logger.info(f"Скрипт restart_bot не найден для {bot_name}, выполняем stop + start")
+        if await self.stop_bot_async(bot_name, notify=notify):
+            # Небольшая пауза между остановкой и запуском
+            await asyncio.sleep(2)
+            return await self.start_bot_async(bot_name, notify=notify)
+        return False
+    
+    async def bulk_action(
+        self,
+        action: str,
+        bot_names: Optional[List[str]] = None,
+        progress: Optional[BulkProgressCallback] = None,
+    ) -> List[BulkResult]:
+        """Массовый start/stop/restart: не более BULK_CONCURRENCY операций одновременно.
+
+        Без bot_names берутся все остановленные боты для start и все запущенные для stop/restart.
+        progress(result, done, total) вызывается после завершения операции над каждым ботом.
+        """
+        operations = {
+            'start': self.start_bot_async,
+            'stop': self.stop_bot_async,
+            'restart': self.restart_bot_async,
+        }
+        if action not in operations:
+            raise ValueError(f"Неизвестная массовая операция: {action}")
+        operation = operations[action]
+        
+        if bot_names is None:
+            want_running = action != 'start'
+            bot_names = [
+                bot_name for bot_name, is_running, _ in await self.executor.run(self._scan_bots)
+                if is_running == want_running
+            ]
+        
+        total = len(bot_names)
+        logger.info(f"Массовая операция {action}: {total} ботов, параллельно до {Config.BULK_CONCURRENCY}")
+        semaphore = asyncio.Semaphore(max(1, Config.BULK_CONCURRENCY))
+        done = 0
+        
+        async def run(bot_name: str) -> BulkResult:
+            nonlocal done
+            async with semaphore:
+                started = time.monotonic()
+                if action != 'stop':
+                    # Как и ручной запуск, сбрасывает серию автоперезапусков (в том числе цикл падений)
+                    self.restart_policy.reset(bot_name)
+                try:
+                    # Итог сообщает вызывающий - без уведомления на каждый бот
+                    result = BulkResult(bot_name, await operation(bot_name, notify=False), 0.0)
+                except Exception as e:
+                    logger.error(f"Ошибка массовой операции {action} для бота {bot_name}: {e}")
+                    result = BulkResult(bot_name, False, 0.0, str(e))
+                result.elapsed = time.monotonic() - started
+            done += 1
+            if progress:
+                try:
+                    await progress(result, done, total)
+                except Exception as e:
+                    logger.debug(f"Ошибка обновления прогресса массовой операции: {e}")
+            return result
+        
+        results = await asyncio.gather(*(run(bot_name) for bot_name in bot_names))
+        failed = sum(1 for result in results if not result.success)
+        logger.info(f"Массовая операция {action} завершена: успешно {total - failed}, ошибок {failed}")
+        return list(results)
     
     def get_all_bots_info(self) -> List[BotInfo]:
         """Получение информации о всех ботах"""
@@ -662,7 +765,12 @@ class BotManager:
         """Запуск мониторинга состояния ботов"""
         if self._monitoring_task is None:
             logger.info("Запуск мониторинга состояния ботов...")
-            import asyncio
+            # Запоминаем текущее состояние без уведомлений и сразу подключаем pidfd
+            await self._check_bots_status(notify=False)
+            self.log_tail.start()
+            await self._sync_log_tail()
+            if not self.pid_watcher.is_supported():
+                logger.info("pidfd недоступен - остановка ботов обнаруживается только опросом")
             self._monitoring_task = asyncio.create_task(self._monitoring_loop())
     
     async def stop_monitoring(self):
@@ -675,15 +783,22 @@ class BotManager:
             except asyncio.CancelledError:
                 pass
             self._monitoring_task = None
+        for task in self._restart_tasks.values():
+            task.cancel()
+        self._restart_tasks.clear()
+        self.pid_watcher.close()
+        self.log_sizes.close()
+        self.log_tail.close()
+        self.log_alerts.close()
     
     async def _monitoring_loop(self):
         """Основной цикл мониторинга состояния ботов"""
-        import asyncio
-        
         while True:
             try:
                 await asyncio.sleep(30)  # Проверяем каждые 30 секунд
-                await self._check_bots_status()
+                with self.instrumentation.measure('tick/bots'):
+                    await self._check_bots_status()
+                    await self._sync_log_tail()
             except asyncio.CancelledError:
                 logger.info("Мониторинг состояния ботов остановлен")
                 break
@@ -691,15 +806,54 @@ class BotManager:
                 logger.error(f"Ошибка в цикле мониторинга ботов: {e}")
                 await asyncio.sleep(10)  # Пауза при ошибке
     
-    async def _check_bots_status(self):
+    async def _sync_log_tail(self):
+        """Наблюдение за logs/ новых ботов (и появившихся позже папок logs/)"""
+        await self.log_tail.sync({bot_name: self.bots_dir / bot_name / 'logs' for bot_name in self.discover_bots()})
+    
+    async def _crash_log_context(self, bot_name: str) -> str:
+        """Последние строки логов бота для уведомления о падении (HTML)"""
+        try:
+            # Строки, записанные перед самым выходом, могли еще не дойти до буфера
+            await self.log_tail.catch_up(bot_name)
+        except Exception as e:
+            logger.debug(f"Не удалось дочитать логи бота {bot_name}: {e}")
+        lines = self.log_tail.lines(bot_name, Config.BOT_LOG_ALERT_LINES)
+        if not lines:
+            return "🔍 Проверьте логи бота для выяснения причины остановки."
+        escaped = []
+        length = 0
+        # С конца: при превышении лимита остаются последние строки
+        for _, line in reversed(lines):
+            line = html.escape(line[:CRASH_LINE_MAX])
+            length += len(line) + 1
+            if length > CRASH_CONTEXT_MAX:
+                break
+            escaped.append(line)
+        text = "\n".join(reversed(escaped))
+        return f"📜 <b>Последние строки логов:</b>\n<pre>{text}</pre>"
+    
+    def _scan_bots(self) -> List[Tuple[str, bool, Optional[int]]]:
+        """(имя, запущен, PID) всех ботов по одному проходу таблицы процессов (блокирующий)"""
+        # Освобождаем дескрипторы завершившихся процессов
+        self.process_pool.prune()
+        snapshot = self.process_table.refresh()
+        return [(bot_name, *self._is_bot_running(bot_name, snapshot)) for bot_name in self.discover_bots()]
+    
+    async def _check_bots_status(self, notify: bool = True):
         """Проверка состояния всех ботов"""
-        discovered_bots = self.discover_bots()
+        # Состояния до прохода: пока он идет, запуск, остановка или pidfd могут их заменить
+        states_before = dict(self._bot_states)
+        # Один проход по таблице процессов на все боты этого тика - в пуле потоков
+        statuses = await self.executor.run(self._scan_bots)
         
-        for bot_name in discovered_bots:
-            is_running, current_pid = self._is_bot_running(bot_name)
+        for bot_name, is_running, current_pid in statuses:
             
             # Получаем предыдущее состояние
-            previous_state = self._bot_states.get(bot_name, {'was_running': False, 'last_pid': None})
+            previous_state = self._bot_states.get(bot_name)
+            if previous_state is not states_before.get(bot_name):
+                # Состояние обновлено после прохода - результат проверки устарел
+                continue
+            previous_state = previous_state or {'was_running': False, 'last_pid': None}
             
             # Обновляем текущее состояние
             self._bot_states[bot_name] = {
@@ -707,6 +861,13 @@ class BotManager:
                 'last_pid': current_pid
             }
             
+            # Подключаем pidfd к найденному процессу (в том числе обнаруженному позже)
+            if is_running and current_pid:
+                self._watch_bot_process(bot_name, current_pid)
+            
+            if not notify:
+                continue
+            
             # Проверяем изменения состояния
             if previous_state['was_running'] and not is_running:
                 # Бот упал или был остановлен
@@ -715,27 +876,138 @@ class BotManager:
                 # Бот запустился
                 await self._handle_bot_started(bot_name, current_pid)
     
-    async def _handle_bot_stopped(self, bot_name: str, last_pid: Optional[int]):
+    def _watch_bot_process(self, bot_name: str, pid: int):
+        """Наблюдение за главным процессом бота через pidfd"""
+        if self.supervisor.get(bot_name):
+            # Завершение дочернего процесса (с кодом выхода) сообщает супервизор
+            return
+        self.pid_watcher.watch(bot_name, pid, self._on_bot_process_exited)
+    
+    async def _on_bot_process_exited(self, bot_name: str, pid: int):
+        """pidfd сообщил о завершении главного процесса бота"""
+        state = self._bot_states.get(bot_name)
+        if not state or not state['was_running'] or state['last_pid'] != pid:
+            return
+        
+        # Бот мог быть уже перезапущен с новым PID (например, restart_bot.sh)
+        self.process_table.invalidate()
+        is_running, current_pid = await self.executor.run(self._is_bot_running, bot_name)
+        if is_running and current_pid != pid:
+            logger.info(f"Бот {bot_name} продолжает работу с новым PID {current_pid} (старый: {pid})")
+            # Перезапуск (restart_bot.sh) завершен - отметка остановки старого процесса больше не нужна
+            self.restart_policy.clear_intentional_stop(bot_name)
+            self._bot_states[bot_name] = {'was_running': True, 'last_pid': current_pid}
+            self._watch_bot_process(bot_name, current_pid)
+            return
+        
+        self._bot_states[bot_name] = {'was_running': False, 'last_pid': None}
+        await self._handle_bot_stopped(bot_name, pid)
+    
+    async def _on_supervised_exit(self, bot_name: str, pid: int, returncode: int):
+        """Супервизор получил код выхода дочернего бота"""
+        state = self._bot_states.get(bot_name)
+        if not state or not state['was_running'] or state['last_pid'] != pid:
+            return
+        
+        self._bot_states[bot_name] = {'was_running': False, 'last_pid': None}
+        await self._handle_bot_stopped(bot_name, pid, returncode)
+    
+    async def _handle_bot_stopped(self, bot_name: str, last_pid: Optional[int], exit_code: Optional[int] = None):
         """Обработка остановки бота"""
-        logger.warning(f"Обнаружена остановка бота {bot_name} (последний PID: {last_pid})")
+        logger.warning(f"Обнаружена остановка бота {bot_name} (последний PID: {last_pid}, код выхода: {exit_code})")
+        self.state_cache.refresh_soon(STATE_BOTS)
+        
+        decision = self.restart_policy.on_exit(bot_name, exit_code, last_pid)
+        if decision.action == ACTION_INTENTIONAL:
+            logger.info(f"Бот {bot_name} остановлен через Sentinel - автоперезапуск не нужен")
+            return
+        if decision.action == ACTION_GIVE_UP:
+            await self._send_crash_loop_alert(bot_name, decision)
+            return
+        
+        restart_line = ""
+        if decision.action == ACTION_RESTART:
+            # Об успешном запуске сообщаем только в начале серии
+            self._schedule_restart(bot_name, decision.delay, notify=decision.attempt == 1)
+            if decision.attempt > 1:
+                # Повторные падения серии попадут в одно сводное уведомление
+                return
+            restart_line = f"🔁 Автоперезапуск через {decision.delay:.0f}с (политика {decision.policy})\n"
         
         # Отправляем уведомление в Telegram
         if self.telegram_bot:
             try:
+                exit_line = ""
+                if exit_code is not None:
+                    exit_line = f"🔚 Код выхода: {self.supervisor.describe_returncode(exit_code)}\n"
                 message = (
                     f"🚨 <b>Бот остановлен!</b>\n\n"
                     f"🤖 Бот: <code>{bot_name}</code>\n"
                     f"🆔 Последний PID: {last_pid or 'неизвестен'}\n"
+                    f"{exit_line}"
+                    f"{restart_line}"
                     f"⏰ Время: {datetime.now().strftime('%H:%M:%S')}\n\n"
-                    f"🔍 Проверьте логи бота для выяснения причины остановки."
+                    f"{await self._crash_log_context(bot_name)}"
                 )
                 await self.telegram_bot.send_notification(message)
             except Exception as e:
                 logger.error(f"Ошибка отправки уведомления об остановке бота {bot_name}: {e}")
     
+    def _schedule_restart(self, bot_name: str, delay: float, notify: bool):
+        """Отложенный автоперезапуск (одна задача на бота)"""
+        previous = self._restart_tasks.pop(bot_name, None)
+        if previous:
+            previous.cancel()
+        self._restart_tasks[bot_name] = asyncio.create_task(self._auto_restart(bot_name, delay, notify))
+    
+    async def _auto_restart(self, bot_name: str, delay: float, notify: bool):
+        """Автоперезапуск бота после задержки backoff"""
+        try:
+            await asyncio.sleep(delay)
+            # Свежая таблица процессов - проход по /proc в пуле потоков
+            self.process_table.invalidate()
+            is_running, pid = await self.executor.run(self._is_bot_running, bot_name)
+            if is_running:
+                logger.info(f"Бот {bot_name} уже запущен (PID: {pid}) - автоперезапуск не нужен")
+                return
+            
+            logger.info(f"Автоперезапуск бота {bot_name}")
+            started = await self.start_bot_async(bot_name, notify=notify)
+        finally:
+            if self._restart_tasks.get(bot_name) is asyncio.current_task():
+                del self._restart_tasks[bot_name]
+        
+        if not started:
+            # Неудачный запуск считается очередным падением серии
+            await self._handle_bot_stopped(bot_name, None)
+    
+    async def _send_crash_loop_alert(self, bot_name: str, decision: RestartDecision):
+        """Одно сводное уведомление на цикл падений"""
+        if not self.telegram_bot:
+            return
+        exit_codes = ", ".join(
+            self.supervisor.describe_returncode(code) if code is not None else "?"
+            for code in decision.exit_codes
+        )
+        message = (
+            f"🔁 <b>Бот в цикле падений!</b>\n\n"
+            f"🤖 Бот: <code>{bot_name}</code>\n"
+            f"💥 Падений: {len(decision.exit_codes)}, перезапусков: {decision.attempt} "
+            f"за {Config.RESTART_WINDOW // 60} мин\n"
+            f"🔚 Коды выхода: {exit_codes}\n"
+            f"⏰ Время: {datetime.now().strftime('%H:%M:%S')}\n\n"
+            f"⛔ Автоперезапуск отключен до ручного запуска бота.\n\n"
+            f"{await self._crash_log_context(bot_name)}"
+        )
+        try:
+            await self.telegram_bot.send_notification(message)
+        except Exception as e:
+            logger.error(f"Ошибка отправки уведомления о цикле падений бота {bot_name}: {e}")
+    
     async def _handle_bot_started(self, bot_name: str, current_pid: Optional[int]):
         """Обработка запуска бота"""
         logger.info(f"Обнаружен запуск бота {bot_name} (PID: {current_pid})")
+        self.state_cache.refresh_soon(STATE_BOTS)
         
         # Отправляем уведомление в Telegram (только если это не первая проверка)
         if bot_name in self._bot_states and self.telegram_bot:
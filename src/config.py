@@ -17,10 +17,78 @@ class Config:
     TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
     TELEGRAM_ADMIN_ID = int(os.getenv('TELEGRAM_ADMIN_ID', 0))
     
+    # Telegram Updates Mode (polling или webhook)
+    TELEGRAM_MODE = os.getenv('TELEGRAM_MODE', 'polling').lower()
+    WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '127.0.0.1')
+    WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 8443))
+    WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', 'telegram')
+    WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')
+    WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')
+    WEBHOOK_CERT = os.getenv('WEBHOOK_CERT', '')
+    WEBHOOK_KEY = os.getenv('WEBHOOK_KEY', '')
+    
     # Resource Monitoring Limits
     MAX_CPU_PERCENT = float(os.getenv('MAX_CPU_PERCENT', 95))
     MIN_FREE_RAM_MB = int(os.getenv('MIN_FREE_RAM_MB', 40))
     MONITORING_INTERVAL = int(os.getenv('MONITORING_INTERVAL', 60))
+    CPU_SAMPLE_INTERVAL = float(os.getenv('CPU_SAMPLE_INTERVAL', 2))
+    CPU_HISTORY_SIZE = int(os.getenv('CPU_HISTORY_SIZE', 150))
+    PROCESS_CACHE_SIZE = int(os.getenv('PROCESS_CACHE_SIZE', 4096))
+    PROCESS_SNAPSHOT_MAX_AGE = float(os.getenv('PROCESS_SNAPSHOT_MAX_AGE', 2))
+    
+    # Supervisor Mode
+    SUPERVISOR_MODE = os.getenv('SUPERVISOR_MODE', 'false').lower() == 'true'
+    SUPERVISOR_LOG_MAX_MB = int(os.getenv('SUPERVISOR_LOG_MAX_MB', 10))
+    SUPERVISOR_LOG_BACKUPS = int(os.getenv('SUPERVISOR_LOG_BACKUPS', 5))
+    
+    # Restart Policies
+    RESTART_POLICY = os.getenv('RESTART_POLICY', 'never')
+    RESTART_POLICY_OVERRIDES = os.getenv('RESTART_POLICY_OVERRIDES', '')
+    RESTART_BACKOFF_BASE = float(os.getenv('RESTART_BACKOFF_BASE', 5))
+    RESTART_BACKOFF_MAX = float(os.getenv('RESTART_BACKOFF_MAX', 300))
+    RESTART_BACKOFF_JITTER = float(os.getenv('RESTART_BACKOFF_JITTER', 0.2))
+    RESTART_MAX_RESTARTS = int(os.getenv('RESTART_MAX_RESTARTS', 5))
+    RESTART_WINDOW = int(os.getenv('RESTART_WINDOW', 600))
+    
+    # Bulk Operations
+    BULK_CONCURRENCY = int(os.getenv('BULK_CONCURRENCY', 5))
+    
+    # State Cache
+    STATE_REFRESH_INTERVAL = float(os.getenv('STATE_REFRESH_INTERVAL', 10))
+    
+    # Blocking Calls Executor
+    EXECUTOR_WORKERS = int(os.getenv('EXECUTOR_WORKERS', 8))
+    EXECUTOR_TIMEOUT = float(os.getenv('EXECUTOR_TIMEOUT', 30))
+    
+    # Instrumentation
+    LOOP_LAG_INTERVAL = float(os.getenv('LOOP_LAG_INTERVAL', 0.5))
+    LOOP_LAG_WARN = float(os.getenv('LOOP_LAG_WARN', 0.5))
+    METRICS_LOG_INTERVAL = float(os.getenv('METRICS_LOG_INTERVAL', 300))
+    
+    # Notification Queue
+    NOTIFY_RATE = float(os.getenv('NOTIFY_RATE', 1))
+    NOTIFY_BURST = int(os.getenv('NOTIFY_BURST', 5))
+    NOTIFY_COALESCE_WINDOW = float(os.getenv('NOTIFY_COALESCE_WINDOW', 1))
+    NOTIFY_QUEUE_SIZE = int(os.getenv('NOTIFY_QUEUE_SIZE', 500))
+    NOTIFY_SPOOL_MAX_AGE = int(os.getenv('NOTIFY_SPOOL_MAX_AGE', 86400))
+    NOTIFY_BREAKER_THRESHOLD = int(os.getenv('NOTIFY_BREAKER_THRESHOLD', 3))
+    NOTIFY_BREAKER_RESET = float(os.getenv('NOTIFY_BREAKER_RESET', 30))
+    NOTIFY_BREAKER_MAX_RESET = float(os.getenv('NOTIFY_BREAKER_MAX_RESET', 600))
+    
+    # Log Retention
+    LOG_COMPRESSION = os.getenv('LOG_COMPRESSION', 'gzip').lower()
+    LOG_MAX_AGE_DAYS = int(os.getenv('LOG_MAX_AGE_DAYS', 30))
+    LOG_MAX_TOTAL_MB = int(os.getenv('LOG_MAX_TOTAL_MB', 500))
+    LOG_RETENTION_INTERVAL = float(os.getenv('LOG_RETENTION_INTERVAL', 3600))
+    
+    # Bot Logs
+    BOT_LOG_TAIL_LINES = int(os.getenv('BOT_LOG_TAIL_LINES', 100))
+    BOT_LOG_ALERT_LINES = int(os.getenv('BOT_LOG_ALERT_LINES', 10))
+    BOT_LOG_POLL_INTERVAL = float(os.getenv('BOT_LOG_POLL_INTERVAL', 2))
+    LOG_ALERT_ENABLED = os.getenv('LOG_ALERT_ENABLED', 'true').lower() == 'true'
+    LOG_ALERT_PATTERNS = os.getenv('LOG_ALERT_PATTERNS', 'Traceback;rate limited')
+    LOG_ALERT_PATTERN_OVERRIDES = os.getenv('LOG_ALERT_PATTERN_OVERRIDES', '')
+    LOG_ALERT_WINDOW = float(os.getenv('LOG_ALERT_WINDOW', 300))
     
     # Paths
     _base_dir = Path(__file__).parent.parent  # Корневая директория проекта
@@ -55,9 +123,57 @@ class Config:
         # Обновляем все переменные
         cls.TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
         cls.TELEGRAM_ADMIN_ID = int(os.getenv('TELEGRAM_ADMIN_ID', 0))
+        cls.TELEGRAM_MODE = os.getenv('TELEGRAM_MODE', 'polling').lower()
+        cls.WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '127.0.0.1')
+        cls.WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 8443))
+        cls.WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', 'telegram')
+        cls.WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')
+        cls.WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')
+        cls.WEBHOOK_CERT = os.getenv('WEBHOOK_CERT', '')
+        cls.WEBHOOK_KEY = os.getenv('WEBHOOK_KEY', '')
         cls.MAX_CPU_PERCENT = float(os.getenv('MAX_CPU_PERCENT', 95))
         cls.MIN_FREE_RAM_MB = int(os.getenv('MIN_FREE_RAM_MB', 40))
         cls.MONITORING_INTERVAL = int(os.getenv('MONITORING_INTERVAL', 60))
+        cls.CPU_SAMPLE_INTERVAL = float(os.getenv('CPU_SAMPLE_INTERVAL', 2))
+        cls.CPU_HISTORY_SIZE = int(os.getenv('CPU_HISTORY_SIZE', 150))
+        cls.PROCESS_CACHE_SIZE = int(os.getenv('PROCESS_CACHE_SIZE', 4096))
+        cls.PROCESS_SNAPSHOT_MAX_AGE = float(os.getenv('PROCESS_SNAPSHOT_MAX_AGE', 2))
+        cls.SUPERVISOR_MODE = os.getenv('SUPERVISOR_MODE', 'false').lower() == 'true'
+        cls.SUPERVISOR_LOG_MAX_MB = int(os.getenv('SUPERVISOR_LOG_MAX_MB', 10))
+        cls.SUPERVISOR_LOG_BACKUPS = int(os.getenv('SUPERVISOR_LOG_BACKUPS', 5))
+        cls.RESTART_POLICY = os.getenv('RESTART_POLICY', 'never')
+        cls.RESTART_POLICY_OVERRIDES = os.getenv('RESTART_POLICY_OVERRIDES', '')
+        cls.RESTART_BACKOFF_BASE = float(os.getenv('RESTART_BACKOFF_BASE', 5))
+        cls.RESTART_BACKOFF_MAX = float(os.getenv('RESTART_BACKOFF_MAX', 300))
+        cls.RESTART_BACKOFF_JITTER = float(os.getenv('RESTART_BACKOFF_JITTER', 0.2))
+        cls.RESTART_MAX_RESTARTS = int(os.getenv('RESTART_MAX_RESTARTS', 5))
+        cls.RESTART_WINDOW = int(os.getenv('RESTART_WINDOW', 600))
+        cls.BULK_CONCURRENCY = int(os.getenv('BULK_CONCURRENCY', 5))
+        cls.STATE_REFRESH_INTERVAL = float(os.getenv('STATE_REFRESH_INTERVAL', 10))
+        cls.EXECUTOR_WORKERS = int(os.getenv('EXECUTOR_WORKERS', 8))
+        cls.EXECUTOR_TIMEOUT = float(os.getenv('EXECUTOR_TIMEOUT', 30))
+        cls.LOOP_LAG_INTERVAL = float(os.getenv('LOOP_LAG_INTERVAL', 0.5))
+        cls.LOOP_LAG_WARN = float(os.getenv('LOOP_LAG_WARN', 0.5))
+        cls.METRICS_LOG_INTERVAL = float(os.getenv('METRICS_LOG_INTERVAL', 300))
+        cls.NOTIFY_RATE = float(os.getenv('NOTIFY_RATE', 1))
+        cls.NOTIFY_BURST = int(os.getenv('NOTIFY_BURST', 5))
+        cls.NOTIFY_COALESCE_WINDOW = float(os.getenv('NOTIFY_COALESCE_WINDOW', 1))
+        cls.NOTIFY_QUEUE_SIZE = int(os.getenv('NOTIFY_QUEUE_SIZE', 500))
+        cls.NOTIFY_SPOOL_MAX_AGE = int(os.getenv('NOTIFY_SPOOL_MAX_AGE', 86400))
+        cls.NOTIFY_BREAKER_THRESHOLD = int(os.getenv('NOTIFY_BREAKER_THRESHOLD', 3))
+        cls.NOTIFY_BREAKER_RESET = float(os.getenv('NOTIFY_BREAKER_RESET', 30))
+        cls.NOTIFY_BREAKER_MAX_RESET = float(os.getenv('NOTIFY_BREAKER_MAX_RESET', 600))
+        cls.LOG_COMPRESSION = os.getenv('LOG_COMPRESSION', 'gzip').lower()
+        cls.LOG_MAX_AGE_DAYS = int(os.getenv('LOG_MAX_AGE_DAYS', 30))
+        cls.LOG_MAX_TOTAL_MB = int(os.getenv('LOG_MAX_TOTAL_MB', 500))
+        cls.LOG_RETENTION_INTERVAL = float(os.getenv('LOG_RETENTION_INTERVAL', 3600))
+        cls.BOT_LOG_TAIL_LINES = int(os.getenv('BOT_LOG_TAIL_LINES', 100))
+        cls.BOT_LOG_ALERT_LINES = int(os.getenv('BOT_LOG_ALERT_LINES', 10))
+        cls.BOT_LOG_POLL_INTERVAL = float(os.getenv('BOT_LOG_POLL_INTERVAL', 2))
+        cls.LOG_ALERT_ENABLED = os.getenv('LOG_ALERT_ENABLED', 'true').lower() == 'true'
+        cls.LOG_ALERT_PATTERNS = os.getenv('LOG_ALERT_PATTERNS', 'Traceback;rate limited')
+        cls.LOG_ALERT_PATTERN_OVERRIDES = os.getenv('LOG_ALERT_PATTERN_OVERRIDES', '')
+        cls.LOG_ALERT_WINDOW = float(os.getenv('LOG_ALERT_WINDOW', 300))
         cls.TARGET_USER = os.getenv('TARGET_USER', getpass.getuser())
         cls.LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
         # Notification Settings
@@ -83,6 +199,14 @@ class Config:
         if cls.MAX_CPU_PERCENT > 100 or cls.MAX_CPU_PERCENT < 1:
             errors.append("MAX_CPU_PERCENT должен быть между 1 и 100")
             
+        if cls.TELEGRAM_MODE not in ('polling', 'webhook'):
+            errors.append("TELEGRAM_MODE должен быть polling или webhook")
+        elif cls.TELEGRAM_MODE == 'webhook':
+            if not cls.WEBHOOK_URL.startswith('https://'):
+                errors.append("WEBHOOK_URL должен быть публичным https:// адресом для режима webhook")
+            if bool(cls.WEBHOOK_CERT) != bool(cls.WEBHOOK_KEY):
+                errors.append("WEBHOOK_CERT и WEBHOOK_KEY задаются вместе")
+            
         if errors:
             raise ValueError(f"Ошибки конфигурации: {'; '.join(errors)}")
             
@@ -0,0 +1,116 @@
+"""
+Фоновый сэмплер загрузки CPU для SaldoranBotSentinel
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import List, Optional, Tuple
+
+import psutil
+
+from .config import Config
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+PROC_STAT = '/proc/stat'
+
+
+def _read_cpu_times() -> Tuple[float, float]:
+    """Чтение суммарных (busy, total) времен CPU из /proc/stat"""
+    try:
+        with open(PROC_STAT, 'rb') as f:
+            fields = f.readline().split()
+        # cpu user nice system idle iowait irq softirq steal [guest guest_nice]
+        values = [int(v) for v in fields[1:9]]
+        idle = values[3] + values[4]
+        total = sum(values)
+        return float(total - idle), float(total)
+    except (OSError, ValueError, IndexError):
+        # Не Linux - берем счетчики через psutil (без сна)
+        times = psutil.cpu_times()
+        idle = times.idle + getattr(times, 'iowait', 0.0)
+        total = sum(times) - getattr(times, 'guest', 0.0) - getattr(times, 'guest_nice', 0.0)
+        return total - idle, total
+
+
+class CpuSampler:
+    """Периодически считает загрузку CPU по дельтам /proc/stat и хранит историю"""
+
+    def __init__(self, interval: Optional[float] = None, history_size: Optional[int] = None):
+        self.interval = interval or Config.CPU_SAMPLE_INTERVAL
+        self._history: deque = deque(maxlen=history_size or Config.CPU_HISTORY_SIZE)
+        self._task = None
+        # Базовая точка - счетчики с момента загрузки системы
+        self._last_times = _read_cpu_times()
+        self._boot_percent = self._percent((0.0, 0.0), self._last_times)
+
+    @staticmethod
+    def _percent(prev: Tuple[float, float], cur: Tuple[float, float]) -> float:
+        """Процент загрузки между двумя замерами"""
+        busy_delta = cur[0] - prev[0]
+        total_delta = cur[1] - prev[1]
+        if total_delta <= 0:
+            return 0.0
+        return max(0.0, min(100.0, busy_delta / total_delta * 100))
+
+    def sample(self) -> float:
+        """Снять один замер относительно предыдущего"""
+        current = _read_cpu_times()
+        percent = self._percent(self._last_times, current)
+        self._last_times = current
+        self._history.append((time.time(), percent))
+        return percent
+
+    @property
+    def percent(self) -> float:
+        """Последнее значение загрузки CPU (без блокировки)"""
+        if self._history:
+            return self._history[-1][1]
+        # До первого замера отдаем среднее с момента загрузки системы
+        return self._boot_percent
+
+    @property
+    def last_sample_time(self) -> Optional[float]:
+        """Время последнего замера (unix timestamp)"""
+        return self._history[-1][0] if self._history else None
+
+    def history(self) -> List[Tuple[float, float]]:
+        """История замеров [(timestamp, percent), ...]"""
+        return list(self._history)
+
+    def average(self, seconds: float) -> float:
+        """Средняя загрузка за последние seconds секунд"""
+        threshold = time.time() - seconds
+        values = [p for ts, p in self._history if ts >= threshold]
+        if not values:
+            return self.percent
+        return sum(values) / len(values)
+
+    async def start(self):
+        """Запуск фонового сэмплирования"""
+        if self._task is None:
+            logger.info(f"Запуск сэмплера CPU с интервалом {self.interval} секунд")
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        """Остановка фонового сэмплирования"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        """Основной цикл сэмплера"""
+        while True:
+            try:
+                await asyncio.sleep(self.interval)
+                self.sample()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Ошибка сэмплера CPU: {e}")
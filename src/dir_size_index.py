@@ -0,0 +1,247 @@
+"""
+Инкрементальный подсчет размера директорий логов ботов для SaldoranBotSentinel
+"""
+
+import os
+import stat
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .inotify import (
+    IN_CLOSE_WRITE, IN_CREATE, IN_DELETE, IN_DELETE_SELF, IN_IGNORED, IN_MODIFY,
+    IN_MOVED_FROM, IN_MOVED_TO, IN_MOVE_SELF, IN_ONLYDIR, IN_Q_OVERFLOW, open_inotify,
+)
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# Полный пересчет дерева не реже этого интервала - страховка от пропущенных изменений
+FULL_RESCAN_INTERVAL = 3600
+
+# IN_MODIFY - дописывание в логи; события копятся до запроса размера и схлопываются по имени файла
+_WATCH_MASK = (IN_CREATE | IN_DELETE | IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+               IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+
+@dataclass
+class _DirState:
+    """Содержимое одной директории: файлы с размерами и поддиректории"""
+    mtime_ns: int
+    files: Dict[str, Tuple[int, float]] = field(default_factory=dict)  # имя -> (размер, mtime)
+    subdirs: set = field(default_factory=set)
+    wd: Optional[int] = None
+
+
+@dataclass
+class _Tree:
+    """Индекс одного корня (папка logs/ бота)"""
+    root: str
+    dirs: Dict[str, _DirState] = field(default_factory=dict)
+    total: int = 0
+    scanned_at: float = 0.0
+
+
+class DirSizeIndex:
+    """Размеры деревьев директорий: один полный проход os.scandir, дальше только изменения.
+
+    Создание, удаление, ротация и дописывание файлов отслеживаются через inotify.
+    Без него список файлов сверяется по mtime директорий, а размеры известных
+    файлов перечитываются stat'ом при каждом запросе.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._trees: Dict[str, _Tree] = {}
+        self._wd_map: Dict[int, Tuple[_Tree, str]] = {}
+
+        self._inotify = open_inotify()
+        mode = "inotify" if self._inotify else "опрос mtime"
+        logger.debug(f"Индекс размеров директорий: {mode}")
+
+    def size_bytes(self, path: Path) -> int:
+        """Суммарный размер файлов в дереве path"""
+        root = str(path)
+        with self._lock:
+            self._apply_events()
+            tree = self._trees.get(root)
+            if tree is None or time.monotonic() - tree.scanned_at > FULL_RESCAN_INTERVAL:
+                tree = self._rebuild(root)
+            else:
+                self._sync(tree)
+            return tree.total
+
+    def size_mb(self, path: Path) -> float:
+        """Размер дерева в MB"""
+        return self.size_bytes(path) / 1024 / 1024
+
+    # --- Полный проход ---
+
+    def _rebuild(self, root: str) -> _Tree:
+        """Полный пересчет дерева"""
+        old = self._trees.pop(root, None)
+        if old:
+            for dirpath in list(old.dirs):
+                self._forget_dir(old, dirpath)
+        tree = _Tree(root)
+        started = time.perf_counter()
+        self._scan_dir(tree, root)
+        tree.scanned_at = time.monotonic()
+        self._trees[root] = tree
+        logger.debug(f"Индекс размера {root}: {tree.total / 1024 / 1024:.1f}MB в {len(tree.dirs)} директориях, "
+                     f"{(time.perf_counter() - started) * 1000:.1f}ms")
+        return tree
+
+    def _scan_dir(self, tree: _Tree, dirpath: str):
+        """Сканирование директории и ее поддиректорий через os.scandir"""
+        try:
+            dir_mtime = os.stat(dirpath).st_mtime_ns
+            entries = list(os.scandir(dirpath))
+        except OSError:
+            return
+
+        state = _DirState(dir_mtime)
+        tree.dirs[dirpath] = state
+        if self._inotify:
+            try:
+                state.wd = self._inotify.add_watch(dirpath, _WATCH_MASK)
+                self._wd_map[state.wd] = (tree, dirpath)
+            except OSError as e:
+                logger.debug(f"inotify watch для {dirpath} недоступен: {e}")
+
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    state.subdirs.add(entry.name)
+                    self._scan_dir(tree, entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    st = entry.stat(follow_symlinks=False)
+                    state.files[entry.name] = (st.st_size, st.st_mtime)
+                    tree.total += st.st_size
+            except OSError:
+                continue
+
+    def _forget_dir(self, tree: _Tree, dirpath: str):
+        """Удаление директории и ее поддерева из индекса"""
+        state = tree.dirs.pop(dirpath, None)
+        if state is None:
+            return
+        tree.total -= sum(size for size, _ in state.files.values())
+        if state.wd is not None:
+            self._wd_map.pop(state.wd, None)
+            try:
+                self._inotify.rm_watch(state.wd)
+            except OSError:
+                pass  # Директория уже удалена - watch снят ядром
+        for name in state.subdirs:
+            self._forget_dir(tree, os.path.join(dirpath, name))
+
+    # --- Инкрементальные изменения ---
+
+    def _update_entry(self, tree: _Tree, dirpath: str, name: str):
+        """Перечитывание одной записи директории"""
+        state = tree.dirs.get(dirpath)
+        if state is None:
+            return
+        path = os.path.join(dirpath, name)
+        old = state.files.pop(name, None)
+        if old:
+            tree.total -= old[0]
+        if name in state.subdirs:
+            state.subdirs.discard(name)
+            self._forget_dir(tree, path)
+
+        try:
+            st = os.lstat(path)
+        except OSError:
+            return
+        if stat.S_ISDIR(st.st_mode):
+            state.subdirs.add(name)
+            self._scan_dir(tree, path)
+        elif stat.S_ISREG(st.st_mode):
+            state.files[name] = (st.st_size, st.st_mtime)
+            tree.total += st.st_size
+
+    def _apply_events(self):
+        """Применение накопленных событий inotify ко всем деревьям"""
+        if not self._inotify:
+            return
+        changed = set()
+        for event in self._inotify.read_events():
+            if event.mask & IN_Q_OVERFLOW:
+                # Очередь переполнена - изменения потеряны, деревья пересчитаются при запросе
+                logger.debug("Переполнение очереди inotify, индекс размеров будет пересчитан")
+                for tree in self._trees.values():
+                    tree.scanned_at = 0.0
+                return
+            target = self._wd_map.get(event.wd)
+            if target is None:
+                continue
+            tree, dirpath = target
+            if event.mask & IN_IGNORED:
+                self._wd_map.pop(event.wd, None)
+                continue
+            if event.mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                if dirpath == tree.root:
+                    tree.scanned_at = 0.0
+                continue
+            if event.name:
+                changed.add((tree.root, dirpath, event.name))
+
+        for root, dirpath, name in changed:
+            tree = self._trees.get(root)
+            if tree is not None:
+                self._update_entry(tree, dirpath, name)
+
+    def _sync(self, tree: _Tree):
+        """Сверка mtime директорий и stat известных файлов - без inotify или для директорий без watch"""
+        # С inotify изменения пришли событиями; директории, где add_watch не удался
+        # (например, исчерпан max_user_watches), сверяются как без него
+        polled = [(dirpath, state) for dirpath, state in tree.dirs.items()
+                  if not self._inotify or state.wd is None]
+        for dirpath, state in polled:
+            if tree.dirs.get(dirpath) is not state:
+                continue  # Удалена вместе с родителем на этом проходе
+            try:
+                dir_mtime = os.stat(dirpath).st_mtime_ns
+            except OSError:
+                self._forget_dir(tree, dirpath)
+                continue
+            if dir_mtime != state.mtime_ns:
+                self._resync_dir(tree, dirpath, state, dir_mtime)
+
+        for dirpath, state in polled:
+            if tree.dirs.get(dirpath) is not state:
+                continue
+            for name, (size, mtime) in list(state.files.items()):
+                try:
+                    st = os.lstat(os.path.join(dirpath, name))
+                except OSError:
+                    del state.files[name]
+                    tree.total -= size
+                    continue
+                if st.st_size != size or st.st_mtime != mtime:
+                    state.files[name] = (st.st_size, st.st_mtime)
+                    tree.total += st.st_size - size
+
+    def _resync_dir(self, tree: _Tree, dirpath: str, state: _DirState, dir_mtime: int):
+        """Изменился список файлов директории: сверяем имена без полного прохода поддерева"""
+        try:
+            names = set(os.listdir(dirpath))
+        except OSError:
+            self._forget_dir(tree, dirpath)
+            return
+        state.mtime_ns = dir_mtime
+        known = set(state.files) | state.subdirs
+        for name in known - names:
+            self._update_entry(tree, dirpath, name)
+        for name in names - known:
+            self._update_entry(tree, dirpath, name)
+
+    def close(self):
+        """Освобождение дескриптора inotify"""
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
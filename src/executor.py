@@ -0,0 +1,124 @@
+"""
+Пул потоков для блокирующих вызовов SaldoranBotSentinel
+"""
+
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from .config import Config
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class OperationStats:
+    """Статистика одного вида операций"""
+    calls: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    wait_total: float = 0.0  # Время в очереди пула (сек)
+    run_total: float = 0.0   # Время выполнения в потоке (сек)
+    run_max: float = 0.0
+
+    @property
+    def avg_wait_ms(self) -> float:
+        return self.wait_total / self.calls * 1000 if self.calls else 0.0
+
+    @property
+    def avg_run_ms(self) -> float:
+        return self.run_total / self.calls * 1000 if self.calls else 0.0
+
+
+@dataclass
+class ExecutorMetrics:
+    """Состояние пула в момент запроса"""
+    workers: int
+    queued: int   # Ждут свободного потока
+    running: int  # Выполняются сейчас
+    operations: Dict[str, OperationStats]
+
+
+class BlockingExecutor:
+    """Единая точка для блокирующих вызовов (subprocess, файлы, /proc, psutil).
+
+    Ограниченный пул потоков, таймаут на каждую операцию и статистика:
+    глубина очереди, время ожидания и выполнения по видам операций.
+    Поток нельзя прервать - по таймауту вызывающий получает asyncio.TimeoutError,
+    а операция дорабатывает в фоне (у subprocess свой timeout).
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, default_timeout: Optional[float] = None):
+        self.max_workers = max_workers or Config.EXECUTOR_WORKERS
+        self.default_timeout = default_timeout if default_timeout is not None else Config.EXECUTOR_TIMEOUT
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='sentinel-io')
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._stats: Dict[str, OperationStats] = {}
+
+    def _stats_for(self, name: str) -> OperationStats:
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = OperationStats()
+        return stats
+
+    def _call(self, name: str, submitted: float, func: Callable[[], Any]) -> Any:
+        """Выполнение в потоке пула с учетом времени ожидания и работы"""
+        started = time.perf_counter()
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        failed = False
+        try:
+            return func()
+        except Exception:
+            failed = True
+            raise
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self._running -= 1
+                stats = self._stats_for(name)
+                stats.calls += 1
+                stats.errors += failed
+                stats.wait_total += started - submitted
+                stats.run_total += finished - started
+                stats.run_max = max(stats.run_max, finished - started)
+
+    async def run(self, func: Callable[..., Any], *args, name: Optional[str] = None,
+                  timeout: Optional[float] = None, **kwargs) -> Any:
+        """Выполнение func(*args, **kwargs) в пуле; timeout=None - таймаут по умолчанию, 0 - без таймаута"""
+        name = name or getattr(func, '__name__', 'call')
+        timeout = self.default_timeout if timeout is None else timeout
+        call = functools.partial(func, *args, **kwargs)
+
+        with self._lock:
+            self._queued += 1
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._pool, self._call, name, time.perf_counter(), call)
+        try:
+            if timeout:
+                # shield - отмена ожидания не снимает уже запущенную в потоке операцию
+                return await asyncio.wait_for(asyncio.shield(future), timeout)
+            return await future
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._stats_for(name).timeouts += 1
+            logger.warning(f"Операция {name} не уложилась в {timeout}с и продолжает работу в фоне")
+            raise
+
+    def metrics(self) -> ExecutorMetrics:
+        """Снимок глубины очереди и статистики операций"""
+        with self._lock:
+            operations = {name: OperationStats(**vars(stats)) for name, stats in self._stats.items()}
+            return ExecutorMetrics(self.max_workers, self._queued, self._running, operations)
+
+    def shutdown(self):
+        """Остановка пула без ожидания зависших операций"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,344 @@
+"""
+Чтение информации о последнем коммите напрямую из .git для SaldoranBotSentinel
+"""
+
+import mmap
+import os
+import struct
+import subprocess
+import threading
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# Типы объектов в pack файле
+_OBJ_COMMIT = 1
+_OBJ_OFS_DELTA = 6
+_OBJ_REF_DELTA = 7
+
+_IDX_MAGIC = b'\xfftOc'
+_MAX_REF_DEPTH = 5
+_MAX_DELTA_DEPTH = 50
+
+
+@dataclass
+class CommitInfo:
+    """Последний коммит репозитория"""
+    sha: str
+    date: Optional[str]  # YYYY-MM-DD в часовом поясе коммиттера (как git log --date=short)
+
+
+class GitObjectError(Exception):
+    """Объект не удалось прочитать без git (неподдерживаемый формат)"""
+
+
+def find_git_dir(repo_path: Path) -> Optional[Path]:
+    """Путь к git директории: .git или файл .git с "gitdir: ..." (worktree, submodule)"""
+    dot_git = repo_path / '.git'
+    if dot_git.is_dir():
+        return dot_git
+    try:
+        content = dot_git.read_text(encoding='utf-8').strip()
+    except OSError:
+        return None
+    if not content.startswith('gitdir:'):
+        return None
+    git_dir = Path(content[len('gitdir:'):].strip())
+    if not git_dir.is_absolute():
+        git_dir = repo_path / git_dir
+    return git_dir if git_dir.is_dir() else None
+
+
+def _common_dir(git_dir: Path) -> Path:
+    """Общая директория (refs, objects) - для worktree указана в файле commondir"""
+    try:
+        common = Path((git_dir / 'commondir').read_text(encoding='utf-8').strip())
+    except OSError:
+        return git_dir
+    return common if common.is_absolute() else (git_dir / common).resolve()
+
+
+def _mtime(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _read_packed_ref(common_dir: Path, ref: str) -> Optional[str]:
+    """Поиск ref в packed-refs"""
+    try:
+        with open(common_dir / 'packed-refs', 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith(('#', '^')):
+                    continue
+                parts = line.split()
+                if len(parts) == 2 and parts[1] == ref:
+                    return parts[0]
+    except OSError:
+        pass
+    return None
+
+
+def _parse_commit_date(body: bytes) -> Optional[str]:
+    """Дата из строки committer (timestamp и смещение часового пояса коммиттера)"""
+    for line in body.split(b'\n'):
+        if not line:
+            break  # Конец заголовков коммита
+        if line.startswith(b'committer '):
+            try:
+                timestamp, offset = line.rsplit(b' ', 2)[1:]
+                sign = -1 if offset.startswith(b'-') else 1
+                minutes = int(offset[1:3]) * 60 + int(offset[3:5])
+                tz = timezone(sign * timedelta(minutes=minutes))
+                return datetime.fromtimestamp(int(timestamp), tz).strftime('%Y-%m-%d')
+            except (ValueError, IndexError, OverflowError):
+                return None
+    return None
+
+
+def _apply_delta(base: bytes, delta: bytes) -> bytes:
+    """Применение git delta (copy/insert инструкции) к базовому объекту"""
+    position = 0
+
+    def read_size() -> int:
+        nonlocal position
+        size = shift = 0
+        while True:
+            byte = delta[position]
+            position += 1
+            size |= (byte & 0x7f) << shift
+            shift += 7
+            if not byte & 0x80:
+                return size
+
+    read_size()  # Размер базового объекта
+    result_size = read_size()
+    result = bytearray()
+    while position < len(delta):
+        opcode = delta[position]
+        position += 1
+        if opcode & 0x80:
+            offset = size = 0
+            for i in range(4):
+                if opcode & (1 << i):
+                    offset |= delta[position] << (8 * i)
+                    position += 1
+            for i in range(3):
+                if opcode & (1 << (4 + i)):
+                    size |= delta[position] << (8 * i)
+                    position += 1
+            result += base[offset:offset + (size or 0x10000)]
+        elif opcode:
+            result += delta[position:position + opcode]
+            position += opcode
+        else:
+            raise GitObjectError("Некорректная delta инструкция")
+    if len(result) != result_size:
+        raise GitObjectError("Размер результата delta не совпадает")
+    return bytes(result)
+
+
+class _PackReader:
+    """Поиск и чтение объектов в pack файлах (index v2)"""
+
+    def __init__(self, objects_dir: Path):
+        self.objects_dir = objects_dir
+        pack_dir = objects_dir / 'pack'
+        try:
+            self.idx_files = sorted(pack_dir / name for name in os.listdir(pack_dir) if name.endswith('.idx'))
+        except OSError:
+            self.idx_files = []
+
+    @staticmethod
+    def _find_offset(idx_path: Path, sha: bytes) -> Optional[int]:
+        """Бинарный поиск sha в .idx: fanout -> диапазон -> смещение в .pack"""
+        with open(idx_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as idx:
+            if idx[:4] != _IDX_MAGIC or struct.unpack('>I', idx[4:8])[0] != 2:
+                raise GitObjectError(f"Неподдерживаемый формат индекса {idx_path.name}")
+            fanout = 8
+            total = struct.unpack('>I', idx[fanout + 255 * 4:fanout + 256 * 4])[0]
+            low = struct.unpack('>I', idx[fanout + (sha[0] - 1) * 4:fanout + sha[0] * 4])[0] if sha[0] else 0
+            high = struct.unpack('>I', idx[fanout + sha[0] * 4:fanout + (sha[0] + 1) * 4])[0]
+            names = fanout + 256 * 4
+            while low < high:
+                middle = (low + high) // 2
+                current = idx[names + middle * 20:names + (middle + 1) * 20]
+                if current < sha:
+                    low = middle + 1
+                elif current > sha:
+                    high = middle
+                else:
+                    offsets = names + total * 20 + total * 4
+                    offset = struct.unpack('>I', idx[offsets + middle * 4:offsets + (middle + 1) * 4])[0]
+                    if offset & 0x80000000:
+                        large = offsets + total * 4 + (offset & 0x7fffffff) * 8
+                        offset = struct.unpack('>Q', idx[large:large + 8])[0]
+                    return offset
+        return None
+
+    def find(self, sha: str) -> Optional[Tuple[Path, int]]:
+        """(pack файл, смещение) объекта"""
+        binary = bytes.fromhex(sha)
+        for idx_path in self.idx_files:
+            offset = self._find_offset(idx_path, binary)
+            if offset is not None:
+                return idx_path.with_suffix('.pack'), offset
+        return None
+
+    def read(self, pack_path: Path, offset: int, depth: int = 0) -> Tuple[int, bytes]:
+        """(тип, содержимое) объекта по смещению; delta объекты восстанавливаются от базы"""
+        if depth > _MAX_DELTA_DEPTH:
+            raise GitObjectError("Слишком длинная цепочка delta")
+        with open(pack_path, 'rb') as f:
+            f.seek(offset)
+            byte = f.read(1)[0]
+            obj_type = (byte >> 4) & 7
+            size = byte & 0x0f
+            shift = 4
+            while byte & 0x80:
+                byte = f.read(1)[0]
+                size |= (byte & 0x7f) << shift
+                shift += 7
+
+            base = None
+            if obj_type == _OBJ_OFS_DELTA:
+                byte = f.read(1)[0]
+                distance = byte & 0x7f
+                while byte & 0x80:
+                    byte = f.read(1)[0]
+                    distance = ((distance + 1) << 7) | (byte & 0x7f)
+                base = self.read(pack_path, offset - distance, depth + 1)
+            elif obj_type == _OBJ_REF_DELTA:
+                base_sha = f.read(20).hex()
+                location = self.find(base_sha)
+                if location is None:
+                    raise GitObjectError(f"База delta {base_sha} не найдена")
+                base = self.read(*location, depth=depth + 1)
+
+            decompressor = zlib.decompressobj()
+            data = b''
+            while len(data) < size and not decompressor.eof:
+                chunk = f.read(max(4096, size))
+                if not chunk:
+                    break
+                data += decompressor.decompress(chunk)
+
+        if base is not None:
+            return base[0], _apply_delta(base[1], data)
+        return obj_type, data
+
+
+class GitInfoReader:
+    """HEAD -> ref -> commit без запуска git; результат кэшируется по mtime HEAD, ref и packed-refs"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # repo -> (ключ из mtime, имя ref, результат)
+        self._cache: Dict[Path, Tuple[tuple, Optional[str], Optional[CommitInfo]]] = {}
+
+    def _resolve_head(self, git_dir: Path, common_dir: Path) -> Tuple[Optional[str], Optional[str]]:
+        """(sha, имя ref) для HEAD; для detached HEAD имя ref - None"""
+        content = (git_dir / 'HEAD').read_text(encoding='utf-8').strip()
+        ref = None
+        for _ in range(_MAX_REF_DEPTH):
+            if not content.startswith('ref:'):
+                return content, ref
+            ref = content[len('ref:'):].strip()
+            # Ref вида refs/bisect, HEAD worktree и т.п. лежат в git_dir, ветки - в общей директории
+            for base in (git_dir, common_dir):
+                try:
+                    content = (base / ref).read_text(encoding='utf-8').strip()
+                    break
+                except OSError:
+                    continue
+            else:
+                return _read_packed_ref(common_dir, ref), ref
+        return None, ref
+
+    def _cache_key(self, git_dir: Path, common_dir: Path, ref: Optional[str]) -> tuple:
+        ref_mtime = None
+        if ref:
+            ref_mtime = _mtime(git_dir / ref) or _mtime(common_dir / ref)
+        return (_mtime(git_dir / 'HEAD'), ref_mtime, _mtime(common_dir / 'packed-refs'))
+
+    @staticmethod
+    def _read_commit_body(common_dir: Path, sha: str) -> bytes:
+        """Содержимое объекта коммита: loose объект или pack"""
+        loose = common_dir / 'objects' / sha[:2] / sha[2:]
+        try:
+            with open(loose, 'rb') as f:
+                raw = zlib.decompress(f.read())
+        except FileNotFoundError:
+            raw = None
+        if raw is not None:
+            header, _, body = raw.partition(b'\0')
+            if not header.startswith(b'commit '):
+                raise GitObjectError(f"Объект {sha} не является коммитом")
+            return body
+
+        packs = _PackReader(common_dir / 'objects')
+        location = packs.find(sha)
+        if location is None:
+            raise GitObjectError(f"Объект {sha} не найден")
+        obj_type, body = packs.read(*location)
+        if obj_type != _OBJ_COMMIT:
+            raise GitObjectError(f"Объект {sha} не является коммитом")
+        return body
+
+    @staticmethod
+    def _read_with_git(repo_path: Path) -> Optional[CommitInfo]:
+        """Запасной вариант через git (alternates, старые форматы индекса)"""
+        try:
+            result = subprocess.run(
+                ['git', 'log', '-1', '--format=%H%x00%cd', '--date=short'],
+                cwd=repo_path,
+                capture_output=True,
+                text=True,
+                timeout=10
+            )
+            if result.returncode == 0 and '\0' in result.stdout:
+                sha, date = result.stdout.strip().split('\0', 1)
+                return CommitInfo(sha, date or None)
+        except Exception as e:
+            logger.debug(f"Не удалось получить коммит через git для {repo_path}: {e}")
+        return None
+
+    def head_commit(self, repo_path: Path) -> Optional[CommitInfo]:
+        """Последний коммит (HEAD) репозитория"""
+        git_dir = find_git_dir(repo_path)
+        if git_dir is None:
+            return None
+        common_dir = _common_dir(git_dir)
+
+        with self._lock:
+            cached = self._cache.get(repo_path)
+            if cached and cached[0] == self._cache_key(git_dir, common_dir, cached[1]):
+                return cached[2]
+
+        try:
+            sha, ref = self._resolve_head(git_dir, common_dir)
+        except OSError as e:
+            logger.debug(f"Не удалось прочитать HEAD {git_dir}: {e}")
+            return None
+        # Ключ снимаем до чтения объекта: изменение во время чтения даст промах в следующий раз
+        key = self._cache_key(git_dir, common_dir, ref)
+
+        if sha is None:
+            info = None  # Пустой репозиторий (ветка без коммитов)
+        else:
+            try:
+                info = CommitInfo(sha, _parse_commit_date(self._read_commit_body(common_dir, sha)))
+            except (GitObjectError, OSError, zlib.error, IndexError, struct.error, ValueError) as e:
+                logger.debug(f"Чтение коммита {sha} из {git_dir} без git не удалось ({e}), используем git")
+                info = self._read_with_git(repo_path)
+
+        with self._lock:
+            self._cache[repo_path] = (key, ref, info)
+        return info
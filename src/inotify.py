@@ -0,0 +1,125 @@
+"""
+Минимальная обертка над inotify (Linux) через ctypes для SaldoranBotSentinel
+"""
+
+import ctypes
+import ctypes.util
+import os
+import struct
+from dataclasses import dataclass
+from typing import List, Optional
+
+# Маски событий (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+_EVENT_HEADER = struct.Struct('iIII')
+_READ_SIZE = 64 * 1024
+
+_libc = None
+
+
+def _get_libc():
+    """Загрузка libc с поддержкой inotify"""
+    global _libc
+    if _libc is None:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        _libc = libc
+    return _libc
+
+
+@dataclass
+class InotifyEvent:
+    """Событие inotify"""
+    wd: int
+    mask: int
+    cookie: int
+    name: str
+
+
+class Inotify:
+    """Неблокирующий дескриптор inotify: события вычитываются по запросу"""
+
+    def __init__(self):
+        libc = _get_libc()
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.fd = fd
+
+    @staticmethod
+    def is_supported() -> bool:
+        """Доступен ли inotify в текущей системе"""
+        try:
+            _get_libc()
+            return True
+        except (OSError, AttributeError):
+            return False
+
+    def fileno(self) -> int:
+        return self.fd
+
+    def add_watch(self, path: str, mask: int) -> int:
+        """Добавление наблюдения за путем, возвращает дескриптор наблюдения"""
+        wd = _get_libc().inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def rm_watch(self, wd: int):
+        """Удаление наблюдения"""
+        _get_libc().inotify_rm_watch(self.fd, wd)
+
+    def read_events(self) -> List[InotifyEvent]:
+        """Вычитывание всех накопившихся событий без блокировки"""
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, _READ_SIZE)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(data):
+                wd, mask, cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                raw_name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                events.append(InotifyEvent(wd, mask, cookie, os.fsdecode(raw_name)))
+        return events
+
+    def close(self):
+        """Закрытие дескриптора"""
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def open_inotify() -> Optional[Inotify]:
+    """Создание Inotify или None, если он недоступен (не Linux, исчерпан лимит)"""
+    if not Inotify.is_supported():
+        return None
+    try:
+        return Inotify()
+    except OSError:
+        return None
@@ -0,0 +1,173 @@
+"""
+Замеры задержки event loop, обработчиков и циклов мониторинга для SaldoranBotSentinel
+"""
+
+import asyncio
+import json
+import math
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from .config import Config
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+METRIC_LOOP_LAG = 'loop_lag'
+
+# Границы корзин гистограммы: BUCKET_BASE_MS * 2^(i / BUCKETS_PER_DOUBLING),
+# погрешность перцентиля не больше ширины корзины (~19%)
+BUCKET_BASE_MS = 0.05
+BUCKETS_PER_DOUBLING = 4
+BUCKET_COUNT = 100  # Верхняя граница ~1700 секунд
+
+# Не чаще одного предупреждения о зависании event loop (сек)
+LOOP_LAG_WARN_INTERVAL = 60
+
+
+@dataclass
+class LatencySummary:
+    """Перцентили одной метрики (мс)"""
+    count: int
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+
+class LatencyHistogram:
+    """Гистограмма длительностей с логарифмическими корзинами (фиксированный объем памяти)"""
+
+    def __init__(self):
+        self.buckets: List[int] = [0] * BUCKET_COUNT
+        self.count = 0
+        self.max_ms = 0.0
+
+    def record(self, seconds: float):
+        ms = max(0.0, seconds * 1000)
+        if ms <= BUCKET_BASE_MS:
+            index = 0
+        else:
+            index = min(BUCKET_COUNT - 1, math.ceil(math.log2(ms / BUCKET_BASE_MS) * BUCKETS_PER_DOUBLING))
+        self.buckets[index] += 1
+        self.count += 1
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, pct: float) -> float:
+        """Верхняя граница корзины, в которую попадает перцентиль (мс)"""
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(pct / 100 * self.count))
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= target:
+                return min(self.max_ms, BUCKET_BASE_MS * 2 ** (index / BUCKETS_PER_DOUBLING))
+        return self.max_ms
+
+    def summary(self) -> LatencySummary:
+        return LatencySummary(
+            self.count, self.percentile(50), self.percentile(95), self.percentile(99), self.max_ms
+        )
+
+
+class Instrumentation:
+    """Гистограммы задержек по именам метрик и проба зависаний event loop.
+
+    Метрики: loop_lag - опоздание таймера пробы, cmd/<команда> и cb/<кнопка> -
+    обработчики Telegram, tick/<цикл> - проходы циклов мониторинга.
+    Для /debug хранятся гистограммы с момента запуска, в лог раз в
+    METRICS_LOG_INTERVAL пишется строка JSON с перцентилями за интервал.
+    Методы вызываются из потока event loop.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._total: Dict[str, LatencyHistogram] = {}
+        self._interval: Dict[str, LatencyHistogram] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._last_lag_warning = 0.0
+
+    def observe(self, name: str, seconds: float):
+        """Учет одного замера"""
+        for histograms in (self._total, self._interval):
+            histogram = histograms.get(name)
+            if histogram is None:
+                histogram = histograms[name] = LatencyHistogram()
+            histogram.record(seconds)
+
+    @contextmanager
+    def measure(self, name: str):
+        """Замер длительности блока (в том числе с await внутри)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def summary(self, prefix: Optional[str] = None) -> Dict[str, LatencySummary]:
+        """Перцентили с момента запуска (только метрики с префиксом prefix, если задан)"""
+        return {
+            name: histogram.summary() for name, histogram in sorted(self._total.items())
+            if prefix is None or name.startswith(prefix)
+        }
+
+    async def start(self):
+        """Запуск пробы event loop и периодической записи метрик в лог"""
+        if not self._tasks:
+            logger.info(f"Запуск замеров event loop с интервалом {Config.LOOP_LAG_INTERVAL} секунд")
+            self._tasks = [
+                asyncio.create_task(self._lag_probe()),
+                asyncio.create_task(self._report_loop()),
+            ]
+
+    async def _lag_probe(self):
+        """Таймер с известным интервалом: опоздание пробуждения - время, когда loop был занят"""
+        loop = asyncio.get_running_loop()
+        interval = Config.LOOP_LAG_INTERVAL
+        while True:
+            try:
+                expected = loop.time() + interval
+                await asyncio.sleep(interval)
+                lag = max(0.0, loop.time() - expected)
+                self.observe(METRIC_LOOP_LAG, lag)
+                now = time.monotonic()
+                if lag >= Config.LOOP_LAG_WARN and now - self._last_lag_warning >= LOOP_LAG_WARN_INTERVAL:
+                    self._last_lag_warning = now
+                    logger.warning(f"Event loop был заблокирован {lag * 1000:.0f}ms")
+            except asyncio.CancelledError:
+                break
+
+    async def _report_loop(self):
+        """Строка с перцентилями за интервал для разбора логов"""
+        while True:
+            try:
+                await asyncio.sleep(Config.METRICS_LOG_INTERVAL)
+                self.log_interval()
+            except asyncio.CancelledError:
+                break
+
+    def log_interval(self):
+        """Запись перцентилей за прошедший интервал в лог и сброс интервальных гистограмм"""
+        interval, self._interval = self._interval, {}
+        if not interval:
+            return
+        metrics = {}
+        for name, histogram in sorted(interval.items()):
+            summary = histogram.summary()
+            metrics[name] = {
+                'n': summary.count, 'p50': round(summary.p50, 2), 'p95': round(summary.p95, 2),
+                'p99': round(summary.p99, 2), 'max': round(summary.max, 2),
+            }
+        logger.info(f"metrics {json.dumps(metrics, ensure_ascii=False, separators=(',', ':'))}")
+
+    async def stop(self):
+        """Остановка пробы и запись последнего интервала"""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if tasks:
+            self.log_interval()
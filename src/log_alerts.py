@@ -0,0 +1,212 @@
+"""
+Уведомления о шаблонах ошибок в логах ботов для SaldoranBotSentinel
+"""
+
+import asyncio
+import html
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .bot_log_tail import BotLogTail
+from .config import Config
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# Обрезка строки лога в уведомлении
+ALERT_LINE_MAX = 500
+
+
+@dataclass
+class _AlertState:
+    """Серия совпадений одного шаблона бота в пределах окна"""
+    sent_at: float
+    suppressed: int = 0
+    last_line: str = ''
+    file_name: str = ''
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+# Флаги выражений шаблонов
+PATTERN_FLAGS = re.IGNORECASE | re.MULTILINE
+
+# Ссылки на группы по номеру (\1, (?(1)...)) - в объединенном выражении номера сдвигаются
+NUMBERED_GROUP_REF = re.compile(r'\\[1-9]|\(\?\(\d')
+
+
+@dataclass
+class _BotPatterns:
+    """Шаблоны бота: объединенное выражение (группа p<i> - i-й шаблон) и не вошедшие в него"""
+    patterns: List[str]
+    regex: Optional[re.Pattern]
+    separate: List[Tuple[int, re.Pattern]] = field(default_factory=list)
+
+
+def parse_patterns(raw: str) -> List[str]:
+    """Разбор LOG_ALERT_PATTERNS вида "Traceback;rate limited" """
+    return [pattern.strip() for pattern in raw.split(';') if pattern.strip()]
+
+
+def parse_pattern_overrides(raw: str) -> Dict[str, List[str]]:
+    """Разбор LOG_ALERT_PATTERN_OVERRIDES вида "bot1:Timeout;bot1:HTTP 5\\d\\d;bot2:disconnected" """
+    overrides: Dict[str, List[str]] = {}
+    for item in parse_patterns(raw):
+        bot_name, _, pattern = item.partition(':')
+        if not pattern.strip():
+            logger.warning(f"Шаблон логов без имени бота: '{item}'")
+            continue
+        overrides.setdefault(bot_name.strip(), []).append(pattern.strip())
+    return overrides
+
+
+def combine_patterns(patterns: List[str]) -> _BotPatterns:
+    """Одно выражение без учета регистра на все шаблоны.
+
+    Некорректный шаблон ищется как обычная строка. Шаблон, корректный сам по себе,
+    но ломающий объединение (флаги вида (?i), обратные ссылки, группы p<i>),
+    проверяется отдельным выражением - остальные шаблоны при этом работают.
+    """
+    parts: List[str] = []
+    regex: Optional[re.Pattern] = None
+    separate: List[Tuple[int, re.Pattern]] = []
+    for index, pattern in enumerate(patterns):
+        try:
+            alone = re.compile(pattern, PATTERN_FLAGS)
+        except re.error as e:
+            logger.warning(f"Некорректный шаблон логов '{pattern}' ({e}) - ищется как строка")
+            alone = re.compile(re.escape(pattern), PATTERN_FLAGS)
+        part = f"(?P<p{index}>{alone.pattern})"
+        try:
+            if NUMBERED_GROUP_REF.search(alone.pattern):
+                raise re.error("ссылка на группу по номеру")
+            regex = re.compile("|".join(parts + [part]), PATTERN_FLAGS)
+        except re.error as e:
+            logger.debug(f"Шаблон логов '{pattern}' не объединяется с остальными ({e}) - проверяется отдельно")
+            separate.append((index, alone))
+            continue
+        parts.append(part)
+    return _BotPatterns(patterns, regex, separate)
+
+
+def _matched_lines(regex: re.Pattern, text: str) -> Iterator[Tuple[int, int, re.Match]]:
+    """Строки порции с совпадением: (начало, конец, совпадение), каждая строка один раз"""
+    position = 0
+    while True:
+        match = regex.search(text, position)
+        if match is None:
+            return
+        line_start = text.rfind("\n", 0, match.start()) + 1
+        line_end = text.find("\n", match.end())
+        line_end = len(text) if line_end < 0 else line_end
+        yield line_start, line_end, match
+        position = line_end + 1
+
+
+class LogPatternWatcher:
+    """Уведомления о строках логов ботов, совпавших с шаблонами ошибок.
+
+    Подписан на новые строки BotLogTail - просматривается только дописанное.
+    Общие шаблоны LOG_ALERT_PATTERNS и шаблоны бота из LOG_ALERT_PATTERN_OVERRIDES
+    объединяются в одно выражение на бота, порция строк проверяется одним проходом.
+    Первое совпадение шаблона отправляется сразу, повторы в течение
+    LOG_ALERT_WINDOW секунд сворачиваются в одно сводное уведомление.
+    """
+
+    def __init__(self, log_tail: BotLogTail, telegram_bot=None):
+        self.telegram_bot = telegram_bot
+        self._bots: Dict[str, _BotPatterns] = {}
+        self._config_key: Tuple[str, str] = ('', '')
+        self._alerts: Dict[Tuple[str, str], _AlertState] = {}
+        log_tail.add_listener(self.on_lines)
+
+    def _patterns_for(self, bot_name: str) -> _BotPatterns:
+        """Выражение бота (пересобирается при изменении настроек)"""
+        config_key = (Config.LOG_ALERT_PATTERNS, Config.LOG_ALERT_PATTERN_OVERRIDES)
+        if config_key != self._config_key:
+            self._config_key = config_key
+            self._bots.clear()
+        compiled = self._bots.get(bot_name)
+        if compiled is None:
+            patterns = parse_patterns(Config.LOG_ALERT_PATTERNS)
+            patterns += parse_pattern_overrides(Config.LOG_ALERT_PATTERN_OVERRIDES).get(bot_name, [])
+            compiled = self._bots[bot_name] = combine_patterns(patterns)
+        return compiled
+
+    def on_lines(self, bot_name: str, file_name: str, lines: List[str]):
+        """Новые строки лога бота (вызывается BotLogTail в потоке event loop)"""
+        if not Config.LOG_ALERT_ENABLED or not self.telegram_bot:
+            return
+        compiled = self._patterns_for(bot_name)
+
+        # Вся порция - одним проходом выражения; строка учитывается один раз
+        text = "\n".join(lines)
+        matched = set()
+        if compiled.regex is not None:
+            for line_start, line_end, match in _matched_lines(compiled.regex, text):
+                index = next(int(name[1:]) for name, value in match.groupdict().items()
+                             if value is not None and name.startswith('p') and name[1:].isdigit())
+                matched.add(line_start)
+                self._on_match(bot_name, file_name, compiled.patterns[index], text[line_start:line_end])
+        for index, regex in compiled.separate:
+            for line_start, line_end, _ in _matched_lines(regex, text):
+                if line_start not in matched:
+                    matched.add(line_start)
+                    self._on_match(bot_name, file_name, compiled.patterns[index], text[line_start:line_end])
+
+    def _on_match(self, bot_name: str, file_name: str, pattern: str, line: str):
+        """Первое совпадение в окне - уведомление, повторы - в счетчик"""
+        key = (bot_name, pattern)
+        now = time.monotonic()
+        state = self._alerts.get(key)
+        if state is None or now - state.sent_at >= Config.LOG_ALERT_WINDOW:
+            if state and state.timer:
+                state.timer.cancel()
+            self._alerts[key] = _AlertState(now)
+            self._send(
+                f"⚠️ <b>Ошибка в логах бота</b>\n\n"
+                f"🤖 Бот: <code>{html.escape(bot_name)}</code>\n"
+                f"🔎 Шаблон: <code>{html.escape(pattern)}</code>\n"
+                f"📄 Файл: {html.escape(file_name)}\n\n"
+                f"<pre>{html.escape(line[:ALERT_LINE_MAX])}</pre>"
+            )
+            return
+
+        state.suppressed += 1
+        state.last_line = line
+        state.file_name = file_name
+        if state.timer is None:
+            # Сводка по повторам - по окончании окна
+            delay = max(0.0, state.sent_at + Config.LOG_ALERT_WINDOW - now)
+            state.timer = asyncio.get_running_loop().call_later(delay, self._send_summary, key)
+
+    def _send_summary(self, key: Tuple[str, str]):
+        state = self._alerts.pop(key, None)
+        if not state or not state.suppressed:
+            return
+        bot_name, pattern = key
+        self._send(
+            f"⚠️ <b>Повторы ошибки в логах бота</b>\n\n"
+            f"🤖 Бот: <code>{html.escape(bot_name)}</code>\n"
+            f"🔎 Шаблон: <code>{html.escape(pattern)}</code>\n"
+            f"🔁 Повторов за {Config.LOG_ALERT_WINDOW:.0f}с: {state.suppressed}\n"
+            f"📄 Последнее ({html.escape(state.file_name)}):\n\n"
+            f"<pre>{html.escape(state.last_line[:ALERT_LINE_MAX])}</pre>"
+        )
+
+    def _send(self, message: str):
+        task = asyncio.get_running_loop().create_task(self.telegram_bot.send_notification(message))
+        task.add_done_callback(self._on_sent)
+
+    @staticmethod
+    def _on_sent(task: asyncio.Task):
+        if not task.cancelled() and task.exception():
+            logger.error(f"Ошибка отправки уведомления о шаблоне в логах: {task.exception()}")
+
+    def close(self):
+        """Отмена отложенных сводок"""
+        for state in self._alerts.values():
+            if state.timer:
+                state.timer.cancel()
+        self._alerts.clear()
@@ -0,0 +1,264 @@
+"""
+Чтение логов сервиса (хвост с конца файла, поиск по архивам) для SaldoranBotSentinel
+"""
+
+import mmap
+import os
+import re
+from collections import deque
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .log_retention import (
+    ARCHIVE_SUFFIXES, TIMESTAMP_FORMAT, ArchiveInfo, list_log_files, open_log_binary, read_index,
+)
+
+# Блок обратного чтения
+TAIL_BLOCK = 64 * 1024
+# С этого размера хвост ищется через mmap (без копирования блоков в память процесса)
+MMAP_MIN_SIZE = 1024 * 1024
+# Поиск идет по кускам из целых строк: одно декодирование и один проход regex на кусок
+GREP_CHUNK = 1024 * 1024
+
+REGEX_SPECIAL = set('.^$*+?{}[]\\|()')
+
+DATE_FORMATS = ('%d.%m.%Y', '%d%m%Y', '%Y-%m-%d', '%d.%m.%y')
+
+# Окно поиска: 6h, 2d (или 6ч, 2д)
+_WINDOW_RE = re.compile(r'^(\d+)([hdчд])$', re.IGNORECASE)
+_WINDOW_UNITS = {'h': 'hours', 'ч': 'hours', 'd': 'days', 'д': 'days'}
+
+
+@dataclass
+class GrepResult:
+    """Найденные строки (старые первыми) и объем проделанной работы"""
+    lines: List[str]
+    files_scanned: int
+    truncated: bool  # Совпадений больше, чем limit
+
+
+def _decode(line: bytes) -> str:
+    return line.decode('utf-8', errors='replace')
+
+
+def _tail_blocks(f, size: int, count: int) -> List[bytes]:
+    """Чтение блоками с конца до count+1 переводов строки"""
+    chunks = []
+    newlines = 0
+    position = size
+    while position > 0 and newlines <= count:
+        read_size = min(TAIL_BLOCK, position)
+        position -= read_size
+        f.seek(position)
+        chunk = f.read(read_size)
+        newlines += chunk.count(b'\n')
+        chunks.append(chunk)
+    data = b''.join(reversed(chunks))
+    return data.splitlines(keepends=True)[-count:]
+
+
+def _tail_mmap(f, size: int, count: int) -> List[bytes]:
+    """Поиск count+1 переводов строки с конца по отображению файла"""
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        end = size
+        # Последняя строка без \n (запись еще идет) тоже считается
+        if mapped[size - 1:size] == b'\n':
+            end -= 1
+        start = end
+        for _ in range(count):
+            start = mapped.rfind(b'\n', 0, start)
+            if start < 0:
+                break
+        return mapped[start + 1:size].splitlines(keepends=True)
+
+
+def tail_lines(path: Path, count: int) -> List[str]:
+    """Последние count строк файла лога без чтения файла целиком"""
+    if count <= 0:
+        return []
+    if path.suffix in ARCHIVE_SUFFIXES:
+        # Сжатый поток нельзя читать с конца - проходим его, храня только count строк
+        with open_log_binary(path) as f:
+            return [_decode(line) for line in deque(f, maxlen=count)]
+
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return []
+        if size >= MMAP_MIN_SIZE:
+            lines = _tail_mmap(f, size, count)
+        else:
+            lines = _tail_blocks(f, size, count)
+    return [_decode(line) for line in lines]
+
+
+def parse_day(text: str) -> Optional[date]:
+    """Дата из аргумента команды (16.10.2026, 16102026, 2026-10-16)"""
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_window(text: str) -> Optional[timedelta]:
+    """Окно поиска из аргумента команды (6h - последние 6 часов, 2d - последние 2 дня)"""
+    match = _WINDOW_RE.match(text)
+    if not match or int(match.group(1)) == 0:
+        return None
+    return timedelta(**{_WINDOW_UNITS[match.group(2).lower()]: int(match.group(1))})
+
+
+def find_log_file(day: date, logs_dir: Optional[Path] = None) -> Optional[Path]:
+    """Файл лога за день: текущий, если еще не сжат, иначе архив"""
+    candidates = [path for file_day, path in list_log_files(logs_dir) if file_day == day]
+    # Несжатый файл сортируется раньше архивов того же дня
+    return candidates[0] if candidates else None
+
+
+def compile_pattern(pattern: str) -> re.Pattern:
+    """Регулярное выражение без учета регистра; некорректное - как обычная строка"""
+    # MULTILINE - ^ и $ относятся к строке лога, а не к куску
+    flags = re.IGNORECASE | re.MULTILINE
+    try:
+        return re.compile(pattern, flags)
+    except re.error:
+        return re.compile(re.escape(pattern), flags)
+
+
+def _iter_chunks(f) -> Iterator[bytes]:
+    """Куски файла, заканчивающиеся на границе строки"""
+    rest = b''
+    while True:
+        chunk = f.read(GREP_CHUNK)
+        if not chunk:
+            if rest:
+                yield rest
+            return
+        data = rest + chunk
+        cut = data.rfind(b'\n') + 1
+        if cut == 0:
+            rest = data
+            continue
+        rest = data[cut:]
+        yield data[:cut]
+
+
+def _line_bounds(text, start: int, end: int, newline) -> Tuple[int, int]:
+    """Границы строки, в которой найдено совпадение [start, end)"""
+    line_start = text.rfind(newline, 0, start) + 1
+    line_end = text.find(newline, end)
+    return line_start, len(text) if line_end < 0 else line_end + 1
+
+
+def _line_finder(pattern: str) -> Callable[[bytes], Iterator[str]]:
+    """Поиск строк куска, содержащих шаблон.
+
+    ASCII шаблон без спецсимволов regex (ERROR, Traceback, имя бота) ищется через
+    bytes.find по куску в нижнем регистре без декодирования: IGNORECASE отключает
+    быстрый поиск подстроки в re. Остальные шаблоны - regex по декодированному куску.
+    """
+    if pattern.isascii() and not REGEX_SPECIAL & set(pattern):
+        needle = pattern.lower().encode()
+
+        def find_literal(chunk: bytes) -> Iterator[str]:
+            # lower() меняет только ASCII байты - смещения совпадают с исходным куском
+            haystack = chunk.lower()
+            position = haystack.find(needle)
+            while position >= 0:
+                line_start, line_end = _line_bounds(chunk, position, position + len(needle), b'\n')
+                yield _decode(chunk[line_start:line_end])
+                position = haystack.find(needle, line_end)
+        return find_literal
+
+    regex = compile_pattern(pattern)
+
+    def find_regex(chunk: bytes) -> Iterator[str]:
+        text = _decode(chunk)
+        position = 0
+        while True:
+            match = regex.search(text, position)
+            if match is None:
+                return
+            line_start, line_end = _line_bounds(text, match.start(), match.end(), '\n')
+            yield text[line_start:line_end]
+            # Следующий поиск - со следующей строки (строка учитывается один раз)
+            position = max(line_end, match.end() + 1)
+    return find_regex
+
+
+def _line_time(line: str) -> Optional[datetime]:
+    """Время записи в начале строки лога (None для продолжения записи, например traceback)"""
+    try:
+        return datetime.strptime(line[:19], TIMESTAMP_FORMAT)
+    except ValueError:
+        return None
+
+
+def _file_range(day: date, path: Path, index: Dict[str, ArchiveInfo]) -> Tuple[datetime, datetime]:
+    """Интервал времени файла: из индекса архивов, для текущих файлов - весь день из имени"""
+    info = index.get(path.name)
+    if info and info.first and info.last:
+        try:
+            return datetime.strptime(info.first, TIMESTAMP_FORMAT), datetime.strptime(info.last, TIMESTAMP_FORMAT)
+        except ValueError:
+            pass
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+
+def _grep_file(path: Path, find: Callable[[bytes], Iterator[str]], matches: deque,
+               since: Optional[datetime] = None) -> int:
+    """Совпавшие строки файла в matches (хранятся последние); возвращает число совпадений"""
+    matched = 0
+    with open_log_binary(path) as f:
+        for chunk in _iter_chunks(f):
+            for line in find(chunk):
+                if since is not None:
+                    written_at = _line_time(line)
+                    if written_at is not None and written_at < since:
+                        continue
+                matches.append(line)
+                matched += 1
+    return matched
+
+
+def grep_logs(pattern: str, limit: int, logs_dir: Optional[Path] = None,
+              since: Optional[datetime] = None) -> GrepResult:
+    """Последние limit совпадений по текущему логу и архивам (с since - только записи не раньше since).
+
+    Файлы просматриваются от новых к старым потоково; когда совпадений набралось
+    limit, более старые архивы не открываются. С since архивы, целиком лежащие
+    раньше since по индексу log_index.json, тоже не открываются.
+    """
+    find = _line_finder(pattern)
+    index = read_index(logs_dir) if since is not None else {}
+    found: List[List[str]] = []  # По файлам, от новых к старым
+    total = 0
+    scanned = 0
+    truncated = False
+    for day, path in reversed(list_log_files(logs_dir)):
+        file_since = None
+        if since is not None:
+            start, end = _file_range(day, path, index)
+            if end < since:
+                break  # Остальные файлы еще старше
+            # Строки проверяются по времени только в файле, который начинается раньше since
+            file_since = since if start < since else None
+        matches: deque = deque(maxlen=limit)
+        try:
+            matched = _grep_file(path, find, matches, file_since)
+        except (OSError, EOFError, RuntimeError):
+            continue
+        scanned += 1
+        found.append(list(matches))
+        total += matched
+        if total >= limit:
+            truncated = total > limit
+            break
+
+    lines = [line for matches in reversed(found) for line in matches]
+    return GrepResult(lines[-limit:], scanned, truncated)
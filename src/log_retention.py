@@ -0,0 +1,328 @@
+"""
+Сжатие и хранение старых логов sentinel_ДДММГГГГ.log для SaldoranBotSentinel
+"""
+
+import gzip
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import date
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # zstd необязателен - без него архивы сжимаются gzip
+    zstandard = None
+
+from .config import Config
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+INDEX_FILE = 'log_index.json'
+ARCHIVE_SUFFIXES = ('.gz', '.zst')
+# Формат времени в индексе (совпадает с началом строки лога)
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# sentinel_16102026.log, sentinel_16102026.log.gz, sentinel_16102026.log.zst
+_LOG_NAME_RE = re.compile(r'^sentinel_(\d{2})(\d{2})(\d{4})\.log(\.gz|\.zst)?$')
+# Время в начале строки лога (формат LOG_DATE_FORMAT)
+_TIMESTAMP_RE = re.compile(rb'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})')
+
+COPY_CHUNK = 1024 * 1024
+# Сколько байт с конца файла читать в поисках последней записи
+TAIL_PROBE = 64 * 1024
+# Вчерашний файл сжимается, только если в него не писали столько секунд
+# (писатель логов переключается на новый файл с первой записью после полуночи)
+SETTLE_SECONDS = 600
+# Приоритет фонового потока (nice), чтобы сжатие не мешало ботам
+WORKER_NICE = 19
+
+
+@dataclass
+class ArchiveInfo:
+    """Запись индекса: какой интервал времени покрывает файл лога"""
+    first: Optional[str]  # Время первой записи (TIMESTAMP_FORMAT)
+    last: Optional[str]   # Время последней записи
+    size: int             # Размер на диске
+    original_size: int    # Размер до сжатия
+
+
+def parse_log_date(name: str) -> Optional[date]:
+    """Дата из имени файла лога (текущего или архива)"""
+    match = _LOG_NAME_RE.match(name)
+    if not match:
+        return None
+    day, month, year, _ = match.groups()
+    try:
+        return date(int(year), int(month), int(day))
+    except ValueError:
+        return None
+
+
+def list_log_files(logs_dir: Optional[Path] = None) -> List[Tuple[date, Path]]:
+    """Все файлы логов (текущие и архивы) по возрастанию даты"""
+    logs_dir = logs_dir or Config.LOGS_DIR
+    files = []
+    try:
+        entries = list(os.scandir(logs_dir))
+    except OSError:
+        return []
+    for entry in entries:
+        day = parse_log_date(entry.name)
+        if day and entry.is_file():
+            files.append((day, Path(entry.path)))
+    return sorted(files)
+
+
+def read_index(logs_dir: Optional[Path] = None) -> Dict[str, ArchiveInfo]:
+    """Индекс архивов: имя файла -> интервал времени (пустой, если индекса нет или он поврежден)"""
+    index_path = (logs_dir or Config.LOGS_DIR) / INDEX_FILE
+    try:
+        raw = json.loads(index_path.read_text(encoding='utf-8'))
+        return {name: ArchiveInfo(**info) for name, info in raw.items()}
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError, TypeError) as e:
+        logger.warning(f"Индекс архивов логов поврежден ({e}), будет построен заново")
+        return {}
+
+
+def open_log_binary(path: Path) -> BinaryIO:
+    """Файл лога для последовательного чтения (архивы распаковываются на лету)"""
+    if path.suffix == '.gz':
+        return gzip.open(path, 'rb')
+    if path.suffix == '.zst':
+        if zstandard is None:
+            raise RuntimeError(f"Для чтения {path.name} нужен пакет zstandard")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    return open(path, 'rb')
+
+
+def _first_timestamp(path: Path) -> Optional[str]:
+    with open(path, 'rb') as f:
+        for line in f:
+            match = _TIMESTAMP_RE.match(line)
+            if match:
+                return match.group(1).decode()
+    return None
+
+
+def _last_timestamp(path: Path) -> Optional[str]:
+    """Время последней записи по хвосту файла (без чтения всего файла)"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - TAIL_PROBE))
+        tail = f.read()
+    for line in reversed(tail.splitlines()):
+        match = _TIMESTAMP_RE.match(line)
+        if match:
+            return match.group(1).decode()
+    return None
+
+
+class LogRetention:
+    """Фоновое сжатие вчерашних логов и удаление старых.
+
+    Раз в LOG_RETENTION_INTERVAL поток с пониженным приоритетом сжимает
+    sentinel_ДДММГГГГ.log за прошедшие дни (gzip или zstd), удаляет архивы
+    старше LOG_MAX_AGE_DAYS и самые старые сверх LOG_MAX_TOTAL_MB.
+    В log_index.json хранится интервал времени каждого архива: поиск по логам
+    за последние часы или дни (grep_logs с since) не открывает более старые архивы.
+    """
+
+    def __init__(self, logs_dir: Optional[Path] = None):
+        self.logs_dir = logs_dir or Config.LOGS_DIR
+        self.index_path = self.logs_dir / INDEX_FILE
+        self._lock = threading.Lock()
+        self._index: Dict[str, ArchiveInfo] = read_index(self.logs_dir)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _save_index(self):
+        with self._lock:
+            data = {name: asdict(info) for name, info in sorted(self._index.items())}
+        tmp_path = self.index_path.with_suffix('.tmp')
+        try:
+            tmp_path.write_text(json.dumps(data, ensure_ascii=False, indent=1), encoding='utf-8')
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить индекс архивов логов: {e}")
+
+    def index(self) -> Dict[str, ArchiveInfo]:
+        """Копия индекса: имя файла -> интервал времени"""
+        with self._lock:
+            return dict(self._index)
+
+    @staticmethod
+    def _compression() -> str:
+        if Config.LOG_COMPRESSION == 'zstd':
+            if zstandard is not None:
+                return 'zstd'
+            logger.warning("LOG_COMPRESSION=zstd, но пакет zstandard не установлен - используется gzip")
+        return 'gzip'
+
+    def compress(self, path: Path) -> Optional[Path]:
+        """Сжатие одного файла рядом с исходным (через временный файл) и удаление исходного"""
+        method = self._compression()
+        target = path.with_name(path.name + ('.zst' if method == 'zstd' else '.gz'))
+        tmp_target = target.with_name(target.name + '.tmp')
+        try:
+            stat = path.stat()
+            info = ArchiveInfo(_first_timestamp(path), _last_timestamp(path), 0, stat.st_size)
+            with open(path, 'rb') as src, open(tmp_target, 'wb') as raw:
+                if method == 'zstd':
+                    with zstandard.ZstdCompressor(level=10).stream_writer(raw, closefd=False) as dst:
+                        shutil.copyfileobj(src, dst, COPY_CHUNK)
+                else:
+                    # mtime=0 - одинаковый результат для одинакового содержимого
+                    with gzip.GzipFile(filename=path.name, mode='wb', fileobj=raw, compresslevel=6, mtime=0) as dst:
+                        shutil.copyfileobj(src, dst, COPY_CHUNK)
+                raw.flush()
+                os.fsync(raw.fileno())
+                if hasattr(os, 'posix_fadvise'):
+                    # Архив читается редко - не держим его в page cache
+                    os.posix_fadvise(raw.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+            os.utime(tmp_target, (stat.st_atime, stat.st_mtime))
+            os.replace(tmp_target, target)
+            path.unlink()
+        except OSError as e:
+            logger.error(f"Ошибка сжатия лога {path.name}: {e}")
+            tmp_target.unlink(missing_ok=True)
+            return None
+
+        info.size = target.stat().st_size
+        with self._lock:
+            self._index.pop(path.name, None)
+            self._index[target.name] = info
+        ratio = info.original_size / info.size if info.size else 0
+        logger.info(f"Лог {path.name} сжат ({method}): {info.original_size / 1024 / 1024:.1f}MB -> "
+                    f"{info.size / 1024 / 1024:.1f}MB (x{ratio:.1f})")
+        return target
+
+    def _remove(self, path: Path, reason: str):
+        try:
+            path.unlink()
+            logger.info(f"Удален лог {path.name}: {reason}")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Не удалось удалить лог {path.name}: {e}")
+        with self._lock:
+            self._index.pop(path.name, None)
+
+    def run_once(self):
+        """Один проход: сжатие, срок хранения, лимит объема, сверка индекса"""
+        today = date.today()
+        now = time.time()
+
+        # Недописанные архивы прерванного прохода
+        for tmp_path in self.logs_dir.glob('sentinel_*.log.*.tmp'):
+            tmp_path.unlink(missing_ok=True)
+
+        max_age = Config.LOG_MAX_AGE_DAYS
+        for day, path in list_log_files(self.logs_dir):
+            if self._stop.is_set():
+                return
+            if max_age > 0 and (today - day).days > max_age:
+                continue  # Будет удален ниже - сжимать незачем
+            if path.suffix == '.log' and day < today:
+                try:
+                    settled = now - path.stat().st_mtime >= SETTLE_SECONDS
+                except OSError:
+                    continue
+                if settled:
+                    self.compress(path)
+
+        files = list_log_files(self.logs_dir)
+        if max_age > 0:
+            for day, path in files:
+                if day < today and (today - day).days > max_age:
+                    self._remove(path, f"старше {max_age} дней")
+            files = list_log_files(self.logs_dir)
+
+        max_total = Config.LOG_MAX_TOTAL_MB * 1024 * 1024
+        if max_total > 0:
+            sizes = []
+            for day, path in files:
+                try:
+                    sizes.append((day, path, path.stat().st_size))
+                except OSError:
+                    pass
+            total = sum(size for _, _, size in sizes)
+            # Самые старые первыми; сегодняшний файл не трогаем
+            for day, path, size in sizes:
+                if total <= max_total or day >= today:
+                    break
+                self._remove(path, f"логи превышают {Config.LOG_MAX_TOTAL_MB}MB")
+                total -= size
+
+        self._reconcile(list_log_files(self.logs_dir))
+        self._save_index()
+
+    def _reconcile(self, files: List[Tuple[date, Path]]):
+        """Индекс только для существующих архивов; архивы без записи (старые версии) добавляются"""
+        archives = {path.name: path for _, path in files if path.suffix in ARCHIVE_SUFFIXES}
+        with self._lock:
+            for name in set(self._index) - set(archives):
+                del self._index[name]
+            missing = [path for name, path in archives.items() if name not in self._index]
+        for path in missing:
+            if self._stop.is_set():
+                return
+            info = self._scan_archive(path)
+            if info:
+                with self._lock:
+                    self._index[path.name] = info
+
+    @staticmethod
+    def _scan_archive(path: Path) -> Optional[ArchiveInfo]:
+        """Интервал времени архива потоковым чтением (один раз для архивов без индекса)"""
+        first = last = None
+        original_size = 0
+        try:
+            with open_log_binary(path) as f:
+                for line in f:
+                    original_size += len(line)
+                    match = _TIMESTAMP_RE.match(line)
+                    if match:
+                        last = match.group(1).decode()
+                        first = first or last
+            return ArchiveInfo(first, last, path.stat().st_size, original_size)
+        except (OSError, EOFError, RuntimeError) as e:
+            logger.warning(f"Не удалось прочитать архив лога {path.name}: {e}")
+            return None
+
+    def start(self):
+        """Запуск фонового потока"""
+        if self._thread is None:
+            logger.info(f"Запуск обслуживания логов: хранение {Config.LOG_MAX_AGE_DAYS} дней, "
+                        f"не более {Config.LOG_MAX_TOTAL_MB}MB")
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='sentinel-log-retention', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        try:
+            # Пониженный приоритет только для этого потока (в Linux nice - свойство потока)
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), WORKER_NICE)
+        except (AttributeError, OSError):
+            pass
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Ошибка обслуживания логов: {e}")
+            self._stop.wait(Config.LOG_RETENTION_INTERVAL)
+
+    def stop(self, timeout: float = 5.0):
+        """Остановка потока (прерванное сжатие повторится при следующем запуске)"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout)
+            self._thread = None
@@ -2,122 +2,221 @@
 Система логирования с ротацией по дням для SaldoranBotSentinel
 """
 
+import atexit
 import logging
-import os
-from datetime import datetime
+import queue
+import sys
+import threading
+from datetime import datetime, timedelta
+from logging.handlers import QueueHandler
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, TextIO
 
 from .config import Config
 
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Сколько записей писатель берет из очереди за один проход (потом flush)
+WRITE_BATCH = 256
+# Сколько ждать досылки очереди при остановке (сек)
+SHUTDOWN_TIMEOUT = 5.0
+
+_STOP = object()
+
+
+def log_filename(day: datetime) -> Path:
+    """Файл лога за указанный день"""
+    return Config.LOGS_DIR / f"sentinel_{day.strftime('%d%m%Y')}.log"
+
+
+class _RecordQueueHandler(QueueHandler):
+    """Обработчик на стороне вызывающего: только кладет запись в очередь"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Сообщения в проекте - готовые f-строки, форматирование целиком делает писатель
+        return record
+
+    def emit(self, record: logging.LogRecord):
+        if _pipeline.closed:
+            # Писатель уже остановлен (завершение процесса) - пишем сразу
+            _pipeline.write([record])
+        else:
+            self.enqueue(record)
+
+
+class _LogWriter:
+    """Единственный писатель: форматирование, ротация в полночь и пакетный flush.
+
+    Вызывающие потоки (event loop, пул потоков) только кладут записи в очередь;
+    файл и консоль пишет фоновый поток.
+    """
+
+    def __init__(self):
+        self.queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.formatter = logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT)
+        self.closed = False
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._file: Optional[TextIO] = None
+        self._rollover_at = 0.0  # time.time() ближайшей полуночи для текущего файла
+
+    def start(self):
+        if self._thread is None:
+            Config.LOGS_DIR.mkdir(exist_ok=True)
+            self._thread = threading.Thread(target=self._run, name='sentinel-log', daemon=True)
+            self._thread.start()
+
+    def _open_for(self, created: float):
+        """Файл дня, к которому относится запись; граница следующей ротации - полночь"""
+        if self._file:
+            self._file.close()
+        day = datetime.fromtimestamp(created)
+        next_midnight = datetime.combine(day.date() + timedelta(days=1), datetime.min.time())
+        self._rollover_at = next_midnight.timestamp()
+        self._file = open(log_filename(day), 'a', encoding='utf-8')
+
+    def write(self, records: List[logging.LogRecord]):
+        """Запись пачки в файл и консоль с одним flush на пачку"""
+        with self._lock:
+            for record in records:
+                # Ошибка одной записи (разметка, диск) не останавливает писателя
+                try:
+                    line = self.formatter.format(record) + '\n'
+                except Exception:
+                    _handler.handleError(record)
+                    continue
+                try:
+                    if self._file is None or record.created >= self._rollover_at:
+                        self._open_for(record.created)
+                    self._file.write(line)
+                except OSError:
+                    self._file = None  # Следующая запись снова попробует открыть файл
+                    _handler.handleError(record)
+                try:
+                    sys.stderr.write(line)
+                except (OSError, ValueError):
+                    pass
+            try:
+                if self._file:
+                    self._file.flush()
+                sys.stderr.flush()
+            except (OSError, ValueError):
+                pass
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            batch = []
+            stop = False
+            while True:
+                if item is _STOP:
+                    stop = True
+                else:
+                    batch.append(item)
+                if stop or len(batch) >= WRITE_BATCH:
+                    break
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self.write(batch)
+            if stop:
+                return
+
+    def shutdown(self):
+        """Досылка очереди и остановка писателя; дальнейшие записи пишутся синхронно"""
+        if self.closed:
+            return
+        if self._thread is not None:
+            self.queue.put(_STOP)
+            self._thread.join(SHUTDOWN_TIMEOUT)
+        self.closed = True
+        # Записи, попавшие в очередь после _STOP
+        leftover = []
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftover.append(item)
+        self.write(leftover)
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+_pipeline = _LogWriter()
+_handler = _RecordQueueHandler(_pipeline.queue)
+_loggers: Dict[str, 'DailyRotatingLogger'] = {}
+_loggers_lock = threading.Lock()
+
+
+def shutdown_logging():
+    """Запись всех накопленных сообщений на диск (перед os._exit вызывать явно)"""
+    _pipeline.shutdown()
+
+
+atexit.register(shutdown_logging)
+
 
 class DailyRotatingLogger:
-    """Логгер с ротацией файлов по дням"""
-    
+    """Логгер с ротацией файлов по дням (запись - в фоновом потоке)"""
+
     def __init__(self, name: str = "SentinelBot"):
         self.name = name
         self.logger = logging.getLogger(name)
         self.logger.setLevel(getattr(logging, Config.LOG_LEVEL))
-        
-        # Убираем существующие обработчики
+
+        # Убираем существующие обработчики - все логгеры пишут через одну очередь
         self.logger.handlers.clear()
-        
-        # Создаем директорию для логов
-        Config.LOGS_DIR.mkdir(exist_ok=True)
-        
-        # Настраиваем обработчики
-        self._setup_handlers()
-        
-    def _setup_handlers(self):
-        """Настройка обработчиков логирования"""
-        # Форматтер для логов
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-        
-        # Файловый обработчик с ротацией по дням
-        log_filename = self._get_log_filename()
-        file_handler = logging.FileHandler(log_filename, encoding='utf-8')
-        file_handler.setFormatter(formatter)
-        file_handler.setLevel(logging.INFO)
-        
-        # Консольный обработчик
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(formatter)
-        console_handler.setLevel(logging.INFO)
-        
-        # Добавляем обработчики
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
-        
-    def _get_log_filename(self) -> Path:
-        """Получение имени файла лога на текущую дату"""
-        today = datetime.now().strftime("%d%m%Y")
-        return Config.LOGS_DIR / f"sentinel_{today}.log"
-        
-    def _check_date_rotation(self):
-        """Проверка необходимости ротации файла"""
-        current_log_file = self._get_log_filename()
-        
-        # Если файл изменился (новый день), обновляем обработчик
-        for handler in self.logger.handlers:
-            if isinstance(handler, logging.FileHandler):
-                if Path(handler.baseFilename) != current_log_file:
-                    self.logger.removeHandler(handler)
-                    handler.close()
-                    
-                    # Создаем новый файловый обработчик
-                    formatter = logging.Formatter(
-                        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-                        datefmt='%Y-%m-%d %H:%M:%S'
-                    )
-                    new_handler = logging.FileHandler(current_log_file, encoding='utf-8')
-                    new_handler.setFormatter(formatter)
-                    new_handler.setLevel(logging.INFO)
-                    self.logger.addHandler(new_handler)
-                    break
-    
-    def info(self, message: str):
+        self.logger.addHandler(_handler)
+        self.logger.propagate = False
+        _pipeline.start()
+
+    def info(self, message: str, *args):
         """Логирование информационного сообщения"""
-        self._check_date_rotation()
-        self.logger.info(message)
-        
-    def warning(self, message: str):
+        self.logger.info(message, *args)
+
+    def warning(self, message: str, *args):
         """Логирование предупреждения"""
-        self._check_date_rotation()
-        self.logger.warning(message)
-        
-    def error(self, message: str):
+        self.logger.warning(message, *args)
+
+    def error(self, message: str, *args):
         """Логирование ошибки"""
-        self._check_date_rotation()
-        self.logger.error(message)
-        
-    def critical(self, message: str):
+        self.logger.error(message, *args)
+
+    def critical(self, message: str, *args):
         """Логирование критической ошибки"""
-        self._check_date_rotation()
-        self.logger.critical(message)
-        
-    def debug(self, message: str):
+        self.logger.critical(message, *args)
+
+    def debug(self, message: str, *args):
         """Логирование отладочной информации"""
-        self._check_date_rotation()
-        self.logger.debug(message)
-    
+        self.logger.debug(message, *args)
+
+    def exception(self, message: str, *args):
+        """Логирование ошибки с трассировкой текущего исключения"""
+        self.logger.exception(message, *args)
+
     def update_log_level(self):
-        """Обновляет уровень логирования из конфигурации"""
-        from .config import Config
+        """Обновляет уровень логирования из конфигурации (для всех логгеров процесса)"""
         Config.reload_config()  # Перезагружаем конфигурацию
         new_level = getattr(logging, Config.LOG_LEVEL)
-        self.logger.setLevel(new_level)
-        
-        # Обновляем уровень для всех обработчиков
-        for handler in self.logger.handlers:
-            handler.setLevel(new_level)
+        with _loggers_lock:
+            for instance in _loggers.values():
+                instance.logger.setLevel(new_level)
 
 
 def get_logger(name: str = "SentinelBot") -> DailyRotatingLogger:
-    """Получение экземпляра логгера"""
-    return DailyRotatingLogger(name)
+    """Получение экземпляра логгера (один на имя)"""
+    with _loggers_lock:
+        instance = _loggers.get(name)
+        if instance is None:
+            instance = _loggers[name] = DailyRotatingLogger(name)
+        return instance
 
 # Глобальный экземпляр логгера
-logger = DailyRotatingLogger()
\ No newline at end of file
+logger = get_logger()
@@ -6,9 +6,16 @@ import threading
 from dotenv import load_dotenv
 
 from .config import Config
-from .logger import get_logger
+from .executor import BlockingExecutor
+from .instrumentation import Instrumentation
+from .log_retention import LogRetention
+from .logger import get_logger, shutdown_logging
 from .bot_manager import BotManager
+from .pid_registry import PidFileRegistry
+from .process_pool import ProcessHandlePool
+from .process_table import ProcessTable
 from .resource_monitor import ResourceMonitor
+from .state_cache import StateCache
 from .telegram_bot import TelegramBot
 
 load_dotenv()
@@ -23,15 +30,48 @@ class SentinelService:
         try:
             logger.info("Загрузка конфигурации...")
             self.config = Config()
+            # Задержка event loop, обработчиков и циклов мониторинга для /debug
+            self.instrumentation = Instrumentation()
+            # Сжатие и удаление старых логов в фоновом потоке
+            self.log_retention = LogRetention()
             logger.info("Инициализация TelegramBot...")
-            self.telegram_bot = TelegramBot(self.config, None, None)  # Временно None
+            self.telegram_bot = TelegramBot(
+                self.config, None, None, instrumentation=self.instrumentation
+            )  # Временно None
+            # Общие реестр PID файлов, пул дескрипторов и снимок таблицы процессов
+            # для BotManager и ResourceMonitor
+            self.pid_registry = PidFileRegistry()
+            self.process_pool = ProcessHandlePool()
+            self.process_table = ProcessTable()
+            # Единый пул потоков для блокирующих вызовов всех компонентов
+            self.executor = BlockingExecutor()
+            # Снимки состояния для обработчиков Telegram, обновляемые в фоне
+            self.state_cache = StateCache(executor=self.executor)
             logger.info("Инициализация BotManager...")
-            self.bot_manager = BotManager(self.telegram_bot)
+            self.bot_manager = BotManager(
+                self.telegram_bot,
+                pid_registry=self.pid_registry,
+                process_pool=self.process_pool,
+                process_table=self.process_table,
+                state_cache=self.state_cache,
+                executor=self.executor,
+                instrumentation=self.instrumentation,
+            )
             logger.info("Инициализация ResourceMonitor...")
-            self.resource_monitor = ResourceMonitor(self.telegram_bot)
+            self.resource_monitor = ResourceMonitor(
+                self.telegram_bot,
+                pid_registry=self.pid_registry,
+                process_pool=self.process_pool,
+                process_table=self.process_table,
+                state_cache=self.state_cache,
+                executor=self.executor,
+                instrumentation=self.instrumentation,
+            )
             # Обновляем ссылки в telegram_bot
             self.telegram_bot.bot_manager = self.bot_manager
             self.telegram_bot.resource_monitor = self.resource_monitor
+            self.telegram_bot.state_cache = self.state_cache
+            self.telegram_bot.executor = self.executor
             self.running = False
             logger.info("SentinelService успешно инициализирован")
         except Exception as e:
@@ -43,6 +83,12 @@ class SentinelService:
         try:
             logger.info("Запуск SaldoranSentinelBot...")
             
+            # Запускаем пробу задержки event loop
+            await self.instrumentation.start()
+            
+            # Запускаем обслуживание старых логов
+            self.log_retention.start()
+            
             # Запускаем мониторинг ресурсов
             await self.resource_monitor.start()
             
@@ -52,6 +98,9 @@ class SentinelService:
             # Запускаем мониторинг состояния ботов
             await self.bot_manager.start_monitoring()
             
+            # Запускаем фоновое обновление снимков для /status, /bots и /resources
+            await self.state_cache.start()
+            
             # Отправляем уведомление о запуске
             await self.telegram_bot.send_startup_notification()
             
@@ -82,8 +131,12 @@ class SentinelService:
                 logger.warning(f"Не удалось отправить уведомление о shutdown: {e}")
             
             # Останавливаем компоненты
+            if hasattr(self, 'state_cache'):
+                await self.state_cache.stop()
+                
             if hasattr(self, 'bot_manager'):
                 await self.bot_manager.stop_monitoring()
+                await self.bot_manager.stop_supervised_bots()
                 
             if hasattr(self, 'resource_monitor'):
                 await self.resource_monitor.stop()
@@ -91,6 +144,18 @@ class SentinelService:
             if hasattr(self, 'telegram_bot'):
                 await self.telegram_bot.stop()
                 
+            if hasattr(self, 'pid_registry'):
+                self.pid_registry.close()
+                
+            if hasattr(self, 'executor'):
+                self.executor.shutdown()
+                
+            if hasattr(self, 'instrumentation'):
+                await self.instrumentation.stop()
+                
+            if hasattr(self, 'log_retention'):
+                self.log_retention.stop()
+                
             # Отменяем задачи
             pending = [t for t in asyncio.all_tasks() 
                       if t is not asyncio.current_task()]
@@ -180,6 +245,8 @@ def run_service():
             logger.error(f"Ошибка при закрытии loop: {e}")
         
         logger.info("Программа завершена")
+        # os._exit не вызывает atexit - дописываем очередь логов сами
+        shutdown_logging()
         # Используем глобальную переменную exit_code
         os._exit(exit_code)
 
@@ -0,0 +1,297 @@
+"""
+Очередь исходящих уведомлений Telegram для SaldoranBotSentinel
+"""
+
+import asyncio
+import html
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from telegram.error import BadRequest, NetworkError, RetryAfter
+
+from .alert_spool import SPOOL_FILE, AlertSpool, SpooledAlert
+from .config import Config
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# Лимит длины сообщения Telegram
+MAX_MESSAGE_LENGTH = 4096
+# Пауза между повторами при сетевых ошибках: base * 2^(ошибка-1), не более max (сек)
+RETRY_BACKOFF_BASE = 1.0
+RETRY_BACKOFF_MAX = 30.0
+# Сколько уведомлений читать из журнала за проход
+SPOOL_BATCH = 100
+# Уведомление старше этого (сек) помечается как задержанное
+DELAYED_AFTER = 60
+
+DIGEST_SEPARATOR = "\n\n— — —\n\n"
+TRUNCATED_NOTE = "\n… <i>(сообщение обрезано)</i>"
+
+DELIVERED = 'delivered'
+REJECTED = 'rejected'
+FAILED = 'failed'
+
+SendCallback = Callable[[str], Awaitable[None]]
+
+_TAG_RE = re.compile(r'<[^>]+>')
+
+
+def coalesce_key(message: str) -> str:
+    """Ключ похожести: первая непустая строка без HTML разметки ("🔴 Бот упал!" и т.п.)"""
+    for line in message.splitlines():
+        line = _TAG_RE.sub('', line).strip()
+        if line:
+            return line
+    return ''
+
+
+def fit_message(text: str, limit: int = MAX_MESSAGE_LENGTH) -> str:
+    """Текст не длиннее limit; слишком длинный обрезается без разметки (обрезка не рвет HTML теги)"""
+    if len(text) <= limit:
+        return text
+    plain = html.unescape(_TAG_RE.sub('', text))
+    cut = limit - len(TRUNCATED_NOTE)
+    while True:
+        fitted = html.escape(plain[:cut], quote=False) + TRUNCATED_NOTE
+        if len(fitted) <= limit:
+            return fitted
+        # Экранирование удлиняет текст (до 5 раз на символ) - укорачиваем с запасом на это
+        cut -= max(1, (len(fitted) - limit) // 5)
+
+
+class TokenBucket:
+    """Ограничитель частоты: rate токенов в секунду, не более capacity подряд"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+
+    def _fill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Ожидание свободного токена"""
+        while True:
+            self._fill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def drain(self, seconds: float):
+        """Сервер попросил паузу (RetryAfter) - токены до ее конца не выдаются"""
+        self._fill()
+        self._tokens = -seconds * self.rate
+
+
+class CircuitBreaker:
+    """Размыкатель: после threshold ошибок подряд запросы к API не идут reset_timeout секунд.
+
+    По истечении паузы проходит одна пробная отправка; ее неудача удваивает паузу
+    (не более max_timeout), успех замыкает цепь.
+    """
+
+    def __init__(self, threshold: int, reset_timeout: float, max_timeout: float):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.max_timeout = max_timeout
+        self.failures = 0
+        self._timeout = reset_timeout
+        self._opened_at: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def record_success(self):
+        if self._opened_at is not None:
+            logger.info("Telegram API снова доступен - отправка уведомлений возобновлена")
+        self.failures = 0
+        self._timeout = self.reset_timeout
+        self._opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self._opened_at is not None:
+            # Пробная отправка не прошла
+            self._timeout = min(self.max_timeout, self._timeout * 2)
+            self._opened_at = time.monotonic()
+        elif self.failures >= self.threshold:
+            self._opened_at = time.monotonic()
+            logger.warning(f"Telegram API недоступен (ошибок подряд: {self.failures}) - "
+                           f"уведомления копятся в журнале, повтор через {self._timeout:.0f}с")
+
+    def delay(self) -> float:
+        """Сколько ждать до следующей попытки"""
+        if self._opened_at is not None:
+            return max(0.0, self._opened_at + self._timeout - time.monotonic())
+        if self.failures:
+            return min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * (2 ** (self.failures - 1)))
+        return 0.0
+
+
+class NotificationQueue:
+    """Единая очередь исходящих уведомлений.
+
+    Уведомление сначала пишется в журнал на диске (AlertSpool), затем один
+    обработчик отправляет журнал по порядку через token bucket. RetryAfter
+    выдерживается, сетевые ошибки повторяются с паузой, а пока Telegram
+    недоступен, размыкатель не дает долбить API. Похожие уведомления
+    (одинаковый заголовок), накопившиеся за окно сбора или пока отправка ждет,
+    уходят одной сводкой. Методы вызываются из потока event loop.
+    """
+
+    def __init__(self, send: SendCallback, spool: Optional[AlertSpool] = None):
+        self._send = send
+        self.spool = spool or AlertSpool(Config.LOGS_DIR / SPOOL_FILE)
+        self._bucket = TokenBucket(Config.NOTIFY_RATE, Config.NOTIFY_BURST)
+        self.breaker = CircuitBreaker(
+            Config.NOTIFY_BREAKER_THRESHOLD, Config.NOTIFY_BREAKER_RESET, Config.NOTIFY_BREAKER_MAX_RESET
+        )
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._dropped = 0
+        self.sent = 0
+        self.coalesced = 0
+
+    def enqueue(self, message: str, key: Optional[str] = None):
+        """Запись уведомления в журнал и пробуждение обработчика (без ожидания отправки)"""
+        self.spool.append(message, key if key is not None else coalesce_key(message))
+        # Журнал переполнен (долгий простой Telegram) - жертвуем самыми старыми
+        self._dropped += self.spool.trim(Config.NOTIFY_QUEUE_SIZE, Config.NOTIFY_SPOOL_MAX_AGE)
+        self._idle.clear()
+        self._wakeup.set()
+
+    def start(self):
+        """Запуск обработчика; уведомления, оставшиеся в журнале с прошлого запуска, уходят первыми"""
+        if self._task is None:
+            self._closing = False
+            self._dropped += self.spool.trim(Config.NOTIFY_QUEUE_SIZE, Config.NOTIFY_SPOOL_MAX_AGE)
+            backlog = self.spool.count()
+            if backlog:
+                logger.info(f"В журнале уведомлений {backlog} неотправленных - отправляем")
+            self._wakeup.set()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 5.0):
+        """Досылка журнала (не дольше timeout) и остановка обработчика; остаток ждет следующего запуска"""
+        if self._task is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Уведомлений осталось в журнале до следующего запуска: {self.spool.count()}")
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self.spool.close()
+
+    async def _run(self):
+        """Обработчик: ожидание новых записей, сбор пачки, отправка журнала по порядку"""
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if not self._closing:
+                # Окно сбора - всплеск похожих уведомлений уйдет одной сводкой
+                await asyncio.sleep(Config.NOTIFY_COALESCE_WINDOW)
+            await self._flush()
+
+    async def _flush(self):
+        """Отправка журнала по порядку, пока он не опустеет"""
+        while True:
+            alerts = self.spool.pending(SPOOL_BATCH)
+            if not alerts:
+                self._idle.set()
+                return
+
+            groups: Dict[str, List[SpooledAlert]] = {}
+            for alert in alerts:
+                groups.setdefault(alert.key, []).append(alert)
+
+            for items in groups.values():
+                ids = [alert.id for alert in items]
+                while True:
+                    # Разомкнутый размыкатель - ждем паузу, не обращаясь к API
+                    delay = self.breaker.delay()
+                    if delay:
+                        await asyncio.sleep(delay)
+                    await self._bucket.acquire()
+                    status = await self._deliver(self._render(items))
+                    if status != FAILED:
+                        self.spool.ack(ids)
+                        break
+                    # Запись остается в журнале, более новые ее не обгоняют
+                    self.spool.mark_attempt(ids)
+                if len(items) > 1:
+                    self.coalesced += len(items) - 1
+
+    def _render(self, items: List[SpooledAlert]) -> str:
+        """Одно уведомление как есть, несколько похожих - сводкой; результат помещается в лимит Telegram"""
+        prefix = ''
+        if self._dropped:
+            prefix = f"⚠️ <i>Пропущено уведомлений (переполнение журнала): {self._dropped}</i>\n\n"
+        bodies = [self._with_delay_note(item) for item in items]
+        if len(items) == 1:
+            text = prefix + bodies[0]
+        else:
+            header = prefix + f"📦 <b>Сводка похожих уведомлений: {len(items)}</b>"
+            text = header + "\n\n" + DIGEST_SEPARATOR.join(bodies)
+            # Не помещается - отбрасываем самые старые целиком (без разрыва HTML тегов)
+            while len(text) > MAX_MESSAGE_LENGTH and len(bodies) > 1:
+                bodies.pop(0)
+                omitted = len(items) - len(bodies)
+                text = (header + f"\n<i>(еще {omitted} ранее не показаны)</i>\n\n" +
+                        DIGEST_SEPARATOR.join(bodies))
+        # Одно слишком длинное уведомление - обрезаем, иначе Telegram отклонит его целиком
+        return fit_message(text)
+
+    @staticmethod
+    def _with_delay_note(item: SpooledAlert) -> str:
+        """Задержанное уведомление (Telegram был недоступен) - с исходным временем"""
+        if time.time() - item.created < DELAYED_AFTER:
+            return item.text
+        created = datetime.fromtimestamp(item.created).strftime('%d.%m %H:%M:%S')
+        return f"⏳ <i>Задержано, создано {created}</i>\n{item.text}"
+
+    async def _deliver(self, text: str) -> str:
+        """Отправка: DELIVERED, REJECTED (повтор не поможет) или FAILED (сеть, повторить позже)"""
+        while True:
+            try:
+                await self._send(text)
+            except RetryAfter as e:
+                retry_after = e.retry_after
+                if isinstance(retry_after, timedelta):
+                    retry_after = retry_after.total_seconds()
+                logger.warning(f"Лимит Telegram: повтор уведомления через {retry_after}с")
+                self._bucket.drain(retry_after)
+                await self._bucket.acquire()
+                continue
+            except BadRequest as e:
+                # Ошибка в самом сообщении (разметка, длина) - повтор не поможет
+                logger.error(f"Telegram отклонил уведомление: {e}")
+                return REJECTED
+            except NetworkError as e:
+                self.breaker.record_failure()
+                if not self.breaker.is_open:
+                    logger.warning(f"Сетевая ошибка при отправке уведомления ({e}), "
+                                   f"повтор через {self.breaker.delay():.0f}с")
+                return FAILED
+            except Exception as e:
+                # Forbidden (бот заблокирован) и прочие ошибки - повтор не поможет
+                logger.error(f"Ошибка при отправке уведомления: {e}")
+                return REJECTED
+            self.breaker.record_success()
+            self.sent += 1
+            self._dropped = 0
+            return DELIVERED
@@ -0,0 +1,169 @@
+"""
+Реестр PID файлов ботов (/tmp/{bot_name}.pid) для SaldoranBotSentinel
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from .inotify import (
+    IN_CLOSE_WRITE, IN_CREATE, IN_DELETE, IN_DELETE_SELF, IN_MODIFY,
+    IN_MOVED_FROM, IN_MOVED_TO, IN_MOVE_SELF, IN_Q_OVERFLOW, open_inotify,
+)
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+PID_DIR = Path('/tmp')
+PID_SUFFIX = '.pid'
+
+_WATCH_MASK = (IN_CREATE | IN_CLOSE_WRITE | IN_MODIFY | IN_DELETE |
+               IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF)
+
+
+class PidFileRegistry:
+    """Карта pid <-> бот, загружается один раз и поддерживается через inotify.
+
+    Без inotify используется опрос: полная перечитка при изменении mtime
+    директории, иначе - stat только известных PID файлов (не чаще poll_interval).
+    """
+
+    def __init__(self, pid_dir: Path = PID_DIR, poll_interval: float = 1.0):
+        self.pid_dir = Path(pid_dir)
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._bot_to_pid: Dict[str, int] = {}
+        self._pid_to_bot: Dict[int, str] = {}
+        self._file_mtimes: Dict[str, int] = {}
+        self._dir_mtime: Optional[int] = None
+        self._last_poll = 0.0
+
+        self._inotify = open_inotify()
+        if self._inotify:
+            try:
+                self._inotify.add_watch(str(self.pid_dir), _WATCH_MASK)
+            except OSError as e:
+                logger.warning(f"inotify недоступен для {self.pid_dir}, используем опрос: {e}")
+                self._inotify.close()
+                self._inotify = None
+
+        with self._lock:
+            self._reload_all()
+        mode = "inotify" if self._inotify else "опрос mtime"
+        logger.info(f"Реестр PID файлов: {len(self._bot_to_pid)} файлов в {self.pid_dir} ({mode})")
+
+    def _read_pid_file(self, bot_name: str):
+        """Перечитывание одного PID файла"""
+        pid_file = self.pid_dir / f"{bot_name}{PID_SUFFIX}"
+        old_pid = self._bot_to_pid.pop(bot_name, None)
+        if old_pid is not None and self._pid_to_bot.get(old_pid) == bot_name:
+            del self._pid_to_bot[old_pid]
+        self._file_mtimes.pop(bot_name, None)
+
+        try:
+            mtime = pid_file.stat().st_mtime_ns
+            with open(pid_file, 'r') as f:
+                pid = int(f.read().strip())
+        except (ValueError, OSError):
+            return
+
+        self._bot_to_pid[bot_name] = pid
+        self._pid_to_bot[pid] = bot_name
+        self._file_mtimes[bot_name] = mtime
+
+    def _reload_all(self):
+        """Полная перечитка всех PID файлов"""
+        self._bot_to_pid.clear()
+        self._pid_to_bot.clear()
+        self._file_mtimes.clear()
+        try:
+            self._dir_mtime = self.pid_dir.stat().st_mtime_ns
+            names = os.listdir(self.pid_dir)
+        except OSError as e:
+            logger.debug(f"Не удалось прочитать {self.pid_dir}: {e}")
+            return
+        for name in names:
+            if name.endswith(PID_SUFFIX):
+                self._read_pid_file(name[:-len(PID_SUFFIX)])
+
+    def _sync(self):
+        """Применение изменений с последнего обращения"""
+        if self._inotify:
+            changed = set()
+            for event in self._inotify.read_events():
+                if event.mask & (IN_Q_OVERFLOW | IN_DELETE_SELF | IN_MOVE_SELF):
+                    self._reload_all()
+                    return
+                if event.name.endswith(PID_SUFFIX):
+                    changed.add(event.name[:-len(PID_SUFFIX)])
+            for bot_name in changed:
+                self._read_pid_file(bot_name)
+            return
+
+        now = time.monotonic()
+        if now - self._last_poll < self.poll_interval:
+            return
+        self._last_poll = now
+
+        try:
+            dir_mtime = self.pid_dir.stat().st_mtime_ns
+        except OSError:
+            dir_mtime = None
+        if dir_mtime != self._dir_mtime:
+            self._reload_all()
+            return
+
+        # Перезапись существующего файла не меняет mtime директории
+        for bot_name, mtime in list(self._file_mtimes.items()):
+            try:
+                current = (self.pid_dir / f"{bot_name}{PID_SUFFIX}").stat().st_mtime_ns
+            except OSError:
+                current = None
+            if current != mtime:
+                self._read_pid_file(bot_name)
+
+    def get_pid(self, bot_name: str) -> Optional[int]:
+        """PID из файла /tmp/{bot_name}.pid"""
+        with self._lock:
+            self._sync()
+            return self._bot_to_pid.get(bot_name)
+
+    def bot_for_pid(self, pid: int) -> Optional[str]:
+        """Имя бота, чей PID файл указывает на pid"""
+        with self._lock:
+            self._sync()
+            return self._pid_to_bot.get(pid)
+
+    def pid_map(self) -> Dict[int, str]:
+        """Копия карты pid -> имя бота"""
+        with self._lock:
+            self._sync()
+            return dict(self._pid_to_bot)
+
+    def write(self, bot_name: str, pid: int):
+        """Запись PID файла бота (для совместимости со скриптами stop_bot.sh)"""
+        pid_file = self.pid_dir / f"{bot_name}{PID_SUFFIX}"
+        with self._lock:
+            pid_file.write_text(f"{pid}\n")
+            self._read_pid_file(bot_name)
+
+    def remove(self, bot_name: str) -> bool:
+        """Удаление PID файла бота"""
+        pid_file = self.pid_dir / f"{bot_name}{PID_SUFFIX}"
+        with self._lock:
+            try:
+                pid_file.unlink()
+                removed = True
+            except FileNotFoundError:
+                removed = False
+            finally:
+                self._read_pid_file(bot_name)
+        return removed
+
+    def close(self):
+        """Освобождение дескриптора inotify"""
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
@@ -0,0 +1,89 @@
+"""
+Мгновенное обнаружение завершения процессов через pidfd для SaldoranBotSentinel
+"""
+
+import asyncio
+import os
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+ExitCallback = Callable[[str, int], Awaitable[None]]
+
+
+class PidWatcher:
+    """Наблюдение за PID через os.pidfd_open + loop.add_reader.
+
+    pidfd становится читаемым в момент завершения процесса, поэтому событие
+    приходит в event loop за миллисекунды без какого-либо опроса.
+    """
+
+    def __init__(self):
+        # key -> (pid, pidfd, callback)
+        self._watches: Dict[str, Tuple[int, int, ExitCallback]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @staticmethod
+    def is_supported() -> bool:
+        """pidfd_open есть в Python 3.9+ на Linux 5.3+"""
+        return hasattr(os, 'pidfd_open')
+
+    def watched_pid(self, key: str) -> Optional[int]:
+        """PID, за которым сейчас ведется наблюдение по ключу"""
+        watch = self._watches.get(key)
+        return watch[0] if watch else None
+
+    def watch(self, key: str, pid: int, callback: ExitCallback) -> bool:
+        """Начать наблюдение за pid; callback(key, pid) вызывается после его завершения"""
+        if not self.is_supported():
+            return False
+        if self.watched_pid(key) == pid:
+            return True
+        self.unwatch(key)
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Вызов вне event loop (например, из пула потоков) - остается опрос
+            return False
+
+        try:
+            fd = os.pidfd_open(pid)
+        except ProcessLookupError:
+            return False
+        except OSError as e:
+            logger.debug(f"pidfd_open({pid}) недоступен: {e}")
+            return False
+
+        self._loop = loop
+        loop.add_reader(fd, self._on_exit, key)
+        self._watches[key] = (pid, fd, callback)
+        logger.debug(f"Наблюдение за завершением {key} (PID: {pid}) через pidfd")
+        return True
+
+    def unwatch(self, key: str):
+        """Прекратить наблюдение по ключу"""
+        watch = self._watches.pop(key, None)
+        if watch is None:
+            return
+        _, fd, _ = watch
+        if self._loop and not self._loop.is_closed():
+            self._loop.remove_reader(fd)
+        os.close(fd)
+
+    def _on_exit(self, key: str):
+        """Колбэк event loop: pidfd стал читаемым - процесс завершился"""
+        watch = self._watches.get(key)
+        if watch is None:
+            return
+        pid, _, callback = watch
+        self.unwatch(key)
+        logger.debug(f"pidfd: процесс {key} (PID: {pid}) завершился")
+        self._loop.create_task(callback(key, pid))
+
+    def close(self):
+        """Снять все наблюдения"""
+        for key in list(self._watches):
+            self.unwatch(key)
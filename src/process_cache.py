@@ -0,0 +1,71 @@
+"""
+Кэш классификации процессов для SaldoranBotSentinel
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Hashable, Iterable, Optional
+
+
+@dataclass
+class ProcessClassification:
+    """Результат классификации процесса (не меняется за время жизни процесса)"""
+    raw_name: str  # имя из /proc до очистки - для обнаружения exec()
+    name: str  # очищенное имя процесса
+    cmdline: str  # очищенная и обрезанная командная строка
+    cmdline_bot: Optional[str]  # имя бота, найденное по командной строке
+
+
+class ProcessClassificationCache:
+    """LRU кэш классификаций с ключом (pid, время старта процесса)"""
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, ProcessClassification]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, raw_name: str) -> Optional[ProcessClassification]:
+        """Классификация из кэша или None (промах)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            # Смена имени при том же (pid, start) означает exec() - классифицируем заново
+            if entry is None or entry.raw_name != raw_name:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, entry: ProcessClassification):
+        """Сохранение классификации с вытеснением самых старых записей"""
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def retain(self, alive_keys: Iterable[Hashable]):
+        """Удаление записей завершившихся процессов"""
+        alive = set(alive_keys)
+        with self._lock:
+            dead = [key for key in self._entries if key not in alive]
+            for key in dead:
+                del self._entries[key]
+            self.evictions += len(dead)
+
+    def stats(self) -> Dict[str, float]:
+        """Счетчики попаданий/промахов"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
@@ -0,0 +1,117 @@
+"""
+Пул долгоживущих дескрипторов процессов для SaldoranBotSentinel
+"""
+
+import threading
+import time
+from typing import Dict, Hashable, Iterable, Optional, Tuple
+
+import psutil
+
+from .logger import get_logger
+from .process_scanner import CLOCK_TICKS
+
+logger = get_logger(__name__)
+
+ProcessKey = Tuple[int, int]
+
+
+def process_key(pid: int, create_time: float) -> ProcessKey:
+    """Ключ процесса (pid, время старта в тиках) - тот же, что (pid, start_ticks) из /proc"""
+    # psutil считает create_time как boot_time + start_ticks / CLOCK_TICKS
+    return pid, round((create_time - psutil.boot_time()) * CLOCK_TICKS)
+
+
+class ProcessHandlePool:
+    """Дескрипторы psutil.Process и предыдущие CPU времена между сканами.
+
+    CPU% считается по дельте CPU времени между обращениями без дополнительного сна.
+    Замеры хранятся по ключу (pid, start_ticks) - общему для сканера /proc и psutil.
+    При первом обращении к процессу возвращается средняя загрузка за время его жизни.
+    """
+
+    def __init__(self, stale_after: float = 600.0):
+        self.stale_after = stale_after
+        self._lock = threading.Lock()
+        # pid -> (ключ процесса, дескриптор)
+        self._handles: Dict[int, Tuple[ProcessKey, psutil.Process]] = {}
+        # (pid, start_ticks) -> (cpu_time, monotonic время замера)
+        self._cpu_marks: Dict[Hashable, Tuple[float, float]] = {}
+
+    def _lookup(self, pid: int) -> Optional[Tuple[ProcessKey, psutil.Process]]:
+        with self._lock:
+            entry = self._handles.get(pid)
+        # is_running сверяет время старта - дескриптор переиспользованного PID не вернется
+        if entry is not None and entry[1].is_running():
+            return entry
+        try:
+            handle = psutil.Process(pid)
+            entry = (process_key(pid, handle.create_time()), handle)
+        except psutil.Error:
+            return None
+
+        with self._lock:
+            previous = self._handles.get(pid)
+            if previous is not None and previous[0] != entry[0]:
+                # PID переиспользован - замеры прежнего процесса больше не нужны
+                self._cpu_marks.pop(previous[0], None)
+            self._handles[pid] = entry
+        return entry
+
+    def get(self, pid: int) -> Optional[psutil.Process]:
+        """Долгоживущий дескриптор процесса (None если процесса нет)"""
+        entry = self._lookup(pid)
+        return entry[1] if entry else None
+
+    def cpu_percent_from_times(self, key: Hashable, cpu_time: float, age_seconds: Optional[float] = None) -> float:
+        """CPU% по дельте CPU времени процесса с прошлого замера"""
+        now = time.monotonic()
+        with self._lock:
+            previous = self._cpu_marks.get(key)
+            self._cpu_marks[key] = (cpu_time, now)
+
+        if previous is None:
+            # Первое появление процесса - средняя загрузка за время жизни
+            if age_seconds and age_seconds > 0:
+                return max(0.0, cpu_time / age_seconds * 100)
+            return 0.0
+
+        wall_delta = now - previous[1]
+        if wall_delta <= 0:
+            return 0.0
+        return max(0.0, (cpu_time - previous[0]) / wall_delta * 100)
+
+    def cpu_percent(self, pid: int) -> Optional[float]:
+        """CPU% процесса по дескриптору из пула"""
+        entry = self._lookup(pid)
+        if entry is None:
+            return None
+        key, handle = entry
+        try:
+            times = handle.cpu_times()
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return None
+        return self.cpu_percent_from_times(
+            key,
+            times.user + times.system,
+            age_seconds=time.time() - handle.create_time(),
+        )
+
+    def prune(self, alive_keys: Optional[Iterable[Hashable]] = None):
+        """Удаление дескрипторов и замеров завершившихся процессов"""
+        alive = set(alive_keys) if alive_keys is not None else None
+        threshold = time.monotonic() - self.stale_after
+        with self._lock:
+            for pid, (key, handle) in list(self._handles.items()):
+                if not handle.is_running():
+                    del self._handles[pid]
+                    self._cpu_marks.pop(key, None)
+            handle_keys = {key for key, _ in self._handles.values()}
+            for key, (_, marked_at) in list(self._cpu_marks.items()):
+                if key in handle_keys:
+                    continue
+                if (alive is not None and key not in alive) or marked_at < threshold:
+                    del self._cpu_marks[key]
+
+    def __len__(self) -> int:
+        return len(self._handles)
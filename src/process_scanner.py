@@ -0,0 +1,209 @@
+"""
+Быстрый сканер таблицы процессов через /proc для SaldoranBotSentinel
+"""
+
+import os
+import pwd
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import psutil
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+PROC_DIR = '/proc'
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+
+@dataclass
+class ProcSample:
+    """Сырые данные о процессе, прочитанные за один проход по /proc"""
+    pid: int
+    ppid: int
+    name: str
+    state: str  # R, S, D, Z ... (поле state из /proc/<pid>/stat)
+    uid: int
+    username: str
+    rss_bytes: int
+    cpu_time: float  # utime + stime в секундах
+    start_ticks: int  # время старта процесса в тиках с момента загрузки
+    age: float = 0.0  # возраст процесса в секундах на момент скана
+    memory_bytes: Optional[int] = None  # USS для кандидатов в топ, иначе RSS
+    cmdline: Optional[List[str]] = None
+
+    def read_cmdline(self) -> List[str]:
+        """Ленивое чтение командной строки процесса"""
+        if self.cmdline is None:
+            self.cmdline = _read_cmdline(self.pid)
+        return self.cmdline
+
+
+def _read_cmdline(pid: int) -> List[str]:
+    """Чтение /proc/<pid>/cmdline"""
+    try:
+        with open(f'{PROC_DIR}/{pid}/cmdline', 'rb') as f:
+            raw = f.read()
+    except OSError:
+        return []
+    if not raw:
+        return []
+    return [arg.decode('utf-8', errors='surrogateescape') for arg in raw.rstrip(b'\0').split(b'\0')]
+
+
+def read_uptime() -> float:
+    """Время работы системы в секундах из /proc/uptime"""
+    try:
+        with open(f'{PROC_DIR}/uptime', 'rb') as f:
+            return float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return time.time() - psutil.boot_time()
+
+
+def read_uss_bytes(pid: int) -> Optional[int]:
+    """USS процесса из /proc/<pid>/smaps_rollup (Private_Clean + Private_Dirty + Private_Hugetlb)"""
+    try:
+        with open(f'{PROC_DIR}/{pid}/smaps_rollup', 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        # Старые ядра без smaps_rollup - отдаем работу psutil (полный разбор smaps)
+        try:
+            return psutil.Process(pid).memory_full_info().uss
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess, AttributeError):
+            return None
+    except OSError:
+        return None
+
+    uss_kb = 0
+    found = False
+    for line in data.splitlines():
+        if line.startswith(b'Private_'):
+            parts = line.split()
+            if len(parts) >= 2:
+                uss_kb += int(parts[1])
+                found = True
+    return uss_kb * 1024 if found else None
+
+
+class ProcessScanner:
+    """Однопроходный сканер процессов: stat, statm и status каждого PID"""
+
+    def __init__(self):
+        self._usernames: Dict[int, str] = {}
+
+    @staticmethod
+    def is_supported() -> bool:
+        """Доступен ли /proc (Linux)"""
+        return os.path.isfile(f'{PROC_DIR}/self/stat')
+
+    def _username(self, uid: int) -> str:
+        """Имя пользователя по UID с кэшированием"""
+        name = self._usernames.get(uid)
+        if name is None:
+            try:
+                name = pwd.getpwuid(uid).pw_name
+            except KeyError:
+                name = str(uid)
+            self._usernames[uid] = name
+        return name
+
+    def _read_process(self, pid: int) -> Optional[ProcSample]:
+        """Чтение stat, statm и status одного процесса"""
+        base = f'{PROC_DIR}/{pid}'
+        try:
+            with open(f'{base}/stat', 'rb') as f:
+                stat = f.read()
+            with open(f'{base}/statm', 'rb') as f:
+                statm = f.read()
+            with open(f'{base}/status', 'rb') as f:
+                status = f.read()
+        except OSError:
+            # Процесс завершился между listdir и чтением или нет доступа
+            return None
+
+        # Имя процесса заключено в скобки и может содержать пробелы и ')'
+        lpar = stat.find(b'(')
+        rpar = stat.rfind(b')')
+        if lpar < 0 or rpar < 0:
+            return None
+        name = stat[lpar + 1:rpar].decode('utf-8', errors='replace')
+        fields = stat[rpar + 2:].split()
+        try:
+            # Нумерация полей в man proc начинается с 1; fields[0] - это поле 3 (state)
+            state = fields[0].decode('ascii', errors='replace')
+            ppid = int(fields[1])
+            utime = int(fields[11])
+            stime = int(fields[12])
+            start_ticks = int(fields[19])
+            rss_pages = int(statm.split()[1])
+        except (IndexError, ValueError):
+            return None
+
+        uid = -1
+        uid_pos = status.find(b'\nUid:')
+        if uid_pos >= 0:
+            try:
+                uid = int(status[uid_pos + 5:status.find(b'\n', uid_pos + 1)].split()[0])
+            except (IndexError, ValueError):
+                uid = -1
+
+        return ProcSample(
+            pid=pid,
+            ppid=ppid,
+            name=name,
+            state=state,
+            uid=uid,
+            username=self._username(uid) if uid >= 0 else 'unknown',
+            rss_bytes=rss_pages * PAGE_SIZE,
+            cpu_time=(utime + stime) / CLOCK_TICKS,
+            start_ticks=start_ticks,
+        )
+
+    def scan(self) -> List[ProcSample]:
+        """Один проход по всем процессам системы"""
+        samples = []
+        try:
+            entries = os.listdir(PROC_DIR)
+        except OSError as e:
+            logger.error(f"Не удалось прочитать {PROC_DIR}: {e}")
+            return samples
+        uptime = read_uptime()
+
+        for entry in entries:
+            if not entry.isdigit():
+                continue
+            sample = self._read_process(int(entry))
+            if sample is not None:
+                sample.age = uptime - sample.start_ticks / CLOCK_TICKS
+                samples.append(sample)
+        return samples
+
+    def select_top_memory(self, samples: List[ProcSample], top_k: int,
+                          candidates: Optional[int] = None) -> List[ProcSample]:
+        """USS только для топ-K кандидатов по RSS из уже снятого скана.
+
+        Возвращает кандидатов, отсортированных по memory_bytes (USS, либо RSS если USS недоступен).
+        """
+        if candidates is None:
+            candidates = max(top_k * 2, top_k + 10)
+
+        # USS <= RSS, поэтому процессы вне топа по RSS почти никогда не попадут в топ по USS
+        top = sorted(samples, key=lambda s: s.rss_bytes, reverse=True)[:candidates]
+        for sample in top:
+            uss = read_uss_bytes(sample.pid)
+            sample.memory_bytes = uss if uss is not None else sample.rss_bytes
+
+        top.sort(key=lambda s: s.memory_bytes, reverse=True)
+        return top[:top_k]
+
+    def scan_with_uss(self, top_k: int, candidates: Optional[int] = None) -> List[ProcSample]:
+        """Скан всех процессов + USS только для топ-K кандидатов по RSS"""
+        started = time.perf_counter()
+        samples = self.scan()
+        top = self.select_top_memory(samples, top_k, candidates)
+        logger.debug(f"Скан /proc: {len(samples)} процессов, "
+                     f"{(time.perf_counter() - started) * 1000:.1f}ms")
+        return top
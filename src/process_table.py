@@ -0,0 +1,106 @@
+"""
+Общий снимок таблицы процессов на один тик мониторинга для SaldoranBotSentinel
+"""
+
+import bisect
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .config import Config
+from .logger import get_logger
+from .process_scanner import PROC_DIR, ProcessScanner, ProcSample
+
+logger = get_logger(__name__)
+
+
+class ProcessTableSnapshot:
+    """Один проход по таблице процессов с индексами по pid, пользователю и cwd"""
+
+    def __init__(self, samples: List[ProcSample]):
+        self.taken_at = time.time()
+        self.samples = samples
+        self.by_pid: Dict[int, ProcSample] = {s.pid: s for s in samples}
+        self.by_username: Dict[str, List[ProcSample]] = {}
+        for sample in samples:
+            self.by_username.setdefault(sample.username, []).append(sample)
+        self._lock = threading.Lock()
+        # username -> (отсортированный список (cwd, pid), процессы без доступного cwd)
+        self._cwd_index: Dict[str, Tuple[List[Tuple[str, int]], List[ProcSample]]] = {}
+
+    def _build_cwd_index(self, username: str) -> Tuple[List[Tuple[str, int]], List[ProcSample]]:
+        """Индекс cwd строится лениво и только для процессов нужного пользователя"""
+        with self._lock:
+            index = self._cwd_index.get(username)
+            if index is None:
+                entries = []
+                without_cwd = []
+                for sample in self.by_username.get(username, []):
+                    try:
+                        entries.append((os.readlink(f'{PROC_DIR}/{sample.pid}/cwd'), sample.pid))
+                    except OSError:
+                        without_cwd.append(sample)
+                entries.sort()
+                index = (entries, without_cwd)
+                self._cwd_index[username] = index
+            return index
+
+    def processes_in_dir(self, root: str, username: str) -> List[ProcSample]:
+        """Процессы пользователя, чей cwd равен root или лежит внутри него"""
+        entries, _ = self._build_cwd_index(username)
+        root = root.rstrip(os.sep)
+        result = []
+        position = bisect.bisect_left(entries, (root, -1))
+        while position < len(entries):
+            cwd, pid = entries[position]
+            if not cwd.startswith(root):
+                break
+            # Префикс должен совпадать по границе компонента пути
+            if len(cwd) == len(root) or cwd[len(root)] == os.sep:
+                result.append(self.by_pid[pid])
+            position += 1
+        return result
+
+    def processes_without_cwd(self, username: str) -> List[ProcSample]:
+        """Процессы пользователя, cwd которых прочитать не удалось"""
+        _, without_cwd = self._build_cwd_index(username)
+        return without_cwd
+
+    @property
+    def age(self) -> float:
+        """Возраст снимка в секундах"""
+        return time.time() - self.taken_at
+
+
+class ProcessTable:
+    """Источник снимков таблицы процессов: не чаще одного прохода за max_age секунд"""
+
+    def __init__(self, scanner: Optional[ProcessScanner] = None, max_age: Optional[float] = None):
+        self.scanner = scanner or (ProcessScanner() if ProcessScanner.is_supported() else None)
+        self.max_age = Config.PROCESS_SNAPSHOT_MAX_AGE if max_age is None else max_age
+        self._lock = threading.Lock()
+        self._snapshot: Optional[ProcessTableSnapshot] = None
+
+    def snapshot(self, max_age: Optional[float] = None) -> Optional[ProcessTableSnapshot]:
+        """Актуальный снимок (None, если /proc недоступен)"""
+        if not self.scanner:
+            return None
+        if max_age is None:
+            max_age = self.max_age
+        with self._lock:
+            if self._snapshot is None or self._snapshot.age > max_age:
+                started = time.perf_counter()
+                self._snapshot = ProcessTableSnapshot(self.scanner.scan())
+                logger.debug(f"Снимок таблицы процессов: {len(self._snapshot.samples)} процессов, "
+                             f"{(time.perf_counter() - started) * 1000:.1f}ms")
+            return self._snapshot
+
+    def refresh(self) -> Optional[ProcessTableSnapshot]:
+        """Принудительный новый проход (начало тика мониторинга)"""
+        return self.snapshot(max_age=-1)
+
+    def invalidate(self):
+        """Сброс снимка - следующий запрос сделает новый проход"""
+        with self._lock:
+            self._snapshot = None
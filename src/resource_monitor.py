@@ -9,16 +9,40 @@ import re
 import subprocess
 import time
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, List, Dict, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 
 from .config import Config
 from .logger import get_logger
+from .cpu_sampler import CpuSampler
+from .executor import BlockingExecutor
+from .instrumentation import Instrumentation
+from .pid_registry import PidFileRegistry
+from .process_pool import ProcessHandlePool, process_key
+from .process_cache import ProcessClassification, ProcessClassificationCache
+from .process_table import ProcessTable
+from .state_cache import STATE_RESOURCES, StateCache
 
 logger = get_logger(__name__)
 
 
+def _is_python_process(process_name: str) -> bool:
+    """Имена бот-процессов проверяем только у Python интерпретаторов"""
+    return process_name.lower() in ['python', 'python3', 'python3.10', 'python3.11', 'python3.12']
+
+
+def _safe_encode_string(s: str) -> str:
+    """Безопасное кодирование строки для избежания ошибок с surrogates"""
+    if not s:
+        return ""
+    try:
+        # Удаляем проблемные символы и кодируем в UTF-8
+        return s.encode('utf-8', errors='ignore').decode('utf-8')
+    except Exception:
+        return "unknown"
+
+
 @dataclass
 class ProcessInfo:
     """Информация о процессе"""
@@ -45,7 +69,16 @@ class SystemStats:
 class ResourceMonitor:
     """Монитор системных ресурсов"""
     
-    def __init__(self, telegram_bot=None):
+    def __init__(
+        self,
+        telegram_bot=None,
+        pid_registry: Optional[PidFileRegistry] = None,
+        process_pool: Optional[ProcessHandlePool] = None,
+        process_table: Optional[ProcessTable] = None,
+        state_cache: Optional[StateCache] = None,
+        executor: Optional[BlockingExecutor] = None,
+        instrumentation: Optional[Instrumentation] = None,
+    ):
         self.target_user = Config.TARGET_USER
         self.max_cpu_percent = Config.MAX_CPU_PERCENT
         self.min_free_ram_mb = Config.MIN_FREE_RAM_MB
@@ -53,10 +86,30 @@ class ResourceMonitor:
         self._last_check_time = None
         self._monitoring_task = None
         self.telegram_bot = telegram_bot
+        # Общий с BotManager реестр PID файлов
+        self.pid_registry = pid_registry or PidFileRegistry()
+        # Общий с BotManager пул дескрипторов процессов (предыдущие CPU времена для CPU%)
+        self.process_pool = process_pool or ProcessHandlePool()
+        # Общий с BotManager снимок таблицы процессов (однопроходный сканер /proc);
+        # без /proc (не Linux) используем psutil
+        self.process_table = process_table or ProcessTable()
+        self._scanner = self.process_table.scanner
+        # Классификация процесса не меняется за время его жизни - кэшируем по (pid, start)
+        self._classification_cache = ProcessClassificationCache(Config.PROCESS_CACHE_SIZE)
+        # Фоновый замер CPU - обработчики читают кэшированное значение без блокировки
+        self.cpu_sampler = CpuSampler()
+        # Проверки и экстренная очистка (sysctl, kill, sleep) - в пуле потоков, не в event loop
+        self.executor = executor or BlockingExecutor()
+        # Длительность проходов цикла мониторинга (tick/resources) для /debug
+        self.instrumentation = instrumentation or Instrumentation()
+        # Снимок для /status и /resources обновляется фоново, обработчики его только читают
+        self.state_cache = state_cache or StateCache()
+        self.state_cache.register(STATE_RESOURCES, self.collect_system_stats)
         
     async def start(self):
         """Запуск мониторинга ресурсов"""
         logger.info("Запуск мониторинга ресурсов...")
+        await self.cpu_sampler.start()
         # Запускаем периодический мониторинг
         self._monitoring_task = asyncio.create_task(self._monitoring_loop())
         
@@ -67,17 +120,9 @@ class ResourceMonitor:
         while True:
             try:
                 await asyncio.sleep(self.monitoring_interval)
-                
-                # Проверяем критическое состояние памяти
-                if self.check_memory_critical():
-                    logger.warning("Обнаружено критическое состояние памяти!")
-                    self.emergency_memory_cleanup()
-                
-                # Проверяем критическое использование CPU
-                cpu_critical, cpu_percent = self.check_cpu_critical()
-                if cpu_critical:
-                    logger.warning("Обнаружено критическое использование CPU!")
-                    # CPU уведомление уже отправляется в check_cpu_critical()
+                # Экстренная очистка ждет завершения процесса и sysctl - до минуты
+                with self.instrumentation.measure('tick/resources'):
+                    await self.executor.run(self._check_resources, timeout=120)
                 
             except asyncio.CancelledError:
                 logger.info("Цикл мониторинга остановлен")
@@ -86,6 +131,19 @@ class ResourceMonitor:
                 logger.error(f"Ошибка в цикле мониторинга: {e}")
                 await asyncio.sleep(10)  # Пауза перед повтором при ошибке
         
+    def _check_resources(self):
+        """Одна проверка памяти и CPU (выполняется в пуле потоков)"""
+        # Проверяем критическое состояние памяти
+        if self.check_memory_critical():
+            logger.warning("Обнаружено критическое состояние памяти!")
+            self.emergency_memory_cleanup()
+        
+        # Проверяем критическое использование CPU
+        cpu_critical, cpu_percent = self.check_cpu_critical()
+        if cpu_critical:
+            logger.warning("Обнаружено критическое использование CPU!")
+            # CPU уведомление уже отправляется в check_cpu_critical()
+        
     async def stop(self):
         """Остановка мониторинга ресурсов"""
         logger.info("Остановка мониторинга ресурсов...")
@@ -95,11 +153,16 @@ class ResourceMonitor:
                 await self._monitoring_task
             except asyncio.CancelledError:
                 pass
+        await self.cpu_sampler.stop()
         
     async def get_system_stats(self) -> Dict:
-        """Получение статистики системы"""
-        # CPU статистика
-        cpu_percent = psutil.cpu_percent(interval=1)
+        """Получение статистики системы (проход по процессам - в пуле потоков)"""
+        return await self.executor.run(self.collect_system_stats)
+        
+    def collect_system_stats(self) -> Dict:
+        """Синхронный сбор статистики системы - источник снимка ресурсов для StateCache"""
+        # CPU статистика (последний фоновый замер)
+        cpu_percent = self.cpu_sampler.percent
         
         # Память
         memory = psutil.virtual_memory()
@@ -122,51 +185,81 @@ class ResourceMonitor:
     
     def _get_top_memory_processes(self, limit: int = 10) -> List[ProcessInfo]:
         """Получение топ процессов по использованию памяти"""
+        if not self._scanner:
+            return self._get_top_memory_processes_psutil(limit)
+
         processes = []
-        
-        def safe_encode_string(s: str) -> str:
-            """Безопасное кодирование строки для избежания ошибок с surrogates"""
-            if not s:
-                return ""
-            try:
-                # Удаляем проблемные символы и кодируем в UTF-8
-                return s.encode('utf-8', errors='ignore').decode('utf-8')
-            except Exception:
-                return "unknown"
+        try:
+            samples = self.process_table.snapshot().samples
+            for sample in self._scanner.select_top_memory(samples, top_k=limit):
+                entry = self._classify_process(
+                    (sample.pid, sample.start_ticks),
+                    sample.name,
+                    sample.read_cmdline,
+                )
+                bot_name = self._resolve_bot_name(sample.pid, sample.ppid, entry)
+
+                processes.append(ProcessInfo(
+                    pid=sample.pid,
+                    name=f"🤖 {bot_name}" if bot_name else entry.name,
+                    username=sample.username,
+                    cpu_percent=self.process_pool.cpu_percent_from_times(
+                        (sample.pid, sample.start_ticks), sample.cpu_time, sample.age
+                    ),
+                    memory_mb=sample.memory_bytes / 1024 / 1024,
+                    cmdline=entry.cmdline,
+                    ppid=sample.ppid,
+                ))
+
+            # Забываем классификации и CPU замеры завершившихся процессов
+            alive_keys = [(s.pid, s.start_ticks) for s in samples]
+            self._classification_cache.retain(alive_keys)
+            self.process_pool.prune(alive_keys)
+            logger.debug(f"Кэш классификации процессов: {self._classification_cache.stats()}")
+        except Exception as e:
+            logger.error(f"Ошибка при получении списка процессов: {e}")
+
+        return processes
+
+    def _get_top_memory_processes_psutil(self, limit: int = 10) -> List[ProcessInfo]:
+        """Получение топ процессов через psutil (fallback без /proc)"""
+        processes = []
+        alive_keys = []
         
         try:
-            for proc in psutil.process_iter(['pid', 'ppid', 'name', 'username', 'memory_info', 'cmdline']):
+            for proc in psutil.process_iter(['pid', 'ppid', 'name', 'username', 'memory_info', 'cmdline',
+                                             'create_time', 'cpu_times']):
                 try:
                     try:
                         memory_mb = proc.memory_full_info().uss / 1024 / 1024
                     except (psutil.AccessDenied, AttributeError):
                         memory_mb = proc.info['memory_info'].rss / 1024 / 1024
                     
-                    # Безопасно обрабатываем имя процесса и командную строку
-                    process_name = safe_encode_string(proc.info['name'] or "unknown")
-                    cmdline_list = proc.info['cmdline'] or []
-                    cmdline = safe_encode_string(' '.join(str(arg) for arg in cmdline_list))
-                    
-                    # Пытаемся определить имя бота для Python процессов
-                    bot_name = self._get_bot_name_for_process(
-                        proc.info['pid'],
-                        proc.info.get('ppid'),
-                        process_name,
-                        cmdline,
+                    # Безопасно обрабатываем имя процесса и командную строку (с кэшем)
+                    key = process_key(proc.info['pid'], proc.info['create_time'])
+                    alive_keys.append(key)
+                    entry = self._classify_process(
+                        key,
+                        proc.info['name'] or "unknown",
+                        lambda: proc.info['cmdline'] or [],
                     )
-                    if bot_name:
-                        process_name = f"🤖 {bot_name}"
+                    bot_name = self._resolve_bot_name(proc.info['pid'], proc.info.get('ppid'), entry)
                     
-                    # Получаем CPU процент для процесса
-                    cpu_percent = proc.cpu_percent()
+                    # CPU процент по дельте с прошлого скана (пул хранит предыдущие CPU времена)
+                    cpu_times = proc.info['cpu_times']
+                    cpu_percent = self.process_pool.cpu_percent_from_times(
+                        key,
+                        cpu_times.user + cpu_times.system if cpu_times else 0.0,
+                        time.time() - proc.info['create_time'],
+                    )
                     
                     process_info = ProcessInfo(
                         pid=proc.info['pid'],
-                        name=process_name,
+                        name=f"🤖 {bot_name}" if bot_name else entry.name,
                         username=proc.info['username'],
                         cpu_percent=cpu_percent,
                         memory_mb=memory_mb,
-                        cmdline=cmdline[:100],
+                        cmdline=entry.cmdline,
                         ppid=proc.info.get('ppid', 0) or 0,
                     )
                     
@@ -175,6 +268,8 @@ class ResourceMonitor:
                 except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
                     continue
                     
+            self._classification_cache.retain(alive_keys)
+            self.process_pool.prune(alive_keys)
         except Exception as e:
             logger.error(f"Ошибка при получении списка процессов: {e}")
             
@@ -182,6 +277,38 @@ class ResourceMonitor:
         processes.sort(key=lambda x: x.memory_mb, reverse=True)
         return processes[:limit]
     
+    def _classify_process(
+        self,
+        key: Tuple[int, float],
+        raw_name: str,
+        read_cmdline: Callable[[], List[str]],
+    ) -> ProcessClassification:
+        """Очистка имени/командной строки и поиск бота по cmdline с кэшем по (pid, start)"""
+        entry = self._classification_cache.get(key, raw_name)
+        if entry is not None:
+            return entry
+
+        process_name = _safe_encode_string(raw_name or "unknown")
+        cmdline = _safe_encode_string(' '.join(str(arg) for arg in read_cmdline()))
+        cmdline_bot = None
+        if _is_python_process(process_name):
+            cmdline_bot = self._get_bot_name_from_cmdline(key[0], cmdline)
+
+        entry = ProcessClassification(
+            raw_name=raw_name,
+            name=process_name,
+            cmdline=cmdline[:100],
+            cmdline_bot=cmdline_bot,
+        )
+        self._classification_cache.put(key, entry)
+        return entry
+
+    def _resolve_bot_name(self, pid: int, ppid: Optional[int], entry: ProcessClassification) -> Optional[str]:
+        """Имя бота: PID файлы (могут меняться) имеют приоритет над кэшированным cmdline"""
+        if not _is_python_process(entry.name):
+            return None
+        return self._get_bot_name_from_pid_files(pid, ppid) or entry.cmdline_bot
+
     def _get_bot_name_for_process(
         self,
         pid: int,
@@ -192,39 +319,39 @@ class ResourceMonitor:
         """Определение имени бота по процессу"""
         try:
             # Проверяем только Python процессы
-            if process_name.lower() not in ['python', 'python3', 'python3.10', 'python3.11', 'python3.12']:
+            if not _is_python_process(process_name):
                 return None
-            
-            # Метод 1: Проверяем PID файлы ботов в /tmp
-            tmp_dir = Path('/tmp')
+            return (self._get_bot_name_from_pid_files(pid, ppid)
+                    or self._get_bot_name_from_cmdline(pid, cmdline))
+        except Exception as e:
+            logger.debug(f"Ошибка при определении имени бота для PID {pid}: {e}")
+            return None
 
-            pid_to_bot: Dict[int, str] = {}
-            for pid_file in tmp_dir.glob('*.pid'):
-                try:
-                    with open(pid_file, 'r') as f:
-                        file_pid = int(f.read().strip())
-                        pid_to_bot[file_pid] = pid_file.stem  # Имя файла без расширения
-                except (ValueError, IOError):
-                    continue
+    def _get_bot_name_from_pid_files(self, pid: int, ppid: Optional[int]) -> Optional[str]:
+        """Метод 1: Проверяем PID файлы ботов в /tmp (через общий реестр)"""
+        # Direct PID match must take priority over PPID match across ALL pid files
+        bot_name = self.pid_registry.bot_for_pid(pid)
+        if bot_name:
+            logger.debug(f"Найден бот {bot_name} по PID файлу для процесса {pid}")
+            return bot_name
 
-            # Direct PID match must take priority over PPID match across ALL pid files
-            bot_name = pid_to_bot.get(pid)
-            if bot_name:
-                logger.debug(f"Найден бот {bot_name} по PID файлу для процесса {pid}")
-                return bot_name
+        if ppid is not None:
+            parent_bot_name = self.pid_registry.bot_for_pid(ppid)
+            if parent_bot_name:
+                logger.debug(f"Найден бот {parent_bot_name} по PID файлу для PPID {ppid} (PID={pid})")
+                return f"{parent_bot_name}_sub"
 
-            if ppid is not None:
-                parent_bot_name = pid_to_bot.get(ppid)
-                if parent_bot_name:
-                    logger.debug(f"Найден бот {parent_bot_name} по PID файлу для PPID {ppid} (PID={pid})")
-                    return f"{parent_bot_name}_sub"
+        return None
 
-            # Метод 2: Определяем сам SaldoranSentinelBot (systemd service)
+    def _get_bot_name_from_cmdline(self, pid: int, cmdline: str) -> Optional[str]:
+        """Метод 2: Определение имени бота по командной строке"""
+        try:
+            # Определяем сам SaldoranSentinelBot (systemd service)
             # Обычно запускается как: /home/SaldoranSentinelBot/venv/bin/python -m src.main
             if "SaldoranSentinelBot" in cmdline and re.search(r'(^|\s)-m\s+src\.main(\s|$)', cmdline):
                 return "sentinel"
 
-            # Метод 2: Анализируем командную строку для поиска имени бота
+            # Анализируем командную строку для поиска имени бота
             # Ищем в test_bot директории
             match = re.search(r'/test_bot/([^/]+)/', cmdline)
             if match:
@@ -347,7 +474,6 @@ class ResourceMonitor:
             # Отправляем уведомление в Telegram если включено
             if Config.NOTIFY_RAM_ENABLED and self.telegram_bot:
                 try:
-                    loop = asyncio.get_event_loop()
                     message = (
                         f"💾 Критическое использование RAM!\n\n"
                         f"📊 Использовано: {memory_percent:.1f}%\n"
@@ -355,7 +481,7 @@ class ResourceMonitor:
                         f"🆓 Доступно: {available_mb:.1f}MB\n\n"
                         f"🔍 Проверьте процессы командой /resources"
                     )
-                    loop.create_task(self._send_telegram_alert(message))
+                    self._send_telegram_alert(message)
                 except Exception as e:
                     logger.error(f"Ошибка отправки RAM уведомления: {e}")
         
@@ -366,7 +492,7 @@ class ResourceMonitor:
         # Перезагружаем конфиг для актуальных настроек
         Config.reload_config()
         
-        cpu_percent = psutil.cpu_percent(interval=1)
+        cpu_percent = self.cpu_sampler.percent
         is_critical = cpu_percent > Config.CPU_THRESHOLD
         
         if is_critical:
@@ -377,25 +503,24 @@ class ResourceMonitor:
             # Отправляем уведомление в Telegram если включено
             if Config.NOTIFY_CPU_ENABLED and self.telegram_bot:
                 try:
-                    loop = asyncio.get_event_loop()
                     message = (
                         f"🔥 Критическое использование CPU!\n\n"
                         f"📊 Текущее: {cpu_percent:.1f}%\n"
                         f"⚠️ Порог: {Config.CPU_THRESHOLD}%\n\n"
                         f"🔍 Проверьте процессы командой /resources"
                     )
-                    loop.create_task(self._send_telegram_alert(message))
+                    self._send_telegram_alert(message)
                 except Exception as e:
                     logger.error(f"Ошибка отправки CPU уведомления: {e}")
         
         return is_critical, cpu_percent
     
-    async def _send_telegram_alert(self, message: str):
-        """Отправка критического уведомления в Telegram"""
+    def _send_telegram_alert(self, message: str):
+        """Постановка критического уведомления в очередь Telegram"""
         if self.telegram_bot:
             try:
                 alert_message = f"🚨 <b>КРИТИЧЕСКОЕ УВЕДОМЛЕНИЕ</b>\n\n{message}"
-                await self.telegram_bot.send_notification(alert_message)
+                self.telegram_bot.notify(alert_message)
             except Exception as e:
                 logger.error(f"Ошибка отправки Telegram уведомления: {e}")
 
@@ -406,11 +531,10 @@ class ResourceMonitor:
         # Отправляем уведомление о начале экстренной очистки
         if self.telegram_bot:
             try:
-                loop = asyncio.get_event_loop()
-                loop.create_task(self._send_telegram_alert(
+                self._send_telegram_alert(
                     "⚠️ Критически мало памяти!\n"
                     "🔧 Запуск экстренной очистки памяти..."
-                ))
+                )
             except Exception as e:
                 logger.error(f"Ошибка отправки уведомления: {e}")
         
@@ -443,7 +567,6 @@ class ResourceMonitor:
         # Отправляем результат в Telegram
         if self.telegram_bot:
             try:
-                loop = asyncio.get_event_loop()
                 if available_after_mb >= self.min_free_ram_mb:
                     logger.info("Экстренная очистка памяти УСПЕШНА!")
                     result_message = (
@@ -462,7 +585,7 @@ class ResourceMonitor:
                         f"⚠️ Требуется ручное вмешательство!"
                     )
                 
-                loop.create_task(self._send_telegram_alert(result_message))
+                self._send_telegram_alert(result_message)
             except Exception as e:
                 logger.error(f"Ошибка отправки результата: {e}")
         
@@ -0,0 +1,142 @@
+"""
+Политики автоперезапуска ботов для SaldoranBotSentinel
+"""
+
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .config import Config
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+POLICY_ALWAYS = 'always'
+POLICY_ON_FAILURE = 'on-failure'
+POLICY_NEVER = 'never'
+POLICIES = (POLICY_ALWAYS, POLICY_ON_FAILURE, POLICY_NEVER)
+
+ACTION_RESTART = 'restart'
+ACTION_SKIP = 'skip'
+ACTION_INTENTIONAL = 'intentional'
+ACTION_GIVE_UP = 'give_up'
+
+# Сколько секунд отметка "остановлен вручную" ждет обнаружения остановки
+INTENTIONAL_STOP_TTL = 300
+
+
+@dataclass
+class RestartDecision:
+    """Решение по завершившемуся боту"""
+    action: str
+    policy: str
+    attempt: int = 0
+    delay: float = 0.0
+    # Коды выхода всех падений текущей серии (для сводного уведомления)
+    exit_codes: List[Optional[int]] = field(default_factory=list)
+
+
+@dataclass
+class _BotRestartState:
+    """Серия перезапусков одного бота"""
+    restarts: Deque[float] = field(default_factory=deque)
+    exit_codes: List[Optional[int]] = field(default_factory=list)
+    crash_loop: bool = False
+
+
+def parse_overrides(raw: str) -> Dict[str, str]:
+    """Разбор RESTART_POLICY_OVERRIDES вида "bot1:always,bot2:never" """
+    overrides = {}
+    for item in raw.split(','):
+        if not item.strip():
+            continue
+        bot_name, _, policy = item.partition(':')
+        policy = policy.strip().lower()
+        if policy not in POLICIES:
+            logger.warning(f"Неизвестная политика перезапуска '{policy}' для бота {bot_name.strip()}")
+            continue
+        overrides[bot_name.strip()] = policy
+    return overrides
+
+
+class RestartPolicyEngine:
+    """Решает, перезапускать ли упавший бот: политика, backoff с jitter и защита от цикла падений"""
+
+    def __init__(self):
+        self._states: Dict[str, _BotRestartState] = {}
+        # bot_name -> (monotonic время отметки, PID останавливаемого процесса или None)
+        self._intentional_stops: Dict[str, Tuple[float, Optional[int]]] = {}
+
+    def policy_for(self, bot_name: str) -> str:
+        """Политика бота: персональная из RESTART_POLICY_OVERRIDES или общая RESTART_POLICY"""
+        policy = parse_overrides(Config.RESTART_POLICY_OVERRIDES).get(bot_name, Config.RESTART_POLICY.lower())
+        return policy if policy in POLICIES else POLICY_NEVER
+
+    def mark_intentional_stop(self, bot_name: str, pid: Optional[int] = None):
+        """Остановка через Sentinel - завершение процесса pid (любого, если неизвестен) не считается падением"""
+        self._intentional_stops[bot_name] = (time.monotonic(), pid)
+
+    def clear_intentional_stop(self, bot_name: str):
+        """Снятие отметки: остановка не удалась или бот продолжил работу с новым PID"""
+        self._intentional_stops.pop(bot_name, None)
+
+    def _consume_intentional_stop(self, bot_name: str, pid: Optional[int]) -> bool:
+        mark = self._intentional_stops.get(bot_name)
+        if mark is None:
+            return False
+        marked_at, marked_pid = mark
+        if marked_pid is not None and pid is not None and marked_pid != pid:
+            # Завершился другой процесс (например, уже перезапущенный бот) - это падение
+            return False
+        del self._intentional_stops[bot_name]
+        return time.monotonic() - marked_at < INTENTIONAL_STOP_TTL
+
+    def reset(self, bot_name: str):
+        """Сброс серии перезапусков и отметки остановки (например, после ручного запуска)"""
+        self._states.pop(bot_name, None)
+        self._intentional_stops.pop(bot_name, None)
+
+    @staticmethod
+    def backoff_delay(attempt: int) -> float:
+        """Экспоненциальная задержка base * 2^(attempt-1) с ограничением и jitter"""
+        delay = min(Config.RESTART_BACKOFF_MAX, Config.RESTART_BACKOFF_BASE * (2 ** (attempt - 1)))
+        jitter = Config.RESTART_BACKOFF_JITTER
+        return max(0.0, delay * random.uniform(1 - jitter, 1 + jitter))
+
+    def on_exit(self, bot_name: str, exit_code: Optional[int], pid: Optional[int] = None) -> RestartDecision:
+        """Решение по завершению процесса бота pid (exit_code=None - код выхода неизвестен)"""
+        policy = self.policy_for(bot_name)
+
+        if self._consume_intentional_stop(bot_name, pid):
+            self._states.pop(bot_name, None)
+            return RestartDecision(ACTION_INTENTIONAL, policy)
+
+        if policy == POLICY_NEVER or (policy == POLICY_ON_FAILURE and exit_code == 0):
+            self._states.pop(bot_name, None)
+            return RestartDecision(ACTION_SKIP, policy, exit_codes=[exit_code])
+
+        state = self._states.setdefault(bot_name, _BotRestartState())
+        if state.crash_loop:
+            return RestartDecision(ACTION_SKIP, policy, exit_codes=list(state.exit_codes))
+
+        # Перезапуски старше окна не считаются - бот успел поработать стабильно
+        now = time.monotonic()
+        while state.restarts and now - state.restarts[0] > Config.RESTART_WINDOW:
+            state.restarts.popleft()
+        if not state.restarts:
+            state.exit_codes.clear()
+        state.exit_codes.append(exit_code)
+
+        if len(state.restarts) >= Config.RESTART_MAX_RESTARTS:
+            state.crash_loop = True
+            logger.error(f"Бот {bot_name} в цикле падений: {len(state.restarts)} перезапусков "
+                         f"за {Config.RESTART_WINDOW}с, автоперезапуск отключен")
+            return RestartDecision(ACTION_GIVE_UP, policy, len(state.restarts), exit_codes=list(state.exit_codes))
+
+        state.restarts.append(now)
+        attempt = len(state.restarts)
+        delay = self.backoff_delay(attempt)
+        logger.info(f"Бот {bot_name}: политика {policy}, перезапуск #{attempt} через {delay:.1f}с")
+        return RestartDecision(ACTION_RESTART, policy, attempt, delay, list(state.exit_codes))
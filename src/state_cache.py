@@ -0,0 +1,143 @@
+"""
+Кэш снимков состояния (боты, ресурсы) для обработчиков Telegram в SaldoranBotSentinel
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from .config import Config
+from .executor import BlockingExecutor
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+STATE_BOTS = 'bots'
+STATE_RESOURCES = 'resources'
+
+
+@dataclass
+class StateSnapshot:
+    """Результат одного прохода источника"""
+    data: Any
+    taken_at: float  # time.time() момента снятия
+    duration: float  # Сколько занял проход (сек)
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.taken_at
+
+    @property
+    def as_of(self) -> str:
+        """Время снимка для подписи "Данные на" """
+        return datetime.fromtimestamp(self.taken_at).strftime("%H:%M:%S")
+
+
+class StateCache:
+    """Последние снимки состояния, которые фоновый цикл держит свежими.
+
+    Обработчики читают готовый снимок; тяжелый проход (сканирование процессов,
+    git, размеры логов) выполняется в пуле потоков и не блокирует event loop.
+    Одновременные запросы обновления одного источника объединяются.
+    """
+
+    def __init__(self, interval: Optional[float] = None, executor: Optional[BlockingExecutor] = None):
+        self.interval = interval if interval is not None else Config.STATE_REFRESH_INTERVAL
+        self.executor = executor or BlockingExecutor()
+        self._producers: Dict[str, Callable[[], Any]] = {}
+        self._snapshots: Dict[str, StateSnapshot] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, producer: Callable[[], Any]):
+        """Регистрация источника (синхронная функция, вызывается в пуле потоков)"""
+        self._producers[name] = producer
+
+    def get(self, name: str) -> Optional[StateSnapshot]:
+        """Последний снимок без ожидания"""
+        return self._snapshots.get(name)
+
+    async def _produce(self, name: str) -> StateSnapshot:
+        started = time.perf_counter()
+        data = await self.executor.run(self._producers[name], name=f"state_{name}")
+        snapshot = StateSnapshot(data, time.time(), time.perf_counter() - started)
+        self._snapshots[name] = snapshot
+        logger.debug(f"Снимок состояния '{name}' обновлен за {snapshot.duration * 1000:.1f}ms")
+        return snapshot
+
+    def refresh_soon(self, name: str) -> asyncio.Task:
+        """Запуск обновления в фоне (если оно уже идет - возвращается текущая задача)"""
+        task = self._inflight.get(name)
+        if task is None:
+            task = asyncio.create_task(self._produce(name))
+            self._inflight[name] = task
+            task.add_done_callback(lambda done: self._on_refresh_done(name, done))
+        return task
+
+    def _on_refresh_done(self, name: str, task: asyncio.Task):
+        if self._inflight.get(name) is task:
+            del self._inflight[name]
+        if not task.cancelled() and task.exception():
+            logger.error(f"Ошибка обновления снимка состояния '{name}': {task.exception()}")
+
+    async def refresh(self, name: str) -> StateSnapshot:
+        """Обновление с ожиданием результата"""
+        # shield - отмена ожидающего обработчика не прерывает общий проход
+        return await asyncio.shield(self.refresh_soon(name))
+
+    async def latest(self, name: str, max_age: Optional[float] = None, wait: float = 0.0) -> StateSnapshot:
+        """Снимок для обработчика.
+
+        Снимок старше max_age обновляется в фоне; wait - сколько секунд
+        подождать свежий снимок, прежде чем отдать имеющийся.
+        """
+        snapshot = self._snapshots.get(name)
+        if snapshot is None:
+            # Первый запрос до первого прохода фонового цикла
+            return await self.refresh(name)
+
+        if max_age is None:
+            max_age = self.interval
+        if snapshot.age <= max_age:
+            return snapshot
+
+        task = self.refresh_soon(name)
+        if wait > 0:
+            try:
+                return await asyncio.wait_for(asyncio.shield(task), wait)
+            except asyncio.TimeoutError:
+                pass
+            except Exception:
+                pass  # Ошибка уже залогирована - отдаем предыдущий снимок
+        return snapshot
+
+    async def start(self):
+        """Запуск фонового обновления всех источников"""
+        if self._task is None:
+            logger.info(f"Запуск кэша состояния с интервалом {self.interval} секунд")
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def _refresh_loop(self):
+        """Периодическое обновление всех зарегистрированных источников"""
+        while True:
+            try:
+                await asyncio.gather(
+                    *(self.refresh(name) for name in list(self._producers)),
+                    return_exceptions=True
+                )
+                await asyncio.sleep(self.interval)
+            except asyncio.CancelledError:
+                break
+
+    async def stop(self):
+        """Остановка фонового обновления"""
+        tasks = list(self._inflight.values())
+        if self._task:
+            self._task.cancel()
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
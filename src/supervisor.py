@@ -0,0 +1,225 @@
+"""
+Режим супервизора: боты запускаются дочерними процессами стража (SaldoranBotSentinel)
+"""
+
+import asyncio
+import logging
+import os
+import shlex
+import signal
+import time
+from dataclasses import dataclass, field
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from .config import Config
+from .logger import get_logger
+from .pid_registry import PidFileRegistry
+
+logger = get_logger(__name__)
+
+# Файл с командой запуска бота в режиме супервизора (одна строка, как в shell)
+COMMAND_FILE = 'supervisor.cmd'
+LOG_FILE = 'supervisor.log'
+# Строка вывода длиннее буфера потока (64KB) пишется в лог обрезанной до этого размера
+LONG_LINE_KEEP = 8 * 1024
+
+ExitCallback = Callable[[str, int, int], Awaitable[None]]
+
+
+@dataclass
+class SupervisedProcess:
+    """Бот, запущенный как дочерний процесс стража"""
+    bot_name: str
+    command: List[str]
+    process: asyncio.subprocess.Process
+    log_path: Path
+    started_at: float = field(default_factory=time.time)
+    tasks: List[asyncio.Task] = field(default_factory=list)
+
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+
+    @property
+    def is_running(self) -> bool:
+        return self.process.returncode is None
+
+
+class BotSupervisor:
+    """Запуск ботов через asyncio.create_subprocess_exec с потоковой записью логов"""
+
+    def __init__(self, pid_registry: PidFileRegistry, on_exit: Optional[ExitCallback] = None):
+        self.pid_registry = pid_registry
+        self.on_exit = on_exit
+        self._processes: Dict[str, SupervisedProcess] = {}
+        self._shutting_down = False
+
+    @staticmethod
+    def resolve_command(bot_path: Path) -> Optional[List[str]]:
+        """Команда запуска бота на переднем плане.
+
+        1. supervisor.cmd в папке бота;
+        2. main.py через venv/bin/python бота (или python3).
+        Иначе None - бот запускается обычным run_bot.sh.
+        """
+        command_file = bot_path / COMMAND_FILE
+        if command_file.is_file():
+            try:
+                command = shlex.split(command_file.read_text(encoding='utf-8').strip())
+                if command:
+                    return command
+            except (OSError, ValueError) as e:
+                logger.error(f"Не удалось прочитать {command_file}: {e}")
+            return None
+
+        if (bot_path / 'main.py').is_file():
+            venv_python = bot_path / 'venv' / 'bin' / 'python'
+            python = str(venv_python) if os.access(venv_python, os.X_OK) else 'python3'
+            return [python, 'main.py']
+        return None
+
+    def get(self, bot_name: str) -> Optional[SupervisedProcess]:
+        """Работающий дочерний процесс бота"""
+        supervised = self._processes.get(bot_name)
+        if supervised and supervised.is_running:
+            return supervised
+        return None
+
+    def _open_log(self, bot_name: str, log_path: Path) -> logging.Logger:
+        """Отдельный ротируемый лог stdout/stderr бота"""
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        handler = RotatingFileHandler(
+            log_path,
+            maxBytes=Config.SUPERVISOR_LOG_MAX_MB * 1024 * 1024,
+            backupCount=Config.SUPERVISOR_LOG_BACKUPS,
+            encoding='utf-8',
+        )
+        handler.setFormatter(logging.Formatter('%(asctime)s [%(stream)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S'))
+        # Логгер вне иерархии logging - чтобы вывод бота не попадал в лог стража
+        bot_log = logging.Logger(f"supervisor.{bot_name}")
+        bot_log.addHandler(handler)
+        return bot_log
+
+    async def spawn(self, bot_name: str, command: List[str], cwd: Path) -> SupervisedProcess:
+        """Запуск бота дочерним процессом: PID известен сразу"""
+        log_path = cwd / 'logs' / LOG_FILE
+        bot_log = self._open_log(bot_name, log_path)
+
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            cwd=str(cwd),
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True,  # Своя группа процессов - останавливаем бота вместе с детьми
+        )
+        supervised = SupervisedProcess(bot_name, command, process, log_path)
+        self._processes[bot_name] = supervised
+
+        # PID файл - для совместимости с stop_bot.sh и прочими инструментами
+        try:
+            self.pid_registry.write(bot_name, process.pid)
+        except OSError as e:
+            logger.warning(f"Не удалось записать PID файл бота {bot_name}: {e}")
+
+        supervised.tasks = [
+            asyncio.create_task(self._pump(process.stdout, bot_log, 'stdout')),
+            asyncio.create_task(self._pump(process.stderr, bot_log, 'stderr')),
+        ]
+        supervised.tasks.append(asyncio.create_task(self._wait(supervised, bot_log)))
+        logger.info(f"Бот {bot_name} запущен супервизором (PID: {process.pid}): {' '.join(command)}")
+        return supervised
+
+    @staticmethod
+    async def _pump(stream: asyncio.StreamReader, bot_log: logging.Logger, stream_name: str):
+        """Построчная перекачка вывода бота в его лог"""
+        while True:
+            try:
+                line = await stream.readuntil(b'\n')
+            except asyncio.IncompleteReadError as e:
+                # Конец потока - последняя строка без перевода строки
+                line = e.partial
+            except asyncio.LimitOverrunError as e:
+                # readuntil оставляет данные в буфере (readline их бы отбросил)
+                line = await BotSupervisor._read_long_line(stream, e.consumed)
+            if not line:
+                break
+            bot_log.info(line.decode('utf-8', errors='replace').rstrip('\n'), extra={'stream': stream_name})
+
+    @staticmethod
+    async def _read_long_line(stream: asyncio.StreamReader, available: int) -> bytes:
+        """Строка длиннее буфера потока: начало строки и отметка о полном размере"""
+        head = await stream.readexactly(available)
+        total = len(head)
+        while True:
+            try:
+                total += len(await stream.readuntil(b'\n'))
+                break
+            except asyncio.IncompleteReadError as e:
+                total += len(e.partial)
+                break
+            except asyncio.LimitOverrunError as e:
+                total += len(await stream.readexactly(e.consumed))
+        if total <= LONG_LINE_KEEP:
+            return head
+        return head[:LONG_LINE_KEEP] + f" ... [строка обрезана, {total} байт]".encode()
+
+    async def _wait(self, supervised: SupervisedProcess, bot_log: logging.Logger):
+        """Ожидание завершения бота и получение кода выхода"""
+        returncode = await supervised.process.wait()
+        await asyncio.gather(*supervised.tasks[:2], return_exceptions=True)
+        bot_log.info(f"Процесс завершился с кодом {returncode}", extra={'stream': 'sentinel'})
+        for handler in bot_log.handlers:
+            handler.close()
+
+        if self.pid_registry.get_pid(supervised.bot_name) == supervised.pid:
+            try:
+                self.pid_registry.remove(supervised.bot_name)
+            except OSError as e:
+                logger.warning(f"Не удалось удалить PID файл бота {supervised.bot_name}: {e}")
+
+        log = logger.info if returncode == 0 else logger.warning
+        log(f"Бот {supervised.bot_name} (PID: {supervised.pid}) завершился с кодом {returncode}")
+        if self.on_exit and not self._shutting_down:
+            try:
+                await self.on_exit(supervised.bot_name, supervised.pid, returncode)
+            except Exception as e:
+                logger.error(f"Ошибка обработки завершения бота {supervised.bot_name}: {e}")
+
+    @staticmethod
+    def describe_returncode(returncode: int) -> str:
+        """Код выхода в читаемом виде (отрицательный - завершен сигналом)"""
+        if returncode < 0:
+            try:
+                return f"сигнал {signal.Signals(-returncode).name}"
+            except ValueError:
+                return f"сигнал {-returncode}"
+        return str(returncode)
+
+    async def stop(self, bot_name: str, timeout: float = 10) -> bool:
+        """SIGTERM группе процессов бота, затем SIGKILL по таймауту"""
+        supervised = self.get(bot_name)
+        if supervised is None:
+            return True
+
+        for sig, wait_timeout in ((signal.SIGTERM, timeout), (signal.SIGKILL, 5)):
+            try:
+                os.killpg(supervised.pid, sig)
+            except ProcessLookupError:
+                return True
+            try:
+                await asyncio.wait_for(supervised.process.wait(), wait_timeout)
+                return True
+            except asyncio.TimeoutError:
+                logger.warning(f"Бот {bot_name} не завершился после {sig.name}")
+        return False
+
+    async def shutdown(self):
+        """Остановка всех дочерних ботов при завершении стража (без уведомлений о падении)"""
+        self._shutting_down = True
+        running = [name for name in self._processes if self.get(name)]
+        if running:
+            logger.info(f"Остановка ботов под супервизором: {', '.join(running)}")
+            await asyncio.gather(*(self.stop(name) for name in running), return_exceptions=True)
@@ -1,32 +1,117 @@
 import asyncio
+import functools
+import html
 import os
 import re
+import secrets
 import subprocess
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes
 from telegram.constants import ParseMode
 
 from .config import Config
+from .log_reader import find_log_file, grep_logs, parse_day, parse_window, tail_lines
 from .logger import get_logger
-from .bot_manager import BotManager
+from .bot_manager import BotManager, BulkResult
+from .executor import BlockingExecutor
+from .instrumentation import METRIC_LOOP_LAG, Instrumentation, LatencySummary
+from .notifier import NotificationQueue
 from .resource_monitor import ResourceMonitor
+from .state_cache import STATE_BOTS, STATE_RESOURCES, StateCache, StateSnapshot
 
 logger = get_logger(__name__)
 
+# Не чаще одного редактирования сообщения с прогрессом массовой операции (сек)
+BULK_PROGRESS_INTERVAL = 1.5
+
+# Кнопка "Обновить": снимок моложе REFRESH_MAX_AGE отдается сразу,
+# иначе свежий снимок ждем не дольше REFRESH_WAIT (сек), затем показываем имеющийся
+REFRESH_MAX_AGE = 1.0
+REFRESH_WAIT = 0.3
+
+# /logs: строк по умолчанию и максимум, совпадений для grep, лимит сообщения и длины одной строки
+LOGS_DEFAULT_LINES = 20
+LOGS_MAX_LINES = 200
+LOGS_GREP_LIMIT = 30
+LOG_MESSAGE_LIMIT = 4000
+LOG_LINE_MAX = 500
+
+# Кнопки с параметром (имя бота, порог) учитываются в метриках по префиксу
+CALLBACK_METRIC_PREFIXES = (
+    'bot_start_', 'bot_stop_', 'bot_force_restart_', 'bot_info_',
+    'cpu_threshold_', 'ram_threshold_', 'log_level_',
+)
+
+BULK_ACTION_TITLES = {
+    'start': "▶️ Запуск всех ботов",
+    'stop': "⏹ Остановка всех ботов",
+    'restart': "🔁 Перезапуск всех ботов",
+}
+
+
+async def start_updater(app: Application, config: Config):
+    """Запуск получения обновлений: long polling или webhook (TELEGRAM_MODE)"""
+    if config.TELEGRAM_MODE != 'webhook':
+        # start_polling сам снимает webhook, оставшийся от прошлого запуска
+        await app.updater.start_polling()
+        return
+
+    if not config.WEBHOOK_URL:
+        raise ValueError("WEBHOOK_URL не установлен для режима webhook")
+    # Без заданного секрета генерируем новый на каждый запуск: запросы без
+    # заголовка X-Telegram-Bot-Api-Secret-Token отклоняются
+    secret_token = config.WEBHOOK_SECRET or secrets.token_urlsafe(32)
+    await app.updater.start_webhook(
+        listen=config.WEBHOOK_LISTEN,
+        port=config.WEBHOOK_PORT,
+        url_path=config.WEBHOOK_PATH,
+        webhook_url=config.WEBHOOK_URL,
+        secret_token=secret_token,
+        # TLS на самом слушателе нужен только без reverse proxy перед ним
+        cert=config.WEBHOOK_CERT or None,
+        key=config.WEBHOOK_KEY or None,
+        bootstrap_retries=3,
+    )
+    logger.info(f"Webhook слушает {config.WEBHOOK_LISTEN}:{config.WEBHOOK_PORT}/{config.WEBHOOK_PATH}, "
+                f"адрес для Telegram: {config.WEBHOOK_URL}")
+
+
 class TelegramBot:
-    def __init__(self, config: Config, bot_manager: BotManager, resource_monitor: ResourceMonitor):
+    def __init__(
+        self,
+        config: Config,
+        bot_manager: BotManager,
+        resource_monitor: ResourceMonitor,
+        state_cache: Optional[StateCache] = None,
+        executor: Optional[BlockingExecutor] = None,
+        instrumentation: Optional[Instrumentation] = None,
+    ):
         self.config = config
         self.bot_manager = bot_manager
         self.resource_monitor = resource_monitor
+        # Снимки состояния: /status, /bots и /resources не сканируют систему сами
+        self.state_cache = state_cache
+        # Блокирующие вызовы (systemctl, файлы, /proc) выполняются в общем пуле потоков
+        self.executor = executor
+        # Гистограммы задержек обработчиков (cmd/*, cb/*) и event loop для /debug
+        self.instrumentation = instrumentation or Instrumentation()
+        # Все уведомления уходят через одну очередь с лимитом частоты и сводками
+        self.notifier = NotificationQueue(self._send_message)
+        # Журнал уведомлений (SQLite) принадлежит потоку event loop - из других потоков только через него.
+        # Сервис создается внутри работающего loop, до start() уведомления уже могут приходить из пула
+        self._loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
         
         # Application с post_init
         self.app: Application = (
             Application.builder()
             .token(config.TELEGRAM_BOT_TOKEN)
             .post_init(self._post_init)
+            # Долгие операции (массовый перезапуск) не блокируют остальные команды
+            .concurrent_updates(True)
             .build()
         )
         
@@ -36,16 +121,38 @@ class TelegramBot:
     def _register_handlers(self):
         """Регистрация всех обработчиков команд и callback'ов"""
         # Команды
-        self.app.add_handler(CommandHandler("start", self._cmd_start))
-        self.app.add_handler(CommandHandler("help", self._cmd_help))
-        self.app.add_handler(CommandHandler("status", self._cmd_status))
-        self.app.add_handler(CommandHandler("bots", self._cmd_bots))
-        self.app.add_handler(CommandHandler("resources", self._cmd_resources))
-        self.app.add_handler(CommandHandler("setup", self._cmd_setup))
-        self.app.add_handler(CommandHandler("logs", self._cmd_logs))
+        commands = {
+            "start": self._cmd_start,
+            "help": self._cmd_help,
+            "status": self._cmd_status,
+            "bots": self._cmd_bots,
+            "resources": self._cmd_resources,
+            "setup": self._cmd_setup,
+            "logs": self._cmd_logs,
+            "botlogs": self._cmd_botlogs,
+            "debug": self._cmd_debug,
+        }
+        for command, handler in commands.items():
+            self.app.add_handler(CommandHandler(command, self._timed(handler, f"cmd/{command}")))
         
         # Callback обработчики
-        self.app.add_handler(CallbackQueryHandler(self._handle_callback))
+        self.app.add_handler(CallbackQueryHandler(self._timed(self._handle_callback)))
+        
+    def _timed(self, handler, metric: Optional[str] = None):
+        """Обработчик с замером длительности (для кнопок имя метрики - по callback_data)"""
+        @functools.wraps(handler)
+        async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
+            name = metric or self._callback_metric(update.callback_query.data or '')
+            with self.instrumentation.measure(name):
+                return await handler(update, context)
+        return wrapper
+        
+    @staticmethod
+    def _callback_metric(data: str) -> str:
+        for prefix in CALLBACK_METRIC_PREFIXES:
+            if data.startswith(prefix):
+                return f"cb/{prefix}*"
+        return f"cb/{data}"
         
     async def _post_init(self, app: Application):
         """Инициализация после создания приложения"""
@@ -56,8 +163,9 @@ class TelegramBot:
         try:
             logger.info("Запуск Telegram бота...")
             await self.app.initialize()
-            await self.app.updater.start_polling()
+            await start_updater(self.app, self.config)
             await self.app.start()
+            self.notifier.start()
             logger.info("Telegram бот успешно запущен")
         except Exception as e:
             logger.error(f"Ошибка при запуске Telegram бота: {e}")
@@ -67,6 +175,8 @@ class TelegramBot:
         """Остановка Telegram бота"""
         try:
             logger.info("Остановка Telegram бота...")
+            # Досылаем накопленные уведомления, пока бот еще инициализирован
+            await self.notifier.stop()
             await self.app.updater.stop()
             await self.app.stop()
             await self.app.shutdown()
@@ -78,13 +188,9 @@ class TelegramBot:
         """Отправка уведомления о запуске"""
         try:
             # Получаем список обнаруженных ботов
-            available_bots = self.bot_manager.discover_bots()
-            running_bots = []
-            
-            for bot_name in available_bots:
-                bot_info = self.bot_manager.get_bot_info(bot_name)
-                if bot_info and bot_info.is_running:
-                    running_bots.append(bot_name)
+            bots_snapshot = await self.state_cache.latest(STATE_BOTS)
+            available_bots = [bot_info.name for bot_info in bots_snapshot.data]
+            running_bots = [bot_info.name for bot_info in bots_snapshot.data if bot_info.is_running]
             
             message = (
                 f"✅ <b>SaldoranSentinelBot запущен</b>\n\n"
@@ -125,16 +231,36 @@ class TelegramBot:
             logger.error(f"Ошибка при отправке уведомления о завершении: {e}")
             
     async def send_notification(self, message: str):
-        """Отправка уведомления администратору"""
+        """Отправка уведомления администратору (через очередь, без ожидания доставки)"""
+        self.notify(message)
+        
+    def notify(self, message: str):
+        """Постановка уведомления в очередь из синхронного кода (в том числе из потоков пула)"""
         try:
-            await self.app.bot.send_message(
-                chat_id=self.config.TELEGRAM_ADMIN_ID,
-                text=message,
-                parse_mode=ParseMode.HTML
-            )
-        except Exception as e:
-            logger.error(f"Ошибка при отправке уведомления: {e}")
+            in_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            in_loop = False
+        if in_loop:
+            self.notifier.enqueue(message)
+        else:
+            self._loop.call_soon_threadsafe(self.notifier.enqueue, message)
+        
+    async def _send_message(self, message: str):
+        """Фактическая отправка сообщения администратору (вызывается очередью)"""
+        await self.app.bot.send_message(
+            chat_id=self.config.TELEGRAM_ADMIN_ID,
+            text=message,
+            parse_mode=ParseMode.HTML
+        )
             
+    async def _run_command(self, command: List[str], timeout: float) -> subprocess.CompletedProcess:
+        """subprocess.run в пуле потоков (таймаут пула чуть больше таймаута команды)"""
+        return await self.executor.run(
+            functools.partial(subprocess.run, command, capture_output=True, text=True, timeout=timeout),
+            name=command[1] if command[0] == 'sudo' else command[0],
+            timeout=timeout + 5,
+        )
+        
     def _is_admin(self, user_id: int) -> bool:
         """Проверка прав администратора"""
         return user_id == self.config.TELEGRAM_ADMIN_ID
@@ -253,7 +379,11 @@ class TelegramBot:
             "/bots - Управление ботами\n"
             "/resources - Мониторинг ресурсов\n"
             "/setup - Настройки и управление\n"
-            "/logs - Просмотр логов\n"
+            "/logs [N] - Последние записи лога\n"
+            "/logs grep [6h|2d] шаблон - Поиск по логам и архивам\n"
+            "/logs ДД.ММ.ГГГГ [N] - Лог за день\n"
+            "/botlogs бот [N] - Последние строки логов бота\n"
+            "/debug - Задержки event loop и обработчиков\n"
         )
         await update.message.reply_text(message, parse_mode=ParseMode.HTML)
         
@@ -263,9 +393,13 @@ class TelegramBot:
             return
             
         try:
-            # Получаем статус системы
-            system_stats = await self.resource_monitor.get_system_stats()
-            available_bots = self.bot_manager.discover_bots()
+            # Статус системы из последних снимков
+            resources_snapshot, bots_snapshot = await asyncio.gather(
+                self.state_cache.latest(STATE_RESOURCES),
+                self.state_cache.latest(STATE_BOTS),
+            )
+            system_stats = resources_snapshot.data
+            available_bots = bots_snapshot.data
             
             message = (
                 f"📊 <b>Статус системы</b>\n\n"
@@ -278,73 +412,130 @@ class TelegramBot:
             
             if available_bots:
                 message += "\n<b>Доступные боты:</b>\n"
-                for bot_name in available_bots:
-                    message += f"• {bot_name}\n"
+                for bot_info in available_bots:
+                    message += f"• {bot_info.name}\n"
+            
+            oldest = min(resources_snapshot, bots_snapshot, key=lambda snapshot: snapshot.taken_at)
+            message += f"\n<i>Данные на: {oldest.as_of}</i>"
                     
         except Exception as e:
             message = f"❌ Ошибка получения статуса: {e}"
             
         await update.message.reply_text(message, parse_mode=ParseMode.HTML)
         
-    async def _cmd_bots(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Команда /bots"""
-        if not self._is_admin(update.effective_user.id):
-            return
-            
-        try:
-            available_bots = self.bot_manager.discover_bots()
-            
-            # Получаем информацию о всех ботах и определяем запущенные
-            running_bots = []
-            for bot_name in available_bots:
-                bot_info = self.bot_manager.get_bot_info(bot_name)
-                if bot_info and bot_info.is_running:
-                    running_bots.append(bot_name)
+    def _build_bots_view(self, snapshot: StateSnapshot) -> Tuple[str, InlineKeyboardMarkup]:
+        """Сообщение и клавиатура /bots из снимка списка ботов"""
+        bots_info = snapshot.data
+        running_count = sum(1 for bot_info in bots_info if bot_info.is_running)
+        keyboard = []
+        
+        # Кнопки для каждого бота
+        for bot_info in bots_info:
+            bot_name = bot_info.name
+            is_running = bot_info.is_running
+            status_icon = "🟢" if is_running else "🔴"
+            action = "stop" if is_running else "start"
+            action_text = "Остановить" if is_running else "Запустить"
             
-            keyboard = []
+            # Создаем строку кнопок для бота
+            bot_row = [
+                InlineKeyboardButton(
+                    f"{status_icon} {bot_name}",
+                    callback_data=f"bot_info_{bot_name}"
+                ),
+                InlineKeyboardButton(
+                    action_text,
+                    callback_data=f"bot_{action}_{bot_name}"
+                )
+            ]
             
-            # Кнопки для каждого бота
-            for bot_name in available_bots:
-                is_running = bot_name in running_bots
-                status_icon = "🟢" if is_running else "🔴"
-                action = "stop" if is_running else "start"
-                action_text = "Остановить" if is_running else "Запустить"
-                
-                # Создаем строку кнопок для бота
-                bot_row = [
+            # Добавляем кнопку Force Restart для запущенных ботов в ту же строку
+            if is_running:
+                bot_row.append(
                     InlineKeyboardButton(
-                        f"{status_icon} {bot_name}",
-                        callback_data=f"bot_info_{bot_name}"
-                    ),
-                    InlineKeyboardButton(
-                        action_text,
-                        callback_data=f"bot_{action}_{bot_name}"
-                    )
-                ]
-                
-                # Добавляем кнопку Force Restart для запущенных ботов в ту же строку
-                if is_running:
-                    bot_row.append(
-                        InlineKeyboardButton(
-                            "💥 Force Restart",
-                            callback_data=f"bot_force_restart_{bot_name}"
-                        )
+                        "💥 Force Restart",
+                        callback_data=f"bot_force_restart_{bot_name}"
                     )
-                
-                keyboard.append(bot_row)
-                
-            # Кнопка обновления
-            keyboard.append([
-                InlineKeyboardButton("🔄 Обновить", callback_data="bots_refresh")
-            ])
+                )
             
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            keyboard.append(bot_row)
             
-            message = (
-                f"🤖 <b>Управление ботами</b>\n\n"
-                f"Найдено ботов: {len(available_bots)}\n"
-                f"Запущено: {len(running_bots)}\n"
+        # Массовые операции и кнопка обновления
+        keyboard.append(self._bulk_actions_row())
+        keyboard.append([
+            InlineKeyboardButton("🔄 Обновить", callback_data="bots_refresh")
+        ])
+        
+        message = (
+            f"🤖 <b>Управление ботами</b>\n\n"
+            f"Найдено ботов: {len(bots_info)}\n"
+            f"Запущено: {running_count}\n"
+            f"<i>Данные на: {snapshot.as_of}</i>"
+        )
+        return message, InlineKeyboardMarkup(keyboard)
+        
+    def _build_resources_view(self, snapshot: StateSnapshot, detailed: bool = False) -> Tuple[str, InlineKeyboardMarkup]:
+        """Сообщение и клавиатура /resources из снимка ресурсов"""
+        stats = snapshot.data
+        title = "Мониторинг ресурсов - Подробно" if detailed else "Мониторинг ресурсов"
+        message = (
+            f"📊 <b>{title}</b>\n\n"
+            f"🖥️ <b>Система:</b>\n"
+            f"CPU: {stats['cpu_percent']:.1f}%\n"
+            f"RAM: {stats['memory_percent']:.1f}%\n"
+            f"Доступно RAM: {stats['memory_available_mb']:.0f}MB\n"
+            f"Всего RAM: {stats['memory_total_mb']:.0f}MB\n\n"
+        )
+        
+        if stats.get('top_processes'):
+            if detailed:
+                message += "🔝 <b>Все процессы по памяти:</b>\n"
+                message += self._format_process_tree(stats['top_processes'], limit=20) + "\n"
+            else:
+                message += "🔝 <b>Топ процессов по памяти:</b>\n"
+                message += self._format_process_tree(stats['top_processes'], limit=5) + "\n"
+        
+        message += f"\n<i>Данные на: {snapshot.as_of}</i>"
+        
+        if detailed:
+            keyboard = [
+                [InlineKeyboardButton("🔙 Краткий вид", callback_data="resources_refresh")],
+                [InlineKeyboardButton("🔄 Обновить", callback_data="resources_detailed")]
+            ]
+        else:
+            keyboard = [
+                [InlineKeyboardButton("📋 Подробнее", callback_data="resources_detailed")],
+                [InlineKeyboardButton("🔄 Обновить", callback_data="resources_refresh")]
+            ]
+        return message, InlineKeyboardMarkup(keyboard)
+        
+    @staticmethod
+    async def _edit_view(query, message: str, reply_markup: InlineKeyboardMarkup):
+        """Обновление сообщения с видом; если редактирование невозможно - новое сообщение"""
+        try:
+            await query.edit_message_text(
+                message,
+                reply_markup=reply_markup,
+                parse_mode=ParseMode.HTML
             )
+        except Exception as e:
+            # Снимок не изменился с прошлого показа - сообщение уже актуально
+            if "not modified" in str(e).lower():
+                return
+            await query.message.reply_text(
+                message,
+                reply_markup=reply_markup,
+                parse_mode=ParseMode.HTML
+            )
+        
+    async def _cmd_bots(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Команда /bots"""
+        if not self._is_admin(update.effective_user.id):
+            return
+            
+        try:
+            snapshot = await self.state_cache.latest(STATE_BOTS)
+            message, reply_markup = self._build_bots_view(snapshot)
             
             await update.message.reply_text(
                 message,
@@ -364,26 +555,8 @@ class TelegramBot:
             return
             
         try:
-            stats = await self.resource_monitor.get_system_stats()
-            
-            message = (
-                f"📊 <b>Мониторинг ресурсов</b>\n\n"
-                f"🖥️ <b>Система:</b>\n"
-                f"CPU: {stats['cpu_percent']:.1f}%\n"
-                f"RAM: {stats['memory_percent']:.1f}%\n"
-                f"Доступно RAM: {stats['memory_available_mb']:.0f}MB\n"
-                f"Всего RAM: {stats['memory_total_mb']:.0f}MB\n\n"
-            )
-            
-            if stats.get('top_processes'):
-                message += "🔝 <b>Топ процессов по памяти:</b>\n"
-                message += self._format_process_tree(stats['top_processes'], limit=5) + "\n"
-                    
-            keyboard = [
-                [InlineKeyboardButton("📋 Подробнее", callback_data="resources_detailed")],
-                [InlineKeyboardButton("🔄 Обновить", callback_data="resources_refresh")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            snapshot = await self.state_cache.latest(STATE_RESOURCES)
+            message, reply_markup = self._build_resources_view(snapshot)
             
             await update.message.reply_text(
                 message,
@@ -397,40 +570,121 @@ class TelegramBot:
                 parse_mode=ParseMode.HTML
             )
             
+    @staticmethod
+    def _format_log_lines(title: str, lines: List[str]) -> str:
+        """Строки лога в одном сообщении: не влезающие в лимит Telegram - самые старые - отбрасываются"""
+        header = f"📋 <b>{html.escape(title)}</b>\n\n"
+        body: List[str] = []
+        size = len(header) + len("<code></code>")
+        for line in reversed(lines):
+            escaped = html.escape(line.rstrip('\n')[:LOG_LINE_MAX]) + "\n"
+            if size + len(escaped) > LOG_MESSAGE_LIMIT:
+                break
+            body.append(escaped)
+            size += len(escaped)
+        if not body:
+            return header + "<i>Записей нет</i>"
+        return header + "<code>" + "".join(reversed(body)) + "</code>"
+        
     async def _cmd_logs(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Команда /logs"""
+        """Команда /logs [N] | /logs grep [окно] <шаблон> | /logs <дата> [N]"""
         if not self._is_admin(update.effective_user.id):
             return
             
+        args = context.args or []
         try:
-            # Получаем последние строки лога
-            log_lines = []
-            # Формируем имя файла лога на текущую дату
-            today = datetime.now().strftime("%d%m%Y")
-            log_file = self.config.LOGS_DIR / f"sentinel_{today}.log"
-            
-            try:
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-                    log_lines = lines[-20:]  # Последние 20 строк
-            except FileNotFoundError:
-                log_lines = ["Лог файл не найден"]
+            if args and args[0].lower() == 'grep':
+                args = args[1:]
+                # Необязательное окно: /logs grep 6h шаблон - только записи за последние 6 часов
+                window = parse_window(args[0]) if len(args) > 1 else None
+                if window is not None:
+                    args = args[1:]
+                pattern = " ".join(args).strip()
+                if not pattern:
+                    await update.message.reply_text(
+                        "Использование: <code>/logs grep [6h|2d] шаблон</code>", parse_mode=ParseMode.HTML
+                    )
+                    return
+                since = datetime.now() - window if window is not None else None
+                # Поиск идет по архивам потоково - может занять время на больших логах
+                result = await self.executor.run(
+                    grep_logs, pattern, LOGS_GREP_LIMIT, self.config.LOGS_DIR, since,
+                    name='grep_logs', timeout=60
+                )
+                period = f" с {since.strftime('%d.%m.%Y %H:%M')}" if since is not None else ""
+                title = f"Совпадения «{pattern}»{period} (файлов просмотрено: {result.files_scanned})"
+                if result.truncated:
+                    title += f", последние {LOGS_GREP_LIMIT}"
+                message = self._format_log_lines(title, result.lines)
                 
-            message = "📋 <b>Последние записи лога:</b>\n\n"
-            message += "<code>" + "".join(log_lines) + "</code>"
-            
-            # Ограничиваем длину сообщения
-            if len(message) > 4000:
-                message = message[:4000] + "...</code>"
+            else:
+                day = datetime.now().date()
+                count = LOGS_DEFAULT_LINES
+                # ДДММГГГГ - тоже цифры, но число строк не бывает восьмизначным
+                if args and (not args[0].isdigit() or len(args[0]) == 8):
+                    day = parse_day(args[0])
+                    if day is None:
+                        await update.message.reply_text(
+                            "Использование: <code>/logs [N]</code>, <code>/logs grep [6h|2d] шаблон</code>, "
+                            "<code>/logs ДД.ММ.ГГГГ [N]</code>",
+                            parse_mode=ParseMode.HTML
+                        )
+                        return
+                    args = args[1:]
+                if args and args[0].isdigit():
+                    count = max(1, min(int(args[0]), LOGS_MAX_LINES))
+                
+                log_file = await self.executor.run(find_log_file, day, self.config.LOGS_DIR, name='read_log')
+                if log_file is None:
+                    message = f"📋 Лог за {day.strftime('%d.%m.%Y')} не найден"
+                else:
+                    log_lines = await self.executor.run(tail_lines, log_file, count, name='read_log')
+                    message = self._format_log_lines(f"Последние записи лога ({log_file.name}):", log_lines)
                 
             await update.message.reply_text(message, parse_mode=ParseMode.HTML)
             
         except Exception as e:
             await update.message.reply_text(
-                f"❌ Ошибка получения логов: {e}",
+                f"❌ Ошибка получения логов: {html.escape(str(e))}",
                 parse_mode=ParseMode.HTML
             )
     
+    async def _cmd_botlogs(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Команда /botlogs <бот> [N] - строки из буфера в памяти, без чтения файлов"""
+        if not self._is_admin(update.effective_user.id):
+            return
+            
+        args = context.args or []
+        log_tail = self.bot_manager.log_tail
+        if not args:
+            bots = ", ".join(f"<code>{html.escape(name)}</code>" for name in log_tail.bots()) or "нет"
+            await update.message.reply_text(
+                f"Использование: <code>/botlogs бот [N]</code>\n\nБоты с логами: {bots}",
+                parse_mode=ParseMode.HTML
+            )
+            return
+            
+        bot_name = args[0]
+        count = LOGS_DEFAULT_LINES
+        if len(args) > 1 and args[1].isdigit():
+            count = max(1, min(int(args[1]), log_tail.buffer_size))
+        lines = log_tail.lines(bot_name, count)
+        if not lines:
+            await update.message.reply_text(
+                f"📋 Логов бота <code>{html.escape(bot_name)}</code> нет", parse_mode=ParseMode.HTML
+            )
+            return
+        
+        # Имя файла указываем, только если строки из нескольких файлов (supervisor.log, bot.log)
+        files = {file_name for file_name, _ in lines}
+        if len(files) > 1:
+            log_lines = [f"[{file_name}] {line}" for file_name, line in lines]
+            title = f"Логи бота {bot_name}:"
+        else:
+            log_lines = [line for _, line in lines]
+            title = f"Логи бота {bot_name} ({files.pop()}):"
+        await update.message.reply_text(self._format_log_lines(title, log_lines), parse_mode=ParseMode.HTML)
+    
     async def _cmd_setup(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Команда /setup"""
         if not self._is_admin(update.effective_user.id):
@@ -463,6 +717,126 @@ class TelegramBot:
                 parse_mode=ParseMode.HTML
             )
             
+    @staticmethod
+    def _format_latency(title: str, summary: LatencySummary) -> str:
+        return (f"{title}: n={summary.count} p50 {summary.p50:.1f} · p95 {summary.p95:.1f} · "
+                f"p99 {summary.p99:.1f} · max {summary.max:.1f}ms")
+        
+    async def _cmd_debug(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Команда /debug - задержки event loop, обработчиков, циклов мониторинга и пула потоков"""
+        if not self._is_admin(update.effective_user.id):
+            return
+            
+        uptime = int(time.time() - self.instrumentation.started_at)
+        message = f"🛠 <b>Диагностика</b> (за {uptime // 3600}ч {uptime % 3600 // 60}м)\n\n"
+        
+        loop_lag = self.instrumentation.summary(METRIC_LOOP_LAG).get(METRIC_LOOP_LAG)
+        message += "<b>Задержка event loop:</b>\n"
+        message += (self._format_latency("loop", loop_lag) if loop_lag else "нет замеров") + "\n"
+        
+        for title, prefix in (("Команды", "cmd/"), ("Кнопки", "cb/"), ("Циклы мониторинга", "tick/")):
+            summaries = self.instrumentation.summary(prefix)
+            if summaries:
+                message += f"\n<b>{title}:</b>\n"
+                message += "\n".join(
+                    self._format_latency(name[len(prefix):], summary) for name, summary in summaries.items()
+                ) + "\n"
+        
+        if self.executor:
+            metrics = self.executor.metrics()
+            message += (f"\n<b>Пул потоков:</b> {metrics.running}/{metrics.workers} заняты, "
+                        f"в очереди {metrics.queued}\n")
+            busiest = sorted(metrics.operations.items(), key=lambda item: item[1].run_total, reverse=True)[:6]
+            for name, stats in busiest:
+                message += (f"{name}: n={stats.calls} ожидание {stats.avg_wait_ms:.1f} · "
+                            f"работа {stats.avg_run_ms:.1f} · max {stats.run_max * 1000:.1f}ms")
+                if stats.timeouts or stats.errors:
+                    message += f" (таймауты {stats.timeouts}, ошибки {stats.errors})"
+                message += "\n"
+        
+        breaker = "разомкнут" if self.notifier.breaker.is_open else "замкнут"
+        message += (f"\n<b>Уведомления:</b> отправлено {self.notifier.sent}, в сводках {self.notifier.coalesced}, "
+                    f"в журнале {self.notifier.spool.count()}, размыкатель {breaker}\n")
+        
+        snapshots = [
+            f"{name} {snapshot.age:.0f}с назад за {snapshot.duration * 1000:.0f}ms"
+            for name, snapshot in ((name, self.state_cache.get(name)) for name in (STATE_BOTS, STATE_RESOURCES))
+            if snapshot
+        ] if self.state_cache else []
+        if snapshots:
+            message += "\n<b>Снимки:</b> " + ", ".join(snapshots) + "\n"
+        
+        await update.message.reply_text(message, parse_mode=ParseMode.HTML)
+            
+    @staticmethod
+    def _bulk_actions_row() -> List[InlineKeyboardButton]:
+        """Кнопки массовых операций для /bots"""
+        return [
+            InlineKeyboardButton("▶️ Все", callback_data="bots_all_start"),
+            InlineKeyboardButton("⏹ Все", callback_data="bots_all_stop"),
+            InlineKeyboardButton("🔁 Все", callback_data="bots_all_restart"),
+        ]
+        
+    @staticmethod
+    def _format_bulk_progress(action: str, results: List[BulkResult], total: int, finished: bool) -> str:
+        """Сообщение с прогрессом массовой операции"""
+        succeeded = sum(1 for result in results if result.success)
+        status = "завершено" if finished else "выполняется..."
+        message = (
+            f"<b>{BULK_ACTION_TITLES[action]}</b> - {status}\n\n"
+            f"Готово: {len(results)}/{total}, успешно: {succeeded}, ошибок: {len(results) - succeeded}\n\n"
+        )
+        for result in sorted(results, key=lambda r: r.bot_name):
+            icon = "✅" if result.success else "❌"
+            error = f" - {result.error[:60]}" if result.error else ""
+            message += f"{icon} {result.bot_name} ({result.elapsed:.1f}с){error}\n"
+        return message
+        
+    async def _run_bulk_action(self, query, action: str):
+        """Массовая операция с живым прогрессом в сообщении"""
+        results: List[BulkResult] = []
+        last_edit = 0.0
+        started = time.monotonic()
+        
+        async def on_progress(result: BulkResult, done: int, total: int):
+            nonlocal last_edit
+            results.append(result)
+            # Редактируем сообщение не чаще BULK_PROGRESS_INTERVAL (лимиты Telegram)
+            now = time.monotonic()
+            if done < total and now - last_edit >= BULK_PROGRESS_INTERVAL:
+                last_edit = now
+                await query.edit_message_text(
+                    self._format_bulk_progress(action, results, total, finished=False),
+                    parse_mode=ParseMode.HTML
+                )
+        
+        await query.edit_message_text(f"<b>{BULK_ACTION_TITLES[action]}</b> - выполняется...", parse_mode=ParseMode.HTML)
+        final_results = await self.bot_manager.bulk_action(action, progress=on_progress)
+        self.state_cache.refresh_soon(STATE_BOTS)
+        if not final_results:
+            await query.edit_message_text(
+                f"<b>{BULK_ACTION_TITLES[action]}</b>\n\nНет подходящих ботов",
+                reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔄 К списку ботов", callback_data="bots_refresh")]]),
+                parse_mode=ParseMode.HTML
+            )
+            return
+        
+        message = self._format_bulk_progress(action, final_results, len(final_results), finished=True)
+        message += f"\n⏱ Время: {time.monotonic() - started:.1f}с"
+        await query.edit_message_text(
+            message,
+            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔄 К списку ботов", callback_data="bots_refresh")]]),
+            parse_mode=ParseMode.HTML
+        )
+        
+    async def _start_bot(self, bot_name: str) -> bool:
+        """Ручной запуск бота"""
+        # Ручной запуск сбрасывает серию автоперезапусков (в том числе цикл падений)
+        self.bot_manager.restart_policy.reset(bot_name)
+        result = await self.bot_manager.start_bot_async(bot_name)
+        self.state_cache.refresh_soon(STATE_BOTS)
+        return result
+        
     async def _handle_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка callback запросов"""
         query = update.callback_query
@@ -476,7 +850,7 @@ class TelegramBot:
         try:
             if data.startswith("bot_start_"):
                 bot_name = data.replace("bot_start_", "")
-                result = self.bot_manager.start_bot(bot_name)
+                result = await self._start_bot(bot_name)
                 if result:
                     await query.edit_message_text(
                         f"✅ Бот {bot_name} запущен",
@@ -490,7 +864,8 @@ class TelegramBot:
                     
             elif data.startswith("bot_stop_"):
                 bot_name = data.replace("bot_stop_", "")
-                result = self.bot_manager.stop_bot(bot_name)
+                result = await self.bot_manager.stop_bot_async(bot_name)
+                self.state_cache.refresh_soon(STATE_BOTS)
                 if result:
                     await query.edit_message_text(
                         f"✅ Бот {bot_name} остановлен",
@@ -506,13 +881,13 @@ class TelegramBot:
                 bot_name = data.replace("bot_force_restart_", "")
                 
                 # Сначала принудительно останавливаем бот
-                stop_result = self.bot_manager.force_stop_bot(bot_name)
+                stop_result = await self.bot_manager.force_stop_bot_async(bot_name)
                 if stop_result:
                     # Ждем немного, чтобы процесс полностью завершился
                     await asyncio.sleep(2)
                     
                     # Затем запускаем бот
-                    start_result = self.bot_manager.start_bot(bot_name)
+                    start_result = await self._start_bot(bot_name)
                     if start_result:
                         await query.edit_message_text(
                             f"💥 Бот {bot_name} принудительно перезапущен",
@@ -531,7 +906,7 @@ class TelegramBot:
                     
             elif data.startswith("bot_info_"):
                 bot_name = data.replace("bot_info_", "")
-                bot_info = self.bot_manager.get_bot_info(bot_name)
+                bot_info = await self.executor.run(self.bot_manager.get_bot_info, bot_name)
                 
                 if bot_info:
                     message = (
@@ -546,119 +921,35 @@ class TelegramBot:
                     
                 await query.edit_message_text(message, parse_mode=ParseMode.HTML)
                 
-            elif data == "bots_refresh":
-                # Для обновления создаем новое сообщение вместо редактирования
-                available_bots = self.bot_manager.discover_bots()
-                
-                # Получаем информацию о всех ботах и определяем запущенные
-                running_bots = []
-                for bot_name in available_bots:
-                    bot_info = self.bot_manager.get_bot_info(bot_name)
-                    if bot_info and bot_info.is_running:
-                        running_bots.append(bot_name)
-                
-                keyboard = []
+            elif data == "bots_all_start":
+                await self._run_bulk_action(query, 'start')
                 
-                # Кнопки для каждого бота
-                for bot_name in available_bots:
-                    is_running = bot_name in running_bots
-                    status_icon = "🟢" if is_running else "🔴"
-                    action = "stop" if is_running else "start"
-                    action_text = "Остановить" if is_running else "Запустить"
-                    
-                    keyboard.append([
-                        InlineKeyboardButton(
-                            f"{status_icon} {bot_name}",
-                            callback_data=f"bot_info_{bot_name}"
-                        ),
-                        InlineKeyboardButton(
-                            action_text,
-                            callback_data=f"bot_{action}_{bot_name}"
-                        )
-                    ])
-                    
-                    # Добавляем кнопку Force Restart для запущенных ботов
-                    if is_running:
-                        keyboard.append([
-                            InlineKeyboardButton(
-                                "💥 Force Restart",
-                                callback_data=f"bot_force_restart_{bot_name}"
-                        )
-                    ])
-                    
-                # Кнопка обновления
-                keyboard.append([
-                    InlineKeyboardButton("🔄 Обновить", callback_data="bots_refresh")
-                ])
-                
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                
-                # Добавляем временную метку для уникальности сообщения
-                timestamp = datetime.now().strftime("%H:%M:%S")
-                
-                message = (
-                    f"🤖 <b>Управление ботами</b>\n\n"
-                    f"Найдено ботов: {len(available_bots)}\n"
-                    f"Запущено: {len(running_bots)}\n"
-                    f"<i>Обновлено: {timestamp}</i>"
+            elif data in ("bots_all_stop", "bots_all_restart"):
+                # Остановка/перезапуск всего парка - только после подтверждения
+                action = data.replace("bots_all_", "")
+                keyboard = [[
+                    InlineKeyboardButton("✅ Да", callback_data=f"bots_all_confirm_{action}"),
+                    InlineKeyboardButton("❌ Отмена", callback_data="bots_refresh"),
+                ]]
+                await query.edit_message_text(
+                    f"<b>{BULK_ACTION_TITLES[action]}</b>\n\nПрименить ко всем запущенным ботам?",
+                    reply_markup=InlineKeyboardMarkup(keyboard),
+                    parse_mode=ParseMode.HTML
                 )
                 
-                try:
-                    await query.edit_message_text(
-                        message,
-                        reply_markup=reply_markup,
-                        parse_mode=ParseMode.HTML
-                    )
-                except Exception as e:
-                    # Если не удалось отредактировать, отправляем новое сообщение
-                    await query.message.reply_text(
-                        message,
-                        reply_markup=reply_markup,
-                        parse_mode=ParseMode.HTML
-                    )
+            elif data in ("bots_all_confirm_stop", "bots_all_confirm_restart"):
+                await self._run_bulk_action(query, data.replace("bots_all_confirm_", ""))
                 
-            elif data == "resources_refresh":
-                # Обновляем ресурсы через callback
+            elif data == "bots_refresh":
+                snapshot = await self.state_cache.latest(STATE_BOTS, max_age=REFRESH_MAX_AGE, wait=REFRESH_WAIT)
+                message, reply_markup = self._build_bots_view(snapshot)
+                await self._edit_view(query, message, reply_markup)
+                
+            elif data in ("resources_refresh", "resources_detailed"):
                 try:
-                    stats = await self.resource_monitor.get_system_stats()
-                    
-                    # Добавляем временную метку для уникальности сообщения
-                    timestamp = datetime.now().strftime("%H:%M:%S")
-                    
-                    message = (
-                        f"📊 <b>Мониторинг ресурсов</b>\n\n"
-                        f"🖥️ <b>Система:</b>\n"
-                        f"CPU: {stats['cpu_percent']:.1f}%\n"
-                        f"RAM: {stats['memory_percent']:.1f}%\n"
-                        f"Доступно RAM: {stats['memory_available_mb']:.0f}MB\n"
-                        f"Всего RAM: {stats['memory_total_mb']:.0f}MB\n\n"
-                    )
-                    
-                    if stats.get('top_processes'):
-                        message += "🔝 <b>Топ процессов по памяти:</b>\n"
-                        message += self._format_process_tree(stats['top_processes'], limit=5) + "\n"
-                    
-                    message += f"\n<i>Обновлено: {timestamp}</i>"
-                    
-                    keyboard = [
-                        [InlineKeyboardButton("📋 Подробнее", callback_data="resources_detailed")],
-                        [InlineKeyboardButton("🔄 Обновить", callback_data="resources_refresh")]
-                    ]
-                    reply_markup = InlineKeyboardMarkup(keyboard)
-                    
-                    try:
-                        await query.edit_message_text(
-                            message,
-                            reply_markup=reply_markup,
-                            parse_mode=ParseMode.HTML
-                        )
-                    except Exception as e:
-                        # Если не удалось отредактировать, отправляем новое сообщение
-                        await query.message.reply_text(
-                            message,
-                            reply_markup=reply_markup,
-                            parse_mode=ParseMode.HTML
-                        )
+                    snapshot = await self.state_cache.latest(STATE_RESOURCES, max_age=REFRESH_MAX_AGE, wait=REFRESH_WAIT)
+                    message, reply_markup = self._build_resources_view(snapshot, detailed=data == "resources_detailed")
+                    await self._edit_view(query, message, reply_markup)
                 except Exception as e:
                     logger.error(f"Ошибка обновления ресурсов: {e}")
                     await query.edit_message_text(
@@ -666,55 +957,6 @@ class TelegramBot:
                         parse_mode=ParseMode.HTML
                     )
             
-            elif data == "resources_detailed":
-                # Показать все процессы
-                try:
-                    stats = await self.resource_monitor.get_system_stats()
-                    
-                    # Добавляем временную метку для уникальности сообщения
-                    timestamp = datetime.now().strftime("%H:%M:%S")
-                    
-                    message = (
-                        f"📊 <b>Мониторинг ресурсов - Подробно</b>\n\n"
-                        f"🖥️ <b>Система:</b>\n"
-                        f"CPU: {stats['cpu_percent']:.1f}%\n"
-                        f"RAM: {stats['memory_percent']:.1f}%\n"
-                        f"Доступно RAM: {stats['memory_available_mb']:.0f}MB\n"
-                        f"Всего RAM: {stats['memory_total_mb']:.0f}MB\n\n"
-                    )
-                    
-                    if stats.get('top_processes'):
-                        message += "🔝 <b>Все процессы по памяти:</b>\n"
-                        message += self._format_process_tree(stats['top_processes'], limit=20) + "\n"
-                    
-                    message += f"\n<i>Обновлено: {timestamp}</i>"
-                    
-                    keyboard = [
-                        [InlineKeyboardButton("🔙 Краткий вид", callback_data="resources_refresh")],
-                        [InlineKeyboardButton("🔄 Обновить", callback_data="resources_detailed")]
-                    ]
-                    reply_markup = InlineKeyboardMarkup(keyboard)
-                    
-                    try:
-                        await query.edit_message_text(
-                            message,
-                            reply_markup=reply_markup,
-                            parse_mode=ParseMode.HTML
-                        )
-                    except Exception as e:
-                        # Если не удалось отредактировать, отправляем новое сообщение
-                        await query.message.reply_text(
-                            message,
-                            reply_markup=reply_markup,
-                            parse_mode=ParseMode.HTML
-                        )
-                except Exception as e:
-                    logger.error(f"Ошибка получения подробной статистики: {e}")
-                    await query.edit_message_text(
-                        f"❌ Ошибка получения подробной статистики: {e}",
-                        parse_mode=ParseMode.HTML
-                    )
-            
             elif data == "setup_restart":
                 # Перезапуск сервиса
                 try:
@@ -724,12 +966,7 @@ class TelegramBot:
                         parse_mode=ParseMode.HTML
                     )
                     
-                    result = subprocess.run(
-                        ["sudo", "systemctl", "restart", "saldoran-sentinel"],
-                        capture_output=True,
-                        text=True,
-                        timeout=30
-                    )
+                    result = await self._run_command(["sudo", "systemctl", "restart", "saldoran-sentinel"], timeout=30)
                     
                     # Просто сообщаем о перезапуске, не проверяем статус
                     message = "✅ Сервис перезапущен!"
@@ -765,12 +1002,7 @@ class TelegramBot:
             elif data == "setup_status":
                 # Статус сервиса
                 try:
-                    result = subprocess.run(
-                        ["sudo", "systemctl", "status", "saldoran-sentinel", "--no-pager"],
-                        capture_output=True,
-                        text=True,
-                        timeout=10
-                    )
+                    result = await self._run_command(["sudo", "systemctl", "status", "saldoran-sentinel", "--no-pager"], timeout=10)
                     
                     status_text = result.stdout[:1000]  # Ограничиваем длину
                     if len(result.stdout) > 1000:
@@ -792,12 +1024,7 @@ class TelegramBot:
             elif data == "setup_clear_cache":
                 # Очистка кэша
                 try:
-                    result = subprocess.run(
-                        ['sudo', 'sysctl', '-w', 'vm.drop_caches=3'],
-                        capture_output=True,
-                        text=True,
-                        timeout=10
-                    )
+                    result = await self._run_command(['sudo', 'sysctl', '-w', 'vm.drop_caches=3'], timeout=10)
                     
                     if result.returncode == 0:
                         message = "✅ Кэш системы очищен!"
@@ -958,7 +1185,7 @@ class TelegramBot:
                 try:
                     Config.reload_config()
                     new_value = not Config.NOTIFY_CPU_ENABLED
-                    self._update_env_setting('NOTIFY_CPU_ENABLED', str(new_value).lower())
+                    await self.executor.run(self._update_env_setting, 'NOTIFY_CPU_ENABLED', str(new_value).lower(), name='env_update')
                     Config.reload_config()
                     
                     # Возвращаемся в меню CPU
@@ -998,7 +1225,7 @@ class TelegramBot:
                 try:
                     Config.reload_config()
                     new_value = not Config.NOTIFY_RAM_ENABLED
-                    self._update_env_setting('NOTIFY_RAM_ENABLED', str(new_value).lower())
+                    await self.executor.run(self._update_env_setting, 'NOTIFY_RAM_ENABLED', str(new_value).lower(), name='env_update')
                     Config.reload_config()
                     
                     # Возвращаемся в меню RAM
@@ -1037,7 +1264,7 @@ class TelegramBot:
                 # Установка порога CPU
                 try:
                     threshold = int(data.replace("cpu_threshold_", ""))
-                    self._update_env_setting('CPU_THRESHOLD', str(threshold))
+                    await self.executor.run(self._update_env_setting, 'CPU_THRESHOLD', str(threshold), name='env_update')
                     Config.reload_config()
                     
                     # Возвращаемся в меню CPU
@@ -1076,7 +1303,7 @@ class TelegramBot:
                 # Установка порога RAM
                 try:
                     threshold = int(data.replace("ram_threshold_", ""))
-                    self._update_env_setting('RAM_THRESHOLD', str(threshold))
+                    await self.executor.run(self._update_env_setting, 'RAM_THRESHOLD', str(threshold), name='env_update')
                     Config.reload_config()
                     
                     # Возвращаемся в меню RAM
@@ -1125,33 +1352,9 @@ class TelegramBot:
                         env_file = Path(__file__).parent.parent / '.env'
                         
                         try:
-                            # Читаем текущий .env файл
-                            env_content = ""
-                            if env_file.exists():
-                                with open(env_file, 'r', encoding='utf-8') as f:
-                                    env_content = f.read()
-                            
-                            # Обновляем или добавляем LOG_LEVEL
-                            lines = env_content.split('\n')
-                            updated = False
-                            for i, line in enumerate(lines):
-                                if line.startswith('LOG_LEVEL='):
-                                    lines[i] = f'LOG_LEVEL={new_level}'
-                                    updated = True
-                                    break
-                            
-                            if not updated:
-                                lines.append(f'LOG_LEVEL={new_level}')
-                            
-                            # Записываем обновленный .env файл
-                            with open(env_file, 'w', encoding='utf-8') as f:
-                                f.write('\n'.join(lines))
-                            
-                            # Логируем что записали
+                            # Обновляем или добавляем LOG_LEVEL (файловые операции - в пуле потоков)
+                            await self.executor.run(self._update_env_setting, 'LOG_LEVEL', new_level, name='env_update')
                             logger.info(f"Обновлен .env файл: {env_file}")
-                            logger.info(f"Новый LOG_LEVEL: {new_level}")
-                            env_content = '\n'.join(lines)
-                            logger.info(f"Содержимое .env: {repr(env_content)}")
                             
                             # Обновляем переменную окружения для текущего процесса
                             os.environ['LOG_LEVEL'] = new_level